@@ -0,0 +1,92 @@
+"""
+Compares structuring Cloudlets API responses with the previous unconfigured converter.
+
+  python benchmarks/cloudlet_structure.py [number of match rules]
+"""
+import sys, timeit
+from datetime import datetime
+import dateutil.parser
+from cattr import Converter
+from bossman.plugins.akamai.cloudlet_v3.converter import make_converter
+from bossman.plugins.akamai.cloudlet_v3.data import GetPoliciesResponse, SharedPolicyVersion
+
+def make_legacy_converter():
+  converter = Converter()
+  converter.register_structure_hook(datetime, lambda d, t: dateutil.parser.isoparse(d))
+  return converter
+
+def make_policy_version(rule_count):
+  return {
+    "policyId": 1,
+    "version": 1,
+    "createdBy": "jane.doe",
+    "createdDate": "2021-06-01T12:00:00.123Z",
+    "modifiedBy": "jane.doe",
+    "modifiedDate": "2021-06-01T12:00:00.123Z",
+    "description": "synthetic",
+    "matchRules": list({
+      "type": "erMatchRule",
+      "name": "rule {}".format(i),
+      "start": 0,
+      "end": 0,
+      "matchURL": "/path/{}".format(i),
+      "redirectURL": "https://www.example.com/{}".format(i),
+      "statusCode": 301,
+      "useIncomingQueryString": False,
+      "matches": [{"matchType": "path", "matchValue": "/path/{}".format(i), "matchOperator": "equals"}],
+    } for i in range(rule_count)),
+  }
+
+def make_policies(count):
+  activation = lambda network: {
+    "id": 1,
+    "createdBy": "jane.doe",
+    "createdDate": "2021-06-01T12:00:00.123Z",
+    "finishDate": "2021-06-01T12:05:00.123Z",
+    "network": network,
+    "operation": "ACTIVATION",
+    "status": "SUCCESS",
+    "policyId": 1,
+    "policyVersion": 1,
+    "policyVersionDeleted": False,
+  }
+  return {
+    "content": list({
+      "id": i,
+      "name": "policy_{}".format(i),
+      "description": "synthetic",
+      "policyType": "SHARED",
+      "cloudletType": "ER",
+      "createdBy": "jane.doe",
+      "createdDate": "2021-06-01T12:00:00.123Z",
+      "currentActivations": {
+        "production": {"effective": activation("PRODUCTION"), "latest": activation("PRODUCTION")},
+        "staging": {"effective": activation("STAGING"), "latest": activation("STAGING")},
+      },
+      "groupId": 1,
+      "modifiedBy": "jane.doe",
+      "modifiedDate": "2021-06-01T12:00:00.123Z",
+    } for i in range(count)),
+  }
+
+def main(rule_count):
+  legacy = make_legacy_converter()
+  converter = make_converter()
+  policy_version = make_policy_version(rule_count)
+  policies = make_policies(1000)
+
+  # sanity check: both converters agree
+  assert legacy.structure(policy_version, SharedPolicyVersion) == converter.structure(policy_version, SharedPolicyVersion)
+  assert legacy.structure(policies, GetPoliciesResponse) == converter.structure(policies, GetPoliciesResponse)
+
+  runs = (
+    ("policy version ({} rules)".format(rule_count), policy_version, SharedPolicyVersion),
+    ("1000 policies", policies, GetPoliciesResponse),
+  )
+  for label, data, cls in runs:
+    for name, _converter in (("legacy", legacy), ("generated", converter)):
+      best = min(timeit.repeat(lambda: _converter.structure(data, cls), number=10, repeat=3)) / 10
+      print("{:<28} {:<10} {:>10.3f} ms".format(label, name, best * 1000))
+
+if __name__ == "__main__":
+  main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
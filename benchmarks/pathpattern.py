@@ -0,0 +1,77 @@
+"""
+Compares path pattern matching against the previous parse based implementation.
+
+  python benchmarks/pathpattern.py [number of paths]
+
+The legacy implementation requires the parse package (pip install parse).
+"""
+import sys, timeit
+import parse
+from bossman.config import PathPattern, PathPatternSet
+
+PATTERNS = (
+  "akamai/property/{name}",
+  "akamai/cloudlet/{name}",
+  "akamai/edgehostname/{name}.json",
+)
+
+class LegacyPathPattern:
+  @parse.with_pattern(r'[^/]+')
+  def PathComponent(text):
+    return text
+
+  def __init__(self, pattern):
+    self._format_pattern = pattern
+    self._match_pattern = pattern.replace("}", ":PathComponent}")
+
+  def match(self, path):
+    result = parse.search(self._match_pattern, path, extra_types=dict(PathComponent=LegacyPathPattern.PathComponent))
+    if result:
+      canonical = self._format_pattern.format(**result.named)
+      if path.startswith(canonical):
+        return canonical, result.named
+    return None
+
+def make_paths(count):
+  paths = []
+  for i in range(count):
+    kind = i % 4
+    if kind == 0:
+      paths.append("akamai/property/www{}/rules.json".format(i))
+    elif kind == 1:
+      paths.append("akamai/cloudlet/er{}/policy.json".format(i))
+    elif kind == 2:
+      paths.append("akamai/edgehostname/www{}.example.com.json".format(i))
+    else:
+      paths.append("docs/page{}.md".format(i))
+  return paths
+
+def first_match(patterns, path):
+  for idx, pattern in enumerate(patterns):
+    if pattern.match(path):
+      return idx
+  return None
+
+def main(count):
+  paths = make_paths(count)
+  legacy = list(LegacyPathPattern(p) for p in PATTERNS)
+  compiled = list(PathPattern(p) for p in PATTERNS)
+  combined = PathPatternSet(compiled)
+
+  # sanity check: all implementations agree
+  for path in paths:
+    expected = first_match(legacy, path)
+    assert first_match(compiled, path) == expected, path
+    assert combined.match(path)[0] == expected, path
+
+  runs = (
+    ("parse.search (legacy)", lambda: [first_match(legacy, path) for path in paths]),
+    ("PathPattern", lambda: [first_match(compiled, path) for path in paths]),
+    ("PathPatternSet", lambda: [combined.match(path) for path in paths]),
+  )
+  for label, fn in runs:
+    best = min(timeit.repeat(fn, number=1, repeat=3))
+    print("{:<24} {:>10.1f} ms {:>10.2f} us/path".format(label, best * 1000, best * 1e6 / count))
+
+if __name__ == "__main__":
+  main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -1,7 +1,9 @@
 import platform
+import threading
 from os.path import abspath, commonpath, join
 from fnmatch import fnmatch
-from functools import cached_property
+from functools import cached_property, partial
+from concurrent.futures import Future
 
 from rich.console import Console
 from rich.progress import Progress
@@ -51,6 +53,9 @@ class DryRunApplyResult(ResourceApplyResultABC):
     """
     return False
 
+  def to_dict(self) -> dict:
+    return dict(super(DryRunApplyResult, self).to_dict(), revision=self.revision.id, dry_run=True)
+
   def __rich_console__(self, *args, **kwargs):
     parts = []
     parts.append(r'[dark_orange3](--dry-run)[/]')
@@ -69,6 +74,8 @@ class Bossman:
     self.config = config
     self.root = root
     self.logger = get_class_logger(self)
+    self._notes_fetched = False
+    self._notes_lock = threading.Lock()
 
   @cached_property
   def repo(self):
@@ -102,6 +109,25 @@ class Bossman:
     conf.set_value("bossman", "version", self.version)
 
 
+  @if_initialized
+  def fetch_notes(self):
+    """
+    Fetches all the notes from the remotes, once per command: subsequent calls
+    are no-ops.
+    """
+    with self._notes_lock:
+      if not self._notes_fetched:
+        self.repo.fetch_notes("*")
+        self._notes_fetched = True
+
+  @if_initialized
+  def push_notes(self):
+    """
+    Pushes the notes written since the last push, in a single push per remote.
+    Commands writing notes should call this once they are done.
+    """
+    self.repo.push_notes()
+
   @if_initialized
   def get_resources(self, *globs, rev: str = "HEAD", exact_match: bool = False) -> list:
     resources = self.resource_manager.get_resources(self.repo, rev)
@@ -119,6 +145,7 @@ class Bossman:
 
   @if_initialized
   def get_missing_revisions(self, resource: ResourceABC, since_rev: str = None) -> list:
+    self.fetch_notes()
     resource_type = self.resource_manager.get_resource_type(resource.path)
     revisions = self.get_revisions(resources=[resource], since_rev=since_rev)
     missing = []
@@ -140,16 +167,33 @@ class Bossman:
 
   @if_initialized
   def get_resource_statuses(self, resources: list) -> list:
-    from concurrent.futures import ThreadPoolExecutor
+    statuses = dict((resource.path, status) for resource, status in self.iter_resource_statuses(resources))
+    return list(statuses.get(resource.path) for resource in resources)
+
+  @if_initialized
+  def iter_resource_statuses(self, resources: list):
+    """
+    Yields (resource, status) tuples as soon as the status of each of {resources}
+    is available, in no particular order.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
     futures = []
+    by_type = dict()
+    for resource in resources:
+      resource_type = self.resource_manager.get_resource_type(resource.path)
+      by_type.setdefault(resource_type, []).append(resource)
     with ThreadPoolExecutor(10, "get_status") as executor:
-      for resource in resources:
-        futures.append(executor.submit(self.get_resource_status, resource))
-    return [f.result() for f in futures]
+      for resource_type, _resources in by_type.items():
+        futures.append(executor.submit(resource_type.prefetch_resource_statuses, _resources))
+      for f in futures:
+        f.result()
+      futures = dict((executor.submit(self.get_resource_status, resource), resource) for resource in resources)
+      for f in as_completed(futures):
+        yield futures[f], f.result()
 
   @if_initialized
   def get_resource_status(self, resource: ResourceABC) -> ResourceStatusABC:
-    self.repo.fetch_notes(resource.path)
+    self.fetch_notes()
     resource_type = self.resource_manager.get_resource_type(resource.path)
     return resource_type.get_resource_status(resource)
 
@@ -170,45 +214,131 @@ class Bossman:
     return self.repo.get_revisions(since_rev, until_rev, resources)
 
   @if_initialized
-  def apply_change(self, resource: ResourceABC, revision: Revision, dry_run: bool):
+  def prepare_changes(self, resource: ResourceABC, revisions: list, dry_run: bool):
+    """
+    Yields (revision, prepared) tuples for {revisions}, in order, to be passed to
+    `apply_change`. While the caller applies a revision, the next one is prepared
+    in the background; {prepared} is a future, which `apply_change` waits for.
+    """
+    if dry_run or len(revisions) == 0:
+      for revision in revisions:
+        yield revision, None
+      return
+    from concurrent.futures import ThreadPoolExecutor
+    resource_type = self.resource_manager.get_resource_type(resource.path)
+    with ThreadPoolExecutor(1, "prepare") as executor:
+      prepare = lambda revision: executor.submit(resource_type.prepare_change, resource, revision)
+      prepared = prepare(revisions[0])
+      for idx, revision in enumerate(revisions):
+        next_prepared = prepare(revisions[idx+1]) if idx + 1 < len(revisions) else None
+        yield revision, prepared
+        prepared = next_prepared
+
+  @if_initialized
+  def apply_change(self, resource: ResourceABC, revision: Revision, dry_run: bool, prepared=None):
     if dry_run:
       return DryRunApplyResult(resource, revision)
-    self.repo.fetch_notes(resource.path)
+    self.fetch_notes()
     previous_revision = self.repo.get_last_revision(resource.paths, revision.parent_id)
     resource_type = self.resource_manager.get_resource_type(resource.path)
-    result = resource_type.apply_change(resource, revision, previous_revision)
-    self.repo.push_notes(resource.path)
-    return result
+    try:
+      prepared = prepared.result() if prepared is not None else None
+      if prepared is not None:
+        return resource_type.apply_change(resource, revision, previous_revision, prepared=prepared)
+      return resource_type.apply_change(resource, revision, previous_revision)
+    finally:
+      self._flush_notes(resource)
+
+  @if_initialized
+  def apply_squashed(self, resource: ResourceABC, revisions: list, dry_run: bool):
+    """
+    Applies the changes of all the {revisions} at once, by applying only the last one,
+    based on the revision preceding the first. If that succeeds, the other revisions are
+    marked as squashed into it, so they are no longer pending.
+    """
+    tip = revisions[-1]
+    if dry_run:
+      return DryRunApplyResult(resource, tip)
+    self.fetch_notes()
+    previous_revision = self.repo.get_last_revision(resource.paths, revisions[0].parent_id)
+    resource_type = self.resource_manager.get_resource_type(resource.path)
+    try:
+      result = resource_type.apply_change(resource, tip, previous_revision)
+      if not result.had_errors:
+        for revision in revisions[:-1]:
+          revision.get_notes(resource.path).set(squashed_into=tip.id)
+      return result
+    finally:
+      self._flush_notes(resource)
+
+  def _flush_notes(self, resource: ResourceABC, *args):
+    """
+    Writes the notes of {resource} to the local notes ref once it was changed
+    remotely, so they survive the process being killed before `push_notes`.
+    """
+    self.repo.flush_notes(resource.path)
 
   @if_initialized
   def validate(self, resource: ResourceABC):
     resource_type = self.resource_manager.get_resource_type(resource.path)
     resource_type.validate_working_tree(resource)
 
+  @if_initialized
+  def is_validated(self, resource: ResourceABC) -> bool:
+    resource_type = self.resource_manager.get_resource_type(resource.path)
+    return resource_type.is_validated(resource)
+
   @if_initialized
   def prerelease(self, resource: ResourceABC, revision: Revision, message: str, on_update: callable):
-    self.repo.fetch_notes(resource.path)
+    self.fetch_notes()
     resource_type = self.resource_manager.get_resource_type(resource.path)
-    resource_type.prerelease(resource, revision, message, on_update)
-    self.repo.push_notes(resource.path)
+    return self._flush_notes_when_done(resource, resource_type.prerelease, revision, message, on_update)
 
   @if_initialized
   def release(self, resource: ResourceABC, revision: Revision, message: str, on_update: callable):
-    self.repo.fetch_notes(resource.path)
+    self.fetch_notes()
     resource_type = self.resource_manager.get_resource_type(resource.path)
-    resource_type.release(resource, revision, message, on_update)
-    self.repo.push_notes(resource.path)
-
-  # @if_initialized
-  # def prerelease(self, resources: list, revision: Revision):
-  #   resource_types = set(self.resource_manager.get_resource_type(resource.path) for resource in resources)
-  #   for resource_type in resource_types:
-  #     _resources = resource_type.get_resources(list(resource.path for resource in resources))
-  #     resource_type.prerelease(_resources, revision)
-
-  # @if_initialized
-  # def release(self, resources: list, revision: Revision):
-  #   resource_types = set(self.resource_manager.get_resource_type(resource.path) for resource in resources)
-  #   for resource_type in resource_types:
-  #     _resources = resource_type.get_resources(list(resource.path for resource in resources))
-  #     resource_type.release(_resources, revision)
+    return self._flush_notes_when_done(resource, resource_type.release, revision, message, on_update)
+
+  def _flush_notes_when_done(self, resource: ResourceABC, release: callable, *args):
+    """
+    Calls {release} for {resource}, flushing its notes once the returned future, if
+    any, is done.
+    """
+    try:
+      result = release(resource, *args)
+    except Exception:
+      self._flush_notes(resource)
+      raise
+    if isinstance(result, Future):
+      result.add_done_callback(partial(self._flush_notes, resource))
+    else:
+      self._flush_notes(resource)
+    return result
+
+  @if_initialized
+  def prerelease_many(self, resources: list, revision: Revision, message: str, on_update: callable) -> list:
+    return self._release_many("prerelease_many", resources, revision, message, on_update)
+
+  @if_initialized
+  def release_many(self, resources: list, revision: Revision, message: str, on_update: callable) -> list:
+    return self._release_many("release_many", resources, revision, message, on_update)
+
+  def _release_many(self, method: str, resources: list, revision: Revision, message: str, on_update: callable) -> list:
+    """
+    Hands {resources} to their resource type, all at once, and returns one future per
+    resource resolving once its release completes.
+    """
+    self.fetch_notes()
+    by_type = dict()
+    for resource in resources:
+      resource_type = self.resource_manager.get_resource_type(resource.path)
+      by_type.setdefault(resource_type, []).append(resource)
+    futures = dict()
+    for resource_type, _resources in by_type.items():
+      _futures = getattr(resource_type, method)(_resources, revision, message, on_update)
+      for resource, future in zip(_resources, _futures):
+        if future is not None:
+          future.add_done_callback(partial(self._flush_notes, resource))
+        futures[resource.path] = future
+    return list(futures.get(resource.path) for resource in resources)
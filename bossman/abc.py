@@ -4,8 +4,12 @@ from bossman.repo import Repo, Revision
 from bossman.logging import logger
 from bossman.repo import RevisionDetails
 import pathlib
+from concurrent.futures import Future, ThreadPoolExecutor
 from os.path import relpath, join
 
+# Number of releases submitted concurrently by the default ResourceTypeABC.release_many
+RELEASE_WORKERS = 16
+
 class ResourceABC(ABC):
   """
   A {ResourceABC} is just a thing that lives at a path.
@@ -59,6 +63,13 @@ class ResourceStatusABC(ABC):
     """
     pass
 
+  def to_dict(self) -> dict:
+    """
+    Returns the status as plain data, for machine readable output. Plugins
+    extend it with the details they render.
+    """
+    return dict(exists=self.exists, dirty=self.dirty)
+
 
 
 class ResourceApplyResultABC(ABC):
@@ -69,6 +80,13 @@ class ResourceApplyResultABC(ABC):
     """
     pass
 
+  def to_dict(self) -> dict:
+    """
+    Returns the result as plain data, for machine readable output. Plugins
+    extend it with the details they render.
+    """
+    return dict(had_errors=self.had_errors)
+
 
 
 class ResourceTypeABC(ABC):
@@ -119,6 +137,14 @@ class ResourceTypeABC(ABC):
   def get_resource_status(self, resource: ResourceABC):
     pass
 
+  def prefetch_resource_statuses(self, resources: list):
+    """
+    Called before the statuses of {resources} are requested, so that the resource
+    type can fetch their remote state in bulk rather than one resource at a time.
+    The default implementation does nothing.
+    """
+    pass
+
   def affects(self, resource: ResourceABC, revision: Revision) -> bool:
     return len(set(resource.paths).intersection(revision.affected_paths)) > 0
 
@@ -133,6 +159,14 @@ class ResourceTypeABC(ABC):
     """
     pass
 
+  def is_squashed(self, resource: ResourceABC, revision: Revision) -> bool:
+    """
+    Returns True if {revision} was skipped by `apply --squash`, its changes having
+    been applied as part of a later revision. Squashed revisions are not pending.
+    """
+    notes = revision.get_notes(resource.path)
+    return notes.get("squashed_into", None) is not None
+
   @abstractmethod
   def is_applied(self, resource: ResourceABC, revision: Revision) -> bool:
     """
@@ -148,19 +182,81 @@ class ResourceTypeABC(ABC):
     """
     pass
 
+  def prepare_change(self, resource: ResourceABC, revision: Revision):
+    """
+    Does the work needed to apply {revision} to {resource} that doesn't change any
+    remote state, such as reading and validating the revision's contents.
+
+    Bossman prepares the next revision of a resource while the current one is being
+    applied; the result is passed to `apply_change` as {prepared}. The default
+    implementation returns None, in which case `apply_change` is called without it.
+    """
+    return None
+
   @abstractmethod
-  def apply_change(self, resource: ResourceABC, revision: Revision, previous_revision: Revision) -> ResourceApplyResultABC:
+  def apply_change(self, resource: ResourceABC, revision: Revision, previous_revision: Revision, prepared=None) -> ResourceApplyResultABC:
     pass
 
   @abstractmethod
   def validate_working_tree(self, resource: ResourceABC):
     pass
 
+  def is_validated(self, resource: ResourceABC) -> bool:
+    """
+    Returns True if the contents of {resource} in the working tree are known to have
+    passed validation already, in which case `validate_working_tree` is not called.
+    It must be cheap, bossman calls it before dispatching validation to workers.
+    """
+    return False
+
   @abstractmethod
   def prerelease(self, resource: ResourceABC, revision: Revision, message: str, on_update: callable = lambda status, progress: None):
+    """
+    Starts the release of {revision} to staging. Activations that don't complete
+    right away are tracked in the background, in which case a
+    concurrent.futures.Future resolving on completion is returned.
+    """
     pass
 
   @abstractmethod
   def release(self, resource: ResourceABC, revision: Revision, message: str, on_update: callable = lambda status, progress: None):
+    """
+    Same as prerelease, to production.
+    """
     pass
 
+  def prerelease_many(self, resources: list, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None) -> list:
+    """
+    Starts the release of {revision} to staging for each of {resources}, and returns
+    one future per resource, resolving once its release completes.
+
+    Resource types able to submit several activations at once override this; the
+    default implementation calls prerelease for each resource, in parallel.
+    """
+    return _release_each(self.prerelease, resources, revision, message, on_update)
+
+  def release_many(self, resources: list, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None) -> list:
+    """
+    Same as prerelease_many, to production.
+    """
+    return _release_each(self.release, resources, revision, message, on_update)
+
+def _release_each(release: callable, resources: list, revision: Revision, message: str, on_update: callable) -> list:
+  executor = ThreadPoolExecutor(RELEASE_WORKERS, "release")
+  futures = []
+  for resource in resources:
+    future = Future()
+    def on_submitted(submitted: Future, future=future):
+      if submitted.exception() is None and isinstance(submitted.result(), Future):
+        submitted = submitted.result()
+      def on_done(done: Future):
+        if done.exception() is not None:
+          future.set_exception(done.exception())
+        else:
+          future.set_result(done.result())
+      submitted.add_done_callback(on_done)
+    executor.submit(release, resource, revision, message, on_update).add_done_callback(on_submitted)
+    futures.append(future)
+  executor.shutdown(wait=False)
+  return futures
+
@@ -1,33 +1,151 @@
-import dbm
+import atexit
 import json
 import os
+import sqlite3
+import threading
+import time
+import zlib
 from bossman.logging import logger
 
 logger = logger.getChild(__name__)
 
-_not_found = object()
+# When the cache grows beyond this size (in bytes), the least recently used entries are evicted
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+# Values larger than this (in bytes) are stored compressed
+COMPRESS_THRESHOLD = 1024
+# Access times are only updated when older than this (in seconds), to spare writes on reads
+ACCESS_RESOLUTION = 60
+# The size of the cache is checked every EVICTION_INTERVAL writes
+EVICTION_INTERVAL = 100
+
+class _store:
+  """
+  SQLite storage shared by all the cache keys.
+
+  Each thread has its own connection, and the database uses write-ahead logging,
+  so readers don't block each other or the writer, and several bossman processes
+  can share the same file.
+  """
+  def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+    self.path = path
+    self.max_size = max_size
+    self.hits = 0
+    self.misses = 0
+    self.writes = 0
+    self.lock = threading.Lock()
+    self.local = threading.local()
+
+  @property
+  def conn(self) -> sqlite3.Connection:
+    conn = getattr(self.local, "conn", None)
+    if conn is None:
+      conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+      conn.execute("PRAGMA journal_mode=WAL")
+      conn.execute("PRAGMA synchronous=NORMAL")
+      conn.execute("""
+        CREATE TABLE IF NOT EXISTS entries (
+          key TEXT PRIMARY KEY,
+          value BLOB NOT NULL,
+          compressed INTEGER NOT NULL,
+          size INTEGER NOT NULL,
+          expires REAL,
+          accessed REAL NOT NULL
+        )
+      """)
+      conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+      self.local.conn = conn
+    return conn
+
+  def get(self, key: str) -> bytes:
+    now = time.time()
+    row = self.conn.execute("SELECT value, compressed, expires, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+    if row is not None:
+      value, compressed, expires, accessed = row
+      if expires is not None and expires <= now:
+        self.delete(key)
+      else:
+        if now - accessed > ACCESS_RESOLUTION:
+          self.conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        with self.lock:
+          self.hits += 1
+        return zlib.decompress(value) if compressed else value
+    with self.lock:
+      self.misses += 1
+    return None
+
+  def set(self, key: str, value: bytes, ttl: float = None):
+    now = time.time()
+    compressed = False
+    if len(value) > COMPRESS_THRESHOLD:
+      deflated = zlib.compress(value)
+      if len(deflated) < len(value):
+        value, compressed = deflated, True
+    expires = now + ttl if ttl is not None else None
+    self.conn.execute(
+      "INSERT OR REPLACE INTO entries (key, value, compressed, size, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+      (key, sqlite3.Binary(value), int(compressed), len(key) + len(value), expires, now)
+    )
+    with self.lock:
+      self.writes += 1
+      evict = self.writes % EVICTION_INTERVAL == 0
+    if evict:
+      self.evict()
+
+  def delete(self, key: str) -> bool:
+    return self.conn.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount > 0
+
+  def evict(self):
+    """
+    Removes the expired entries, then the least recently used ones until the
+    cache is under 90% of its maximum size.
+    """
+    conn = self.conn
+    conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+    (size,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+    if size > self.max_size:
+      excess = size - int(self.max_size * 0.9)
+      rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall()
+      evicted = []
+      for key, entry_size in rows:
+        if excess <= 0:
+          break
+        evicted.append((key,))
+        excess -= entry_size
+      conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+      logger.debug("evicted {} entries".format(len(evicted)))
+
+  def stats(self) -> dict:
+    with self.lock:
+      return dict(hits=self.hits, misses=self.misses, writes=self.writes)
 
 class _cache:
-  def __init__(self, ns, dbm):
+  def __init__(self, ns, store):
     self.__ns = ns
-    self.__dbm = dbm
+    self.__store = store
     self.__logger = logger.getChild(ns)
 
   def key(self, *ns):
-    return _cache(".".join([self.__ns, *ns]), self.__dbm)
+    return _cache(".".join([self.__ns, *ns]), self.__store)
 
-  def update(self, value):
+  def update(self, value, ttl: float = None):
+    """
+    Stores {value} (bytes or str) under the key. The entry expires after {ttl}
+    seconds if provided.
+    """
     self.__logger.debug("update {}".format(value))
-    self.__dbm[self.__ns] = value
+    if isinstance(value, str):
+      value = value.encode()
+    self.__store.set(self.__ns, value, ttl)
     return self
 
-  def update_json(self, value):
-    return self.update(json.dumps(value))
+  def update_json(self, value, ttl: float = None):
+    return self.update(json.dumps(value), ttl)
 
   def get(self, default=None) -> bytes:
-    if self.__dbm.get(self.__ns, _not_found) != _not_found:
+    value = self.__store.get(self.__ns)
+    if value is not None:
       self.__logger.debug("hit")
-      return self.__dbm.get(self.__ns, default)
+      return value
     else:
       self.__logger.debug("miss")
       return default
@@ -41,11 +159,16 @@ class _cache:
     return json.loads(val) if val is not None else default
 
   def delete(self):
-    try:
-      del self.__dbm[self.__ns]
-      return True
-    except:
-      return False
+    return self.__store.delete(self.__ns)
+
+  def stats(self) -> dict:
+    """
+    Returns the hit, miss and write counters of this process.
+    """
+    return self.__store.stats()
 
-cache = _cache("", dbm.open(os.getenv("BOSSMAN_CACHE") or ".bossmancache", "c", 0o600))
+cache = _cache("", _store((os.getenv("BOSSMAN_CACHE") or ".bossmancache") + ".sqlite"))
 
+@atexit.register
+def _log_stats():
+  logger.debug("stats {}".format(cache.stats()))
@@ -10,6 +10,8 @@ from rich.padding import Padding
 from rich.traceback import Traceback
 from bossman import Bossman
 from bossman.abc import ResourceABC
+from bossman.cli.jsonl import JsonlWriter
+from bossman.errors import error_to_dict
 
 console = get_console()
 
@@ -19,32 +21,49 @@ def init(subparsers: argparse._SubParsersAction):
   parser.add_argument("--force", action="store_true", default=False, help="don't skip dirty resources")
   parser.add_argument("--dry-run", action="store_true", default=False, help="show what would be applied, but don't actually do anything")
   parser.add_argument("--since", default=None, help="apply only revisions since this commit ref (useful to skip early history)")
+  parser.add_argument("--squash", action="store_true", default=False, help="apply all the pending revisions of a resource at once, as the latest one")
+  parser.add_argument("--output", choices=("rich", "jsonl"), default="rich", help="output format; jsonl prints one JSON record per result as soon as it is known")
   parser.add_argument("glob", nargs="*", default="*", help="select resources by glob pattern")
   parser.set_defaults(func=exec)
 
-def exec(bossman: Bossman, glob, exact_match:bool, force:bool, dry_run:bool, since, **kwargs):
+def exec(bossman: Bossman, glob, exact_match:bool, force:bool, dry_run:bool, since, squash:bool=False, output:str="rich", **kwargs):
   resources = bossman.get_resources(*glob, exact_match=exact_match)
+  writer = JsonlWriter() if output == "jsonl" else None
   if len(resources) == 0:
-    print('no resources selected')
+    if writer is None:
+      print('no resources selected')
     return
   futures = []
   had_errors = False
-  with ThreadPoolExecutor(10, "apply") as executor:
-    for resource in resources:
-      futures.append(executor.submit(apply_changes, bossman, resource, force, dry_run, since))
-  for resource, future in zip(resources, futures):
-    try:
-      had_errors = future.result() or had_errors
-    except Exception as e:
-      had_errors = True
-      print(":exclamation_mark:", resource)
-      console.print_exception()
-  print(":cookie: [green]all resources up to date[green]")
+  try:
+    with ThreadPoolExecutor(10, "apply") as executor:
+      for resource in resources:
+        futures.append(executor.submit(apply_changes, bossman, resource, force, dry_run, since, squash, writer))
+    for resource, future in zip(resources, futures):
+      try:
+        had_errors = future.result() or had_errors
+      except Exception as e:
+        had_errors = True
+        if writer:
+          writer.write(type="error", resource=resource.path, error=error_to_dict(e))
+        else:
+          print(":exclamation_mark:", resource)
+          console.print_exception()
+  finally:
+    # notes are written as resources are applied, and pushed all at once
+    bossman.push_notes()
+  if writer is None:
+    print(":cookie: [green]all resources up to date[green]")
   if had_errors:
-    print("[red]apply completed, but some errors occurred[/red]")
+    if writer is None:
+      print("[red]apply completed, but some errors occurred[/red]")
     sys.exit(3)
 
-def apply_changes(bossman: Bossman, resource: ResourceABC, force: bool, dry_run: bool, since: str):
+def apply_changes(bossman: Bossman, resource: ResourceABC, force: bool, dry_run: bool, since: str, squash: bool = False, writer: JsonlWriter = None):
+  """
+  Applies the missing revisions of {resource}, printing each result as soon as
+  it is known, or writing it to {writer} when given.
+  """
   try:
     status = bossman.get_resource_status(resource)
     revisions = bossman.get_missing_revisions(resource, since_rev=since)
@@ -52,23 +71,63 @@ def apply_changes(bossman: Bossman, resource: ResourceABC, force: bool, dry_run:
     had_errors = False
     if todo > 0:
       if status.dirty and not force:
-        print(":stop_sign:", resource, "[magenta]dirty, skipping[/magenta]")
+        if writer:
+          writer.write(type="skipped", resource=resource.path, reason="dirty")
+        else:
+          print(":stop_sign:", resource, "[magenta]dirty, skipping[/magenta]")
         return
       results = []
-      for revision in revisions:
+      def report(result, record: dict = None):
+        if writer:
+          writer.write(resource=resource.path, **(record or dict(type="apply", **result.to_dict())))
+        else:
+          results.append(result)
+      if squash and todo > 1:
         try:
-          results.append(bossman.apply_change(resource, revision, dry_run))
+          result = bossman.apply_squashed(resource, revisions, dry_run)
+          report(result)
+          had_errors = had_errors or result.had_errors
+          if not result.had_errors:
+            report(
+              "[grey53]{} {} revisions {} into {}[/]".format(resource.path, todo - 1, "would be squashed" if dry_run else "squashed", revisions[-1].id),
+              dict(type="squashed", revisions=list(revision.id for revision in revisions[:-1]), into=revisions[-1].id, dry_run=dry_run),
+            )
         except Exception as e:
           if not force:
             raise e
-          results.append(":exclamation_mark: {} an error occurred while applying {}\n{}".format(resource, revision, e))
-          console.print_exception()
+          had_errors = True
+          report(
+            ":exclamation_mark: {} an error occurred while applying {}\n{}".format(resource, revisions[-1], e),
+            dict(type="error", revision=revisions[-1].id, error=error_to_dict(e)),
+          )
+          if not writer:
+            console.print_exception()
+      else:
+        for revision, prepared in bossman.prepare_changes(resource, revisions, dry_run):
+          try:
+            result = bossman.apply_change(resource, revision, dry_run, prepared)
+            report(result)
+            had_errors = had_errors or result.had_errors
+          except Exception as e:
+            if not force:
+              raise e
+            had_errors = True
+            report(
+              ":exclamation_mark: {} an error occurred while applying {}\n{}".format(resource, revision, e),
+              dict(type="error", revision=revision.id, error=error_to_dict(e)),
+            )
+            if not writer:
+              console.print_exception()
       for result in results:
-        had_errors = had_errors or result.had_errors
         print(result)
+    elif writer:
+      writer.write(type="up_to_date", resource=resource.path)
     else:
       print(":white_check_mark:", resource, "is up to date")
   except RuntimeError as e:
     had_errors = True
-    print(":exclamation_mark:", resource, e)
+    if writer:
+      writer.write(type="error", resource=resource.path, error=error_to_dict(e))
+    else:
+      print(":exclamation_mark:", resource, e)
   return had_errors
@@ -0,0 +1,18 @@
+import json
+import sys
+import threading
+
+class JsonlWriter:
+  """
+  Writes records as JSON lines, each flushed as soon as it is written so that
+  consumers get results incrementally. Records can be written from any thread.
+  """
+  def __init__(self, stream=None):
+    self.stream = stream or sys.stdout
+    self.lock = threading.Lock()
+
+  def write(self, **record):
+    line = json.dumps(record, default=str)
+    with self.lock:
+      self.stream.write(line + "\n")
+      self.stream.flush()
@@ -4,6 +4,7 @@ import argparse
 from bossman import Bossman
 from bossman.repo import Revision
 from bossman.abc import ResourceABC
+from bossman.cli.jsonl import JsonlWriter
 from rich.console import Console
 
 from bossman.rich import bracketize
@@ -13,21 +14,48 @@ console = Console()
 def init(subparsers: argparse._SubParsersAction):
   parser = subparsers.add_parser("log", help="show resource change history")
   parser.add_argument("-e", "--exact-match", action="store_true", default=False, help="match resource exactly")
+  parser.add_argument("--output", choices=("rich", "jsonl"), default="rich", help="output format; jsonl prints one JSON record per revision")
   parser.add_argument("glob", nargs="*", default="*", help="select resources by glob pattern")
   parser.set_defaults(func=exec)
 
-def exec(bossman: Bossman, glob, exact_match:bool, *args, **kwargs):
-  bossman.repo.fetch_notes("*")
+def exec(bossman: Bossman, glob, exact_match:bool, *args, output:str="rich", **kwargs):
+  bossman.fetch_notes()
   resources = bossman.get_resources(*glob, exact_match=exact_match)
+  writer = JsonlWriter() if output == "jsonl" else None
   if len(resources) == 0:
-    print('no resources selected')
+    if writer is None:
+      print('no resources selected')
     return
   revisions = bossman.get_revisions(resources=resources)
   for revision in revisions:
+    if writer:
+      writer.write(type="revision", **revision_to_dict(bossman, revision, resources))
+      continue
     view = RevisionView(bossman, revision, resources)
     console.print(view, end="")
     console.print("\n")
 
+def iter_resource_changes(bossman: Bossman, revision: Revision, resources: list):
+  """
+  Yields (resource, changes, details) for each of {resources} changed by {revision}.
+  """
+  for resource in resources:
+    if set(resource.paths).intersection(revision.affected_paths):
+      changes = revision.get_changes(resource.paths)
+      if len(changes):
+        yield resource, changes, bossman.get_revision_details(resource, revision)
+
+def revision_to_dict(bossman: Bossman, revision: Revision, resources: list) -> dict:
+  return dict(revision.to_dict(), resources=list(
+    dict(
+      resource=resource.path,
+      changes=list(dict(change_type=change.change_type, path=change.path) for change in changes),
+      details=details.details if details else None,
+    )
+    for resource, changes, details
+    in iter_resource_changes(bossman, revision, resources)
+  ))
+
 class RevisionView:
   def __init__(self, bossman: Bossman, revision: Revision, resources: list):
     self.bossman = bossman
@@ -36,12 +64,8 @@ class RevisionView:
 
   def __rich_console__(self, console, options):
     yield "{} [yellow]{}[/] | [grey62]{}[/]".format(bracketize(self.revision.id), self.revision.short_message, self.revision.author_name)
-    for resource in self.resources:
-      if set(resource.paths).intersection(self.revision.affected_paths):
-        changes = self.revision.get_changes(resource.paths)
-        details = self.bossman.get_revision_details(resource, self.revision)
-        if len(changes):
-          change_type = lambda ct: "+" if ct == "A" else "-" if ct == "D" else "~"
-          changes = ("[grey37]{}{}[/]".format(change_type(c.change_type), c.basename) for c in changes)
-          details = " ({})".format(details.details) if details else ""
-          yield "| [blue]{}[/] {} {}".format(resource, " ".join(list(changes)), details)
+    for resource, changes, details in iter_resource_changes(self.bossman, self.revision, self.resources):
+      change_type = lambda ct: "+" if ct == "A" else "-" if ct == "D" else "~"
+      changes = ("[grey37]{}{}[/]".format(change_type(c.change_type), c.basename) for c in changes)
+      details = " ({})".format(details.details) if details else ""
+      yield "| [blue]{}[/] {} {}".format(resource, " ".join(list(changes)), details)
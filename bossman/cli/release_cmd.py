@@ -1,5 +1,3 @@
-from functools import partial
-from concurrent.futures import ThreadPoolExecutor
 from os import getcwd
 import argparse
 
@@ -42,7 +40,7 @@ def exec(bossman: Bossman, yes, rev, glob, exact_match:bool, action, message, *a
   deployed, undeployed = [], []
   # a (pre)release operation should only be possible on resources that have been deployed by
   # a previous apply operation.
-  bossman.repo.fetch_notes('*')
+  bossman.fetch_notes()
   for resource in resources:
     deployed.append(resource) if bossman.is_applied(resource, revision) else undeployed.append(resource)
 
@@ -74,7 +72,10 @@ def exec(bossman: Bossman, yes, rev, glob, exact_match:bool, action, message, *a
     from collections import defaultdict
     last_status = defaultdict(lambda: None)
 
-    def on_update(task_id, resource: ResourceABC, status: str, progress: float):
+    task_ids = dict()
+
+    def on_update(resource: ResourceABC, status: str, progress: float):
+      task_id = task_ids.get(resource.path)
       if isinstance(progress, (float, int)):
         progress_ui.start_task(task_id)
         progress = progress * 100
@@ -86,19 +87,20 @@ def exec(bossman: Bossman, yes, rev, glob, exact_match:bool, action, message, *a
           console.print(resource, status)
         last_status[resource.path] = status
 
-    futures = []
-    with ThreadPoolExecutor(100, "prereleasse") as executor:
-      for resource in deployed:
-        description = str(resource)
-        if hasattr(resource, "__rich__"):
-          description = resource.__rich__()
-        task_id = progress_ui.add_task(description, total=100, activation_status="-", start=False)
-        _on_update = partial(on_update, task_id)
-        futures.append(executor.submit(getattr(bossman, action), resource, revision, message, _on_update))
+    for resource in deployed:
+      description = str(resource)
+      if hasattr(resource, "__rich__"):
+        description = resource.__rich__()
+      task_ids[resource.path] = progress_ui.add_task(description, total=100, activation_status="-", start=False)
+    # resource types submit their activations all at once where they can, and track them in the background
+    try:
+      futures = getattr(bossman, action + "_many")(deployed, revision, message, on_update)
       for resource, future in zip(deployed, futures):
         try:
           future.result()
         except Exception as e:
           print(":exclamation_mark:", resource, e)
-          console.print_exception()
+    finally:
+      # notes of the activations that were started are pushed even if others failed
+      bossman.push_notes()
 
@@ -5,15 +5,22 @@ from rich import print, box
 from rich.table import Table
 from bossman import Bossman
 from bossman.abc import ResourceStatusABC
+from bossman.cli.jsonl import JsonlWriter
 
 def init(subparsers: argparse._SubParsersAction):
   parser = subparsers.add_parser("status", help="show resource status")
   parser.add_argument("-e", "--exact-match", action="store_true", default=False, help="match resource exactly")
+  parser.add_argument("--output", choices=("rich", "jsonl"), default="rich", help="output format; jsonl prints one JSON record per resource as soon as its status is known")
   parser.add_argument("glob", nargs="*", default="*", help="select resources by glob pattern")
   parser.set_defaults(func=exec)
 
-def exec(bossman: Bossman, glob, exact_match:bool, *args, **kwargs):
+def exec(bossman: Bossman, glob, exact_match:bool, *args, output:str="rich", **kwargs):
   resources = bossman.get_resources(*glob, exact_match=exact_match)
+  if output == "jsonl":
+    writer = JsonlWriter()
+    for resource, status in bossman.iter_resource_statuses(resources):
+      writer.write(type="status", resource=resource.path, **status.to_dict())
+    return
   if len(resources) == 0:
     print('no resources selected')
     return
@@ -1,19 +1,75 @@
 import sys
+import os
 from bossman.errors import BossmanValidationError
 from os import getcwd
 import git
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from rich import print
 from rich.table import Table
 from bossman import Bossman
+from bossman.config import Config
 
 def init(subparsers: argparse._SubParsersAction):
   parser = subparsers.add_parser("validate", help="validates the working tree")
   parser.add_argument("-e", "--exact-match", action="store_true", default=False, help="match resource exactly")
+  parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of resources to validate in parallel")
   parser.add_argument("glob", nargs="*", default="*", help="select resources by glob pattern")
   parser.set_defaults(func=exec)
 
-def exec(bossman: Bossman, glob, exact_match:bool, *args, **kwargs):
+# The Bossman instance of a validation worker process
+_worker_bossman = None
+
+def init_worker(root, config_data):
+  global _worker_bossman
+  _worker_bossman = Bossman(root, Config(config_data))
+
+def validate(path):
+  """
+  Validates the resource at {path} in a worker process. Returns the validation
+  error, if any.
+  """
+  resource = _worker_bossman.resource_manager.get_resource(path)
+  return validate_in_process(_worker_bossman, resource)
+
+# Up to this many resources are validated in-process: starting workers costs more
+INPROCESS_MAX = 4
+
+def validate_all(bossman: Bossman, resources: list, jobs: int):
+  """
+  Yields (resource, error) tuples in the order of {resources}, validating resources
+  across {jobs} processes since validation is CPU bound. Resources known to be valid
+  are not validated again, and no worker is started for them.
+  """
+  pending = list(resource for resource in resources if not bossman.is_validated(resource))
+  if jobs <= 1 or len(pending) <= INPROCESS_MAX:
+    errors = (validate_in_process(bossman, resource) for resource in pending)
+    yield from _merge(resources, pending, errors)
+    return
+  # workers are spawned rather than forked, so they don't inherit open connections
+  with ProcessPoolExecutor(min(jobs, len(pending)), get_context("spawn"), init_worker, (bossman.root, bossman.config.data)) as executor:
+    errors = executor.map(validate, (resource.path for resource in pending))
+    yield from _merge(resources, pending, errors)
+
+def validate_in_process(bossman: Bossman, resource):
+  try:
+    bossman.validate(resource)
+    return None
+  except BossmanValidationError as e:
+    return e
+
+def _merge(resources: list, pending: list, errors):
+  """
+  Yields (resource, error) for {resources}, taking the errors of the {pending}
+  ones from {errors}, in order, as they become available.
+  """
+  errors = iter(errors)
+  pending = set(resource.path for resource in pending)
+  for resource in resources:
+    yield resource, next(errors) if resource.path in pending else None
+
+def exec(bossman: Bossman, glob, exact_match:bool, jobs:int, *args, **kwargs):
   resources = bossman.get_resources_from_working_copy(*glob, exact_match=exact_match)
   if len(resources) == 0:
     print('no resources selected')
@@ -24,14 +80,12 @@ def exec(bossman: Bossman, glob, exact_match:bool, *args, **kwargs):
     table.add_column("Validation")
     table.add_column("Error")
     error_recorded = 0
-    for resource in resources:
-      error = ""
-      try:
-        bossman.validate(resource)
+    for resource, error in validate_all(bossman, resources, jobs):
+      if error is None:
         status = ":thumbs_up:"
-      except BossmanValidationError as e:
+        error = ""
+      else:
         status = ":thumbs_down:"
-        error = e
         error_recorded = 1
       table.add_row(
         resource,
@@ -43,3 +97,4 @@ def exec(bossman: Bossman, glob, exact_match:bool, *args, **kwargs):
       sys.exit(1)
   else:
     print("No resources to show: check the glob pattern if provided, or the configuration.")
+    return None
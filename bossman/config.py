@@ -1,4 +1,4 @@
-import parse, re, os, pathlib
+import re, os, pathlib, string
 from os.path import expanduser, isabs, relpath, abspath, dirname, join
 from bossman.errors import BossmanConfigurationError
 from bossman.logging import logger
@@ -52,40 +52,111 @@ class PathPatternMatch:
 
 class PathPattern:
 
-  @staticmethod
-  @parse.with_pattern(r'[^/]+')
-  def PathComponent(s):
-    return s
+  # Placeholders only match a single path component
+  PATH_COMPONENT = r'[^/]+'
 
   def __init__(self, pattern):
     # A pattern might look like this: /a/{b}/{c}.
     # A resource path can be created using string formatting:
     #   pattern.format(b="foo", c="bar")
     self._format_pattern = pattern
-    # We also need to be able to match a real path against the pattern.
-    # We constrain the placeholders to only match path components, using
-    # a custom regular expression. So we need to turn /a/{b}/{c} into
-    # /a/{b:PathComponent}/{c:PathComponent}.
-    self._match_pattern = self._format_pattern
-    # So we parse the pattern with itself, retrieving dict(b="{b}", c="{c}")
-    names = parse.parse(pattern, pattern).named
-    # And we manipulate the match pattern based on the placeholders we discovered.
-    for name, placeholder in names.items():
-      placeholder_re = re.escape(placeholder)
-      final_placeholder = "{{{}:PathComponent}}".format(name)
-      self._match_pattern = re.sub(placeholder_re, final_placeholder, self._match_pattern)
+    # We also need to be able to match a real path against the pattern, so
+    # we compile it once into a regular expression anchored at the start of
+    # the path: /a/{b}/{c} becomes ^/a/(?P<b>[^/]+)/(?P<c>[^/]+).
+    self._match_re = re.compile("^" + self.to_regex())
+
+  def to_regex(self, group_prefix: str = "") -> str:
+    """
+    Returns the regular expression matching the pattern. Placeholders become
+    named groups, prefixed with {group_prefix}.
+    """
+    regex = ""
+    names = set()
+    for literal, name, _, _ in string.Formatter().parse(self._format_pattern):
+      regex += re.escape(literal)
+      if name is None:
+        continue
+      if name in names:
+        # the same placeholder must match the same value
+        regex += "(?P={}{})".format(group_prefix, name)
+      else:
+        regex += "(?P<{}{}>{})".format(group_prefix, name, PathPattern.PATH_COMPONENT)
+        names.add(name)
+    return regex
+
+  @property
+  def names(self) -> list:
+    """
+    The placeholder names, in order of appearance.
+    """
+    return list(self._match_re.groupindex.keys())
+
+  @property
+  def prefix(self) -> str:
+    """
+    The literal directory part of the pattern, before the first placeholder.
+    All the paths matching the pattern are under this directory.
+    """
+    literal = self._format_pattern.split("{", 1)[0]
+    return literal.rsplit("/", 1)[0] if "/" in literal else ""
+
+  @property
+  def depth(self) -> int:
+    """
+    The number of path components in a canonical resource path.
+    """
+    return len(self._format_pattern.strip("/").split("/"))
+
+  def __str__(self):
+    return self._format_pattern
 
   def match(self, path):
     """
     Matches path against the pattern. Returns a `PathPatternMatch` if successful, None otherwise.
     """
-    result = parse.search(self._match_pattern, path, extra_types=dict(PathComponent=PathPattern.PathComponent))
+    result = self._match_re.match(path)
     if result:
-      canonical = self._format_pattern.format(**result.named)
-      if path.startswith(canonical):
-        return PathPatternMatch(canonical, result.named)
+      values = result.groupdict()
+      return PathPatternMatch(self._format_pattern.format(**values), values)
     return None
 
+class PathPatternSet:
+  """
+  Matches a path against several patterns in a single pass.
+  """
+  def __init__(self, patterns: list):
+    self.patterns = list(patterns)
+    # Each pattern is wrapped in a group named after its index, and its placeholder
+    # groups are prefixed with the same name to keep group names unique. Alternatives
+    # are tried in order, so the first matching pattern wins.
+    self._match_re = re.compile("^(?:{})".format("|".join(
+      "(?P<_{idx}>{regex})".format(idx=idx, regex=pattern.to_regex("_{}_".format(idx)))
+      for idx, pattern
+      in enumerate(self.patterns)
+    ))) if len(self.patterns) else None
+    # group name -> (pattern index, placeholder names)
+    self._groups = dict(
+      ("_{}".format(idx), (idx, pattern.names))
+      for idx, pattern
+      in enumerate(self.patterns)
+    )
+
+  def match(self, path):
+    """
+    Returns a tuple (index of the matching pattern, `PathPatternMatch`), or (None, None)
+    if no pattern matches.
+    """
+    result = self._match_re.match(path) if self._match_re else None
+    if result:
+      # the outer group of the matching alternative closes last
+      idx, names = self._groups[result.lastgroup]
+      values = dict(
+        (name, result.group("{}_{}".format(result.lastgroup, name)))
+        for name in names
+      )
+      return idx, PathPatternMatch(self.patterns[idx]._format_pattern.format(**values), values)
+    return None, None
+
 class ResourceTypeConfig:
   def __init__(self, data):
     self.pattern = PathPattern(data.get("pattern"))
@@ -97,6 +168,7 @@ class ResourceTypeConfig:
 
 class Config:
   def __init__(self, data):
+    self.data = data
     self.resource_types = (
       ResourceTypeConfig(config)
       for config
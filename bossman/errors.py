@@ -33,4 +33,13 @@ class MultipleMatchingPluginsError(BossmanError):
 class BossmanValidationError(BossmanError):
   """
   Raised by plugins when a resource is invalid.
-  """
\ No newline at end of file
+  """
+
+def error_to_dict(error: Exception) -> dict:
+  """
+  Returns {error} as plain data, for machine readable output.
+  """
+  return dict(
+    type=type(error).__name__,
+    details=error.args[0] if len(error.args) == 1 else list(error.args),
+  )
@@ -1,38 +1,109 @@
-from datetime import datetime
-import dateutil.parser
-from typing import List
-from cattr import Converter
+import threading
+from typing import Dict, List, Optional, Tuple
 
+from bossman.cache import cache
 from bossman.logging import get_class_logger
-from bossman.plugins.akamai.lib.edgegrid import Session
+from bossman.plugins.akamai.lib.edgegrid import Session, get_retry_after
+from .converter import converter
 from .data import *
 from .error import *
 
+_cache = cache.key(__name__)
+
+# Number of policies per page when listing all the policies
+POLICIES_PAGE_SIZE = 1000
+
 class CloudletAPIV3Client:
   def __init__(self, edgerc, section, switch_key=None, **kwargs):
     self.logger = get_class_logger(self)
     self.session = Session(edgerc, section, switch_key=switch_key, **kwargs)
-    self.converter = Converter()
-    self.converter.register_structure_hook(datetime, lambda d, t: dateutil.parser.isoparse(d))
+    self.section = section
+    self.converter = converter
+    # policy name -> SharedPolicy, listed once by get_policy_catalog
+    self._policies = None
+    self._policies_lock = threading.Lock()
 
-  def get_policy_by_name(self, name):
+  def _policy_id_cache(self, name):
+    return _cache.key("policy_id", self.section, self.session.switch_key or "", name)
+
+  def get_policy_by_name(self, name) -> SharedPolicy:
+    """
+    Returns the policy named {name}. The policy is looked up in the catalog if it was
+    already listed, otherwise by its persistently cached id, and only then by listing
+    all the policies.
+    """
     self.logger.debug("get_policy_by_name name={name}".format(name=name))
-    id = None
-    policies = self.get_policies()
-    for policy in policies:
-      if policy.name == name:
-        return policy
-    raise PolicyNameNotFound(name)
+    policy = None
+    if self._policies is None:
+      policy_id = self._policy_id_cache(name).get_str()
+      if policy_id is not None:
+        try:
+          policy = self.get_policy(int(policy_id))
+        except CloudletAPIV3Error:
+          policy = None
+        if policy is None or policy.name != name:
+          self._policy_id_cache(name).delete()
+          policy = None
+    if policy is None:
+      policy = self.get_policy_catalog().get(name)
+    if policy is None:
+      raise PolicyNameNotFound(name)
+    return policy
 
-  def get_policies(self) -> List[SharedPolicy]:
-    self.logger.debug("get_policies")
-    response = self.session.get("/cloudlets/v3/policies")
+  def get_policy_id(self, name) -> int:
+    """
+    Returns the id of the policy named {name}, which is persistently cached.
+    """
+    policy_id = self._policy_id_cache(name).get_str()
+    if policy_id is not None:
+      return int(policy_id)
+    return self.get_policy_by_name(name).id
+
+  def get_policy_catalog(self) -> Dict[str, SharedPolicy]:
+    """
+    Returns all the policies by name. They are listed once, and the catalog is then
+    kept up to date with the policies created or updated by this client.
+    """
+    with self._policies_lock:
+      if self._policies is None:
+        self._policies = dict((policy.name, policy) for policy in self.get_policies())
+        for policy in self._policies.values():
+          self._policy_id_cache(policy.name).update(str(policy.id))
+      return self._policies
+
+  def _remember_policy(self, policy: SharedPolicy):
+    self._policy_id_cache(policy.name).update(str(policy.id))
+    with self._policies_lock:
+      if self._policies is not None:
+        self._policies[policy.name] = policy
+
+  def get_policy(self, policyId: int) -> SharedPolicy:
+    self.logger.debug("get_policy policyId={policyId}".format(policyId=policyId))
+    response = self.session.get("/cloudlets/v3/policies/{policyId}".format(policyId=policyId))
     if response.status_code != 200:
       raise CloudletAPIV3Error(response.json())
-    # import json
-    # print(json.dumps(response.json(), indent=2))
-    response = self.converter.structure(response.json(), GetPoliciesResponse)
-    return response.content
+    return self.converter.structure(response.json(), SharedPolicy)
+
+  def get_policies(self) -> List[SharedPolicy]:
+    """
+    Lists all the policies, POLICIES_PAGE_SIZE at a time.
+    """
+    policies = []
+    page = 0
+    while True:
+      self.logger.debug("get_policies page={page}".format(page=page))
+      response = self.session.get("/cloudlets/v3/policies", params=dict(page=page, size=POLICIES_PAGE_SIZE))
+      if response.status_code != 200:
+        raise CloudletAPIV3Error(response.json())
+      response = self.converter.structure(response.json(), GetPoliciesResponse)
+      policies.extend(response.content)
+      if response.page is not None:
+        if response.page.number + 1 >= response.page.totalPages:
+          break
+      elif len(response.content) < POLICIES_PAGE_SIZE:
+        break
+      page += 1
+    return policies
 
   def get_policy_version(self, policyId: int, policyVersion: int) -> SharedPolicyVersion:
     self.logger.debug("get_policy_version policyId={policyId}, policyVersion={policyVersion}".format(policyId=policyId, policyVersion=policyVersion))
@@ -69,7 +140,9 @@ class CloudletAPIV3Client:
     ))
     if response.status_code != 201:
       raise CloudletAPIV3Error(response.json())
-    return self.converter.structure(response.json(), SharedPolicy)
+    policy = self.converter.structure(response.json(), SharedPolicy)
+    self._remember_policy(policy)
+    return policy
 
   def update_policy(self, policyId: int, description: str, groupId: int) -> SharedPolicy:
     self.logger.debug("update_policy policyName={policyId}".format(policyId=policyId))
@@ -79,7 +152,9 @@ class CloudletAPIV3Client:
     ))
     if response.status_code != 202:
       raise CloudletAPIV3Error(response.json())
-    return self.converter.structure(response.json(), SharedPolicy)
+    policy = self.converter.structure(response.json(), SharedPolicy)
+    self._remember_policy(policy)
+    return policy
 
   def create_policy_version(self, policyId: int, description: str, matchRules: List[dict]) -> SharedPolicyVersion:
     self.logger.debug("create_policy_version policyId={policyId}".format(policyId=policyId))
@@ -103,9 +178,25 @@ class CloudletAPIV3Client:
       raise CloudletAPIV3Error(result.get('detail'))
     return self.converter.structure(response.json(), SharedPolicyActivation)
 
+  def get_policy_activations(self, policyId: int, size: int = 100) -> Tuple[Optional[float], List[SharedPolicyActivation]]:
+    """
+    Lists the {size} latest activations of {policyId}, along with the delay
+    suggested by the API before checking on them again (None if it didn't
+    suggest any).
+    """
+    self.logger.debug("get_policy_activations policyId={policyId}".format(policyId=policyId))
+    response = self.session.get("/cloudlets/v3/policies/{policyId}/activations".format(policyId=policyId), params=dict(size=size))
+    if response.status_code != 200:
+      raise CloudletAPIV3Error(response.json())
+    retry_after = get_retry_after(response)
+    return (retry_after, self.converter.structure(response.json(), GetPolicyActivationsResponse).content)
+
   def get_policy_version_activation_status(self, activation: SharedPolicyActivation) -> SharedPolicyActivation:
-    self.logger.debug("get_policy_version_activation_status policyId={policyId}, activationId={activationId}".format(policyId=activation.policyId, activationId=activation.id))
-    response = self.session.get("/cloudlets/v3/policies/{policyId}/activations/{activationId}".format(policyId=activation.policyId, activationId=activation.id))
+    return self.get_policy_activation(activation.policyId, activation.id)
+
+  def get_policy_activation(self, policyId: int, activationId: int) -> SharedPolicyActivation:
+    self.logger.debug("get_policy_activation policyId={policyId}, activationId={activationId}".format(policyId=policyId, activationId=activationId))
+    response = self.session.get("/cloudlets/v3/policies/{policyId}/activations/{activationId}".format(policyId=policyId, activationId=activationId))
     if response.status_code != 200:
       raise CloudletAPIV3Error(response.json())
     return self.converter.structure(response.json(), SharedPolicyActivation)
@@ -0,0 +1,33 @@
+from datetime import datetime
+import dateutil.parser
+from cattr import GenConverter
+from cattr.gen import make_dict_structure_fn
+
+from .data import *
+
+def parse_datetime(value: str, _=None) -> datetime:
+  """
+  Parses the ISO 8601 dates of the API, using the much faster datetime.fromisoformat
+  for the formats it supports.
+  """
+  try:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+  except ValueError:
+    return dateutil.parser.isoparse(value)
+
+def make_converter() -> GenConverter:
+  """
+  Returns a converter structuring the API responses into the data classes.
+
+  The structure functions of the classes found in large listings are generated
+  once, up front. Match rules, which can count thousands of entries, are not
+  structured at all: they are kept as they were decoded from the response.
+  """
+  converter = GenConverter()
+  converter.register_structure_hook(datetime, parse_datetime)
+  converter.register_structure_hook_func(lambda type: type == MatchRules, lambda value, _: value)
+  for cls in (SharedPolicyActivation, SharedPolicy, SharedPolicyVersion, SharedPolicyAsCode):
+    converter.register_structure_hook(cls, make_dict_structure_fn(cls, converter))
+  return converter
+
+converter = make_converter()
@@ -1,9 +1,17 @@
 import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from functools import partial
 from typing import List, Dict, Optional
 
+# slots make the instances of large listings smaller and faster, but require python 3.10
+_dataclass = partial(dataclass, slots=True) if sys.version_info >= (3, 10) else dataclass
+
+# Match rules are kept as the JSON decoded from the API (see converter.py)
+MatchRules = Optional[List[Dict]]
+
 
 
 class Network(Enum):
@@ -38,7 +46,7 @@ class SharedPolicyCloudletType(Enum):
   CD = 'CD'
   IG = 'IG'
 
-@dataclass
+@_dataclass
 class SharedPolicyActivation:
   id: int
   createdBy: str
@@ -51,17 +59,21 @@ class SharedPolicyActivation:
   policyVersion: int
   policyVersionDeleted: bool
 
-@dataclass
+@_dataclass
+class GetPolicyActivationsResponse:
+  content: List[SharedPolicyActivation]
+
+@_dataclass
 class SharedPolicyCurrentActivationsNetwork:
   effective: Optional[SharedPolicyActivation] = None
   latest: Optional[SharedPolicyActivation] = None
 
-@dataclass
+@_dataclass
 class SharedPolicyCurrentActivations:
   production: SharedPolicyCurrentActivationsNetwork = None
   staging: SharedPolicyCurrentActivationsNetwork = None
 
-@dataclass
+@_dataclass
 class SharedPolicy:
   id: int
   name: str
@@ -75,11 +87,19 @@ class SharedPolicy:
   modifiedBy: str
   modifiedDate: datetime
 
-@dataclass
+@_dataclass
+class Page:
+  number: int
+  size: int
+  totalElements: int
+  totalPages: int
+
+@_dataclass
 class GetPoliciesResponse:
   content: List[SharedPolicy]
+  page: Optional[Page] = None
 
-@dataclass
+@_dataclass
 class SharedPolicyVersion:
   policyId: int
   version: int
@@ -88,13 +108,13 @@ class SharedPolicyVersion:
   modifiedBy: str
   modifiedDate: datetime
   description: str
-  matchRules: Optional[List[Dict]] = None
+  matchRules: MatchRules = None
 
-@dataclass
+@_dataclass
 class GetPolicyVersionsResponse:
   content: List[SharedPolicyVersion]
 
-@dataclass
+@_dataclass
 class SharedPolicyAsCode:
   """
   Subset of SharedPolicy that must be versioned in order to support CRUD.
@@ -102,4 +122,4 @@ class SharedPolicyAsCode:
   description: str
   groupId: int
   cloudletType: SharedPolicyCloudletType
-  matchRules: Optional[List[Dict]] = None
+  matchRules: MatchRules = None
@@ -1,9 +1,7 @@
 from collections import defaultdict
 import json
-import random
 import re
 from os.path import expanduser
-import time
 from types import SimpleNamespace
 from typing import List
 from bossman.cache import cache
@@ -19,7 +17,8 @@ from bossman.plugins.akamai.cloudlet_v3.resource import SharedPolicyResource
 from bossman.plugins.akamai.cloudlet_v3.schema import validate_policy_version
 from bossman.plugins.akamai.cloudlet_v3.ui import SharedPolicyApplyResult, SharedPolicyStatus, SharedPolicyVersionStatus
 from bossman.plugins.akamai.lib.edgegrid import EdgegridError
-from bossman.plugins.akamai.utils import GenericVersionComments
+from bossman.plugins.akamai.lib.poller import ActivationPoller
+from bossman.plugins.akamai.utils import GenericVersionComments, validation_cache
 from bossman.repo import Repo, Revision, RevisionDetails
 
 RE_COMMIT = re.compile("^commit: ([a-z0-9]*)", re.MULTILINE)
@@ -35,16 +34,29 @@ class ResourceTypeOptions:
     self.edgerc = expanduser(environ.get("%sEDGERC" % self.env_prefix, options.get("edgerc", "~/.edgerc")))
     self.section = environ.get("%sEDGERC_SECTION" % self.env_prefix, options.get("section", "papi"))
     self.switch_key = environ.get("%sEDGERC_SWITCH_KEY" % self.env_prefix, options.get("switch_key", None))
+    self.max_connections = options.get("max_connections", None)
+    self.rate_limit = options.get("rate_limit", None)
 
 class ResourceType(ResourceTypeABC):
   def __init__(self, repo: Repo, config: ResourceTypeConfig):
     super(ResourceType, self).__init__(repo, config)
     self.options = ResourceTypeOptions(config.options)
-    self.client = CloudletAPIV3Client(self.options.edgerc, self.options.section, self.options.switch_key)
+    self.client = CloudletAPIV3Client(self.options.edgerc, self.options.section, self.options.switch_key, max_connections=self.options.max_connections, rate_limit=self.options.rate_limit)
+    self.poller = ActivationPoller("cloudlet-activations", self._check_activations, fetch=self.client.get_policy_activation)
 
   def create_resource(self, path: str, **kwargs):
     return SharedPolicyResource(path, **kwargs)
 
+  def prefetch_resource_statuses(self, resources: list):
+    """
+    Lists all the policies at once, rather than looking them up one by one.
+    """
+    try:
+      self.client.get_policy_catalog()
+    except CloudletAPIV3Error:
+      # reported by the status of each resource
+      pass
+
   def get_resource_status(self, resource: SharedPolicyResource):
     try:
       policy = self.client.get_policy_by_name(resource.name)
@@ -93,7 +105,7 @@ class ResourceType(ResourceTypeABC):
 
   def is_pending(self, resource: SharedPolicyResource, revision: Revision):
     notes = revision.get_notes(resource.path)
-    if notes.get("has_errors", False):
+    if notes.get("has_errors", False) or self.is_squashed(resource, revision):
       return False
     return not self.is_applied(resource, revision)
 
@@ -156,11 +168,21 @@ class ResourceType(ResourceTypeABC):
       # Finally, assign the updated values to the git notes
       revision.get_notes(resource.path).set(**vars(notes))
 
+  def is_validated(self, resource: SharedPolicyResource) -> bool:
+    try:
+      with open(resource.policy_path, "r") as fd:
+        return validation_cache("cloudlet_policy", fd.read()).get() is not None
+    except (NotADirectoryError, FileNotFoundError):
+      return False
+
   def validate_working_tree(self, resource: SharedPolicyResource):
     try:
       with open(resource.policy_path, "r") as fd:
-        policy_data = json.loads(fd.read())
-        validate_policy_version(policy_data)
+        policy = fd.read()
+        passed = validation_cache("cloudlet_policy", policy)
+        if passed.get() is None:
+          validate_policy_version(json.loads(policy))
+          passed.update("1")
     except (NotADirectoryError, FileNotFoundError) as e:
       raise PolicyVersionValidationError("file not found {}".format(e.filename))
 
@@ -168,7 +190,7 @@ class ResourceType(ResourceTypeABC):
     notes = revision.get_notes(resource.path)
     policy_id = notes.get("policy_id")
     if not policy_id:
-      policy_id = self.client.get_policy_by_name(resource.name).id
+      policy_id = self.client.get_policy_id(resource.name)
     policy_version = notes.get("policy_version")
     if not policy_id:
       on_update(resource, "[magenta]Policy does not exist[/]", None)
@@ -182,22 +204,43 @@ class ResourceType(ResourceTypeABC):
 
     describe = lambda activation_status: "[{}]{}[/] [grey53]v{:<3}[/] [bright_white]{}[/]".format(network.color, network.alias, policy_version, activation_status)
 
+    def on_error(e):
+      if isinstance(e, CloudletAPIV3Error):
+        on_update(resource, ":boom: [grey53]v{policy_version:<3}[/] {error}".format(policy_version=policy_version, error=e), 1)
+      else:
+        on_update(resource, ":boom: [grey53]v{policy_version:<3}[/] An error occurred: {e}".format(policy_version=policy_version, e=e), 1)
+
     try:
       on_update(resource, describe("STARTING"), None)
       activation = self.client.activate_policy_version(policy_id, policy_version, network)
-      on_update(resource, describe(activation.status.value), 0.5)
-      while activation.status == SharedPolicyActivationStatus.IN_PROGRESS:
-        time.sleep(random.randint(-10, 10) + 20)
-        activation = self.client.get_policy_version_activation_status(activation)
-        on_update(resource, describe(activation.status.value), 0.5)
-      on_update(resource, describe(activation.status.value), 1)
-    except CloudletAPIV3Error as e:
-      on_update(resource, ":boom: [grey53]v{policy_version:<3}[/] {error}".format(policy_version=policy_version, error=e), 1)
-    except RuntimeError as e:
-      on_update(resource, ":boom: [grey53]v{policy_version:<3}[/] An error occurred: {e}".format(policy_version=policy_version, e=e), 1)
-
-  def prerelease(self, resource: ResourceABC, revision: Revision, on_update: callable = lambda resource, status, progress: None):
+      is_done = lambda activation: activation.status != SharedPolicyActivationStatus.IN_PROGRESS
+      on_update(resource, describe(activation.status.value), 1 if is_done(activation) else 0.5)
+      if is_done(activation):
+        return None
+      future = self.poller.track(
+        policy_id,
+        activation.id,
+        lambda activation: on_update(resource, describe(activation.status.value), 1 if is_done(activation) else 0.5),
+        is_done
+      )
+      def on_done(future):
+        if future.exception() is not None:
+          on_error(future.exception())
+      future.add_done_callback(on_done)
+      return future
+    except (CloudletAPIV3Error, RuntimeError) as e:
+      on_error(e)
+
+  def _check_activations(self, policy_id: int, activation_ids: list):
+    """
+    Polls the status of {activation_ids} with a single listing of the activations
+    of {policy_id}.
+    """
+    (retry_after, activations) = self.client.get_policy_activations(policy_id)
+    return (retry_after, dict((activation.id, activation) for activation in activations if activation.id in activation_ids))
+
+  def prerelease(self, resource: ResourceABC, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None):
     return self._release(Network.STAGING, resource, revision, on_update)
 
-  def release(self, resource: ResourceABC, revision: Revision, on_update: callable = lambda resource, status, progress: None):
+  def release(self, resource: ResourceABC, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None):
     return self._release(Network.PRODUCTION, resource, revision, on_update)
@@ -2,6 +2,7 @@ import jsonschema, jsonschema.validators, json
 from importlib.resources import files
 
 from bossman.plugins.akamai.cloudlet_v3.data import SharedPolicyAsCode
+from bossman.plugins.akamai.utils import SchemaValidators
 
 from .error import *
 
@@ -12,12 +13,20 @@ def get_schema(name):
   with open(path) as fd:
     return json.loads(fd.read())
 
+_validators = SchemaValidators()
+
+def load_policy_version_schema():
+  schema = get_schema('update-policy-version.json')
+  store = dict(
+    ('file://' + f, get_schema(f))
+    for f
+    in ['match_rule-AS-1.0.json', 'match_rule-ER-1.0.json', 'match_rule-FR-1.0.json', 'match-rules.json']
+  )
+  return schema, store
+
 def validate_policy_version(data: dict):
   try:
-    schema = get_schema('update-policy-version.json')
-    validator = jsonschema.validators.Draft4Validator(schema)
-    for f in ['match_rule-AS-1.0.json', 'match_rule-ER-1.0.json', 'match_rule-FR-1.0.json', 'match-rules.json']:
-      validator.resolver.store['file://' + f] = get_schema(f)
+    validator = _validators.get('update-policy-version', load_policy_version_schema)
     validator.validate(data)
   except json.decoder.JSONDecodeError as err:
     raise PolicyVersionValidationError("bad rules.json", err.args)
@@ -2,7 +2,7 @@ import re
 from functools import cached_property
 from typing import List
 from bossman.abc import ResourceApplyResultABC, ResourceStatusABC
-from bossman.errors import BossmanError
+from bossman.errors import BossmanError, error_to_dict
 from bossman.plugins.akamai.cloudlet_v3.resource import SharedPolicyResource
 from bossman.plugins.akamai.cloudlet_v3.data import Network, SharedPolicyActivationStatus, SharedPolicyVersion, SharedPolicyActivation
 from bossman.plugins.akamai.utils import GenericVersionComments
@@ -39,6 +39,17 @@ class SharedPolicyVersionStatus:
   def stagingStatus(self):
     return self.stagingActivation.status if self.stagingActivation != None else None
 
+  def to_dict(self) -> dict:
+    comments = self.comments
+    return dict(
+      version=self.version,
+      commit=comments.commit,
+      subject=comments.message.split("\n")[0] if comments.commit else None,
+      author=self.author,
+      production=self.productionStatus.value if self.productionStatus else None,
+      staging=self.stagingStatus.value if self.stagingStatus else None,
+    )
+
   def __rich_console__(self, *args, **kwargs):
     parts = []
     comments = self.comments
@@ -125,6 +136,13 @@ class SharedPolicyStatus(ResourceStatusABC):
         return False
     return True
 
+  def to_dict(self) -> dict:
+    status = super(SharedPolicyStatus, self).to_dict()
+    if self.error is not None:
+      status.update(error=error_to_dict(self.error))
+    status.update(versions=list(version.to_dict() for version in self.versions))
+    return status
+
   def __rich_console__(self, *args, **kwargs):
     if self.error is not None:
       from rich.panel import Panel
@@ -155,6 +173,16 @@ class SharedPolicyApplyResult(ResourceApplyResultABC):
   def had_errors(self) -> bool:
     return self.error != None
 
+  def to_dict(self) -> dict:
+    result = dict(
+      super(SharedPolicyApplyResult, self).to_dict(),
+      revision=self.revision.id,
+      version=self.policy_version.version if self.policy_version else None,
+    )
+    if self.error is not None:
+      result.update(error=error_to_dict(self.error))
+    return result
+
   def __rich_console__(self, *args, **kwargs):
     parts = []
     parts.append(r':arrow_up:')
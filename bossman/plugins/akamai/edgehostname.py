@@ -3,7 +3,7 @@ import json
 from os.path import expanduser
 from types import SimpleNamespace
 
-from bossman.errors import BossmanError, BossmanValidationError
+from bossman.errors import BossmanError, BossmanValidationError, error_to_dict
 from bossman.abc import ResourceTypeABC
 from bossman.abc import ResourceStatusABC
 from bossman.abc import ResourceABC
@@ -62,6 +62,12 @@ class EdgeHostnameStatus(ResourceStatusABC):
       return False
     return True
 
+  def to_dict(self) -> dict:
+    status = super(EdgeHostnameStatus, self).to_dict()
+    if self.error is not None:
+      status.update(error=error_to_dict(self.error))
+    return status
+
   def __rich_console__(self, *args, **kwargs):
     yield "[gray31](status not implemented for EdgeHostnames yet)[/]"
 
@@ -78,6 +84,12 @@ class EdgeHostnameApplyResult(ResourceApplyResultABC):
   def had_errors(self) -> bool:
     return self.error != None
 
+  def to_dict(self) -> dict:
+    result = dict(super(EdgeHostnameApplyResult, self).to_dict(), revision=self.revision.id)
+    if self.error is not None:
+      result.update(error=error_to_dict(self.error))
+    return result
+
   def __rich_console__(self, *args, **kwargs):
     parts = []
     parts.append(r':arrow_up:')
@@ -100,12 +112,14 @@ class ResourceTypeOptions:
     if "switch_key" in options:
       print('[red]WARNING: "switch_key" option is deprecated; use "account_key" instead[/]')
     self.switch_key = environ.get("%sEDGERC_SWITCH_KEY" % self.env_prefix, switch_key_opt)
+    self.max_connections = options.get("max_connections", None)
+    self.rate_limit = options.get("rate_limit", None)
 
 class ResourceType(ResourceTypeABC):
   def __init__(self, repo: Repo, config):
     super(ResourceType, self).__init__(repo, config)
     self.options = ResourceTypeOptions(config.options)
-    self.papi = PAPIClient(self.options.edgerc, self.options.section, self.options.switch_key)
+    self.papi = PAPIClient(self.options.edgerc, self.options.section, self.options.switch_key, max_connections=self.options.max_connections, rate_limit=self.options.rate_limit)
 
   def create_resource(self, path: str, **kwargs):
     return EdgeHostnameResource(path, **kwargs)
@@ -117,6 +131,8 @@ class ResourceType(ResourceTypeABC):
       return EdgeHostnameStatus(self.repo, resource, [], error=e)
 
   def is_pending(self, resource: EdgeHostnameResource, revision: Revision):
+    if self.is_squashed(resource, revision):
+      return False
     return not self.is_applied(resource, revision)
 
   def is_applied(self, resource: EdgeHostnameResource, revision: Revision):
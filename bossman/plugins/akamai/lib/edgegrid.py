@@ -1,13 +1,17 @@
 import random
 import sys, os
 import time
+import threading
+import atexit
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 import requests
 from requests.adapters import HTTPAdapter, RetryError
 from urllib3.util.retry import Retry, MaxRetryError
 from akamai.edgegrid import EdgeGridAuth, EdgeRc
 from configparser import NoSectionError, NoOptionError
 from bossman import logging, USER_AGENT
-from bossman.logging import logger
+from bossman.logging import logger, get_class_logger
 from bossman.errors import BossmanError
 
 py3 = sys.version_info[0] >= 3
@@ -22,13 +26,193 @@ else:
 class EdgegridError(BossmanError):
   pass
 
-adapter = HTTPAdapter(
-  pool_connections=1,
-  pool_maxsize=10,
-)
+# Default number of concurrent connections to an EdgeGrid host
+DEFAULT_MAX_CONNECTIONS = 32
+
+_adapters = dict()
+_adapters_lock = threading.Lock()
+
+def get_adapter(host: str, max_connections: int = None) -> HTTPAdapter:
+  """
+  Returns the connection pool shared by all the sessions talking to {host}.
+
+  The pool holds up to {max_connections} connections; it is sized by the first
+  session created for the host. Callers wait for a connection to be released
+  rather than opening (and discarding) extra ones, which bounds the number of
+  requests in flight to the host regardless of how many threads are issuing them.
+  """
+  with _adapters_lock:
+    adapter = _adapters.get(host)
+    if adapter is None:
+      adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=max_connections or DEFAULT_MAX_CONNECTIONS,
+        pool_block=True,
+      )
+      _adapters[host] = adapter
+    return adapter
+
+# Default sustained request rate (per second) and burst size for a given set of credentials
+DEFAULT_RATE_LIMIT = 20
+DEFAULT_BURST = 20
+
+# Upper bound on the number of times a single request can be throttled before giving up
+MAX_THROTTLED = 50
+
+class RateLimiterMetrics:
+  """
+  Queueing statistics of a `RateLimiter`.
+  """
+  def __init__(self):
+    self.requests = 0
+    self.queued = 0
+    self.throttled = 0
+    self.queue_time = 0.0
+    self.max_queue_time = 0.0
+
+  def __str__(self):
+    return "requests={} queued={} throttled={} queue_time={:.1f}s max_queue_time={:.1f}s".format(
+      self.requests, self.queued, self.throttled, self.queue_time, self.max_queue_time
+    )
+
+class RateLimiter:
+  """
+  Token bucket pacing the requests of all the sessions sharing a host and
+  credentials. Tokens are added at {rate} per second, up to {burst}.
+
+  When the API signals throttling (429, `Retry-After`, or an exhausted
+  `X-RateLimit-Remaining` with `X-RateLimit-Next`), no token is handed out
+  until the indicated time, so all the callers back off together instead
+  of each retrying on their own schedule.
+  """
+  def __init__(self, name: str, rate: float = None, burst: int = None):
+    self.logger = get_class_logger(self)
+    self.name = name
+    self.rate = float(rate or DEFAULT_RATE_LIMIT)
+    self.burst = burst or max(DEFAULT_BURST, int(self.rate))
+    self.tokens = float(self.burst)
+    self.updated = time.monotonic()
+    # no request may be issued before this (monotonic) time
+    self.not_before = 0.0
+    self.backoff = 1
+    self.metrics = RateLimiterMetrics()
+    self.lock = threading.Lock()
+
+  def acquire(self) -> float:
+    """
+    Blocks until the request can be issued. Returns the time spent waiting.
+    """
+    start = time.monotonic()
+    while True:
+      with self.lock:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        delay = self.not_before - now
+        if delay <= 0:
+          if self.tokens >= 1:
+            self.tokens -= 1
+            waited = now - start
+            self.metrics.requests += 1
+            if waited > 0:
+              self.metrics.queued += 1
+              self.metrics.queue_time += waited
+              self.metrics.max_queue_time = max(self.metrics.max_queue_time, waited)
+            return waited
+          delay = (1 - self.tokens) / self.rate
+      time.sleep(delay)
+
+  def update(self, response: requests.Response):
+    """
+    Adjusts pacing according to the rate limiting headers of {response}.
+    """
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    with self.lock:
+      now = time.monotonic()
+      if response.status_code == 429:
+        self.metrics.throttled += 1
+        delay = self.get_delay(response)
+        if delay is None:
+          if now < self.not_before:
+            # the callers are already backing off
+            return
+          # no hint from the server, back off exponentially (shared by all callers)
+          delay = self.backoff + random.uniform(0, 1)
+          self.backoff = min(self.backoff * 2, 60)
+        self.throttle(now + delay)
+        self.logger.debug("{} throttled for {:.1f}s".format(self.name, delay))
+      else:
+        self.backoff = 1
+        if remaining is not None and remaining.isdigit():
+          self.tokens = min(self.tokens, float(remaining))
+          if int(remaining) == 0:
+            delay = self.get_delay(response)
+            if delay is not None:
+              self.throttle(now + delay)
+
+  def throttle(self, until: float):
+    # call with the lock held
+    self.not_before = max(self.not_before, until)
+    self.tokens = 0.0
+
+  @staticmethod
+  def get_delay(response: requests.Response):
+    """
+    Returns the number of seconds {response} asks us to wait, if any.
+    """
+    retry_after = get_retry_after(response)
+    if retry_after is not None:
+      return retry_after
+    rate_limit_next = response.headers.get("X-RateLimit-Next")
+    if rate_limit_next is not None:
+      try:
+        next_time = datetime.fromisoformat(rate_limit_next.replace("Z", "+00:00"))
+        return max((next_time - datetime.now(timezone.utc)).total_seconds(), 0)
+      except ValueError:
+        pass
+    return None
+
+def get_retry_after(response: requests.Response):
+  """
+  Returns the number of seconds of the `Retry-After` header of {response}, which
+  can be either a number of seconds or an HTTP date, or None if there is none.
+  """
+  retry_after = response.headers.get("Retry-After")
+  if retry_after is None:
+    return None
+  if retry_after.strip().isdigit():
+    return float(retry_after)
+  try:
+    return max((parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds(), 0)
+  except (TypeError, ValueError):
+    return None
+
+_rate_limiters = dict()
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(host: str, client_token: str, rate: float = None) -> RateLimiter:
+  """
+  Returns the rate limiter shared by all the sessions using {client_token} against {host}.
+  It is configured by the first session created for the credentials.
+  """
+  with _rate_limiters_lock:
+    key = (host, client_token)
+    limiter = _rate_limiters.get(key)
+    if limiter is None:
+      limiter = _rate_limiters[key] = RateLimiter(host, rate)
+    return limiter
+
+def get_rate_limiters() -> list:
+  with _rate_limiters_lock:
+    return list(_rate_limiters.values())
+
+@atexit.register
+def _log_rate_limiter_metrics():
+  for limiter in get_rate_limiters():
+    limiter.logger.debug("{} {}".format(limiter.name, limiter.metrics))
 
 class Session(logging.RequestsLoggingSession):
-  def __init__(self, edgerc, section, switch_key=None, **kwargs):
+  def __init__(self, edgerc, section, switch_key=None, max_connections=None, rate_limit=None, **kwargs):
     try:
       super(Session, self).__init__(**kwargs)
       self.edgerc = EdgeRc(edgerc)
@@ -43,14 +227,19 @@ class Session(logging.RequestsLoggingSession):
         client_secret=self.edgerc.get(section, "client_secret"),
         access_token=self.edgerc.get(section, "access_token"),
       )
+      adapter = get_adapter(self.edgerc.get(section, "host"), max_connections)
       self.mount("https://", adapter)
       self.mount("http://", adapter)
+      self.rate_limiter = get_rate_limiter(self.edgerc.get(section, "host"), self.edgerc.get(section, "client_token"), rate_limit)
     except NoSectionError as e:
       raise EdgegridError(e.message)
     except NoOptionError as e:
       raise EdgegridError(e.message)
 
   def is_retryable(self, method: str, response: requests.Response):
+    if response.status_code == 429:
+      # throttled requests are rejected before being processed
+      return True
     if not method in ("HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE"):
       return False
     if 'application/problem+json' in response.headers.get('Content-Type', ''):
@@ -73,13 +262,20 @@ class Session(logging.RequestsLoggingSession):
     # with the same authorization headers. With edgegrid the auth headers may be invalid before we have
     # finished retrying, yielding "Invalid Timestamp" 400 errors.
     # https://github.com/psf/requests/issues/5975
-    tries, max_tries, wait = 1, 5, 1
+    #
+    # Throttled (429) responses are paced by the shared rate limiter and do not count
+    # as tries, so that large operations slow down instead of failing.
+    tries, max_tries, throttled = 1, 5, 0
     while tries <= max_tries:
+      self.rate_limiter.acquire()
       response = super(Session, self).request(method, url, params=params, headers=headers, **kwargs)
+      self.rate_limiter.update(response)
       if not response.ok:
-        if self.is_retryable(method, response):
-          time.sleep(wait)
-          wait = wait * 2 ** tries + random.uniform(0, 1)
+        if response.status_code == 429 and throttled < MAX_THROTTLED:
+          throttled += 1
+        elif self.is_retryable(method, response):
+          time.sleep(2 ** (tries - 1) + random.uniform(0, 1))
+          tries += 1
         elif int(response.status_code) // 100 == 4:
           # input errors should be handled by the caller
           return response
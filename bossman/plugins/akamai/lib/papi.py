@@ -1,14 +1,20 @@
+import gzip
 import json
-import time
-import sys
 from functools import lru_cache
-from bossman.plugins.akamai.lib.edgegrid import Session
+from bossman.plugins.akamai.lib.edgegrid import Session, get_retry_after
+from bossman.plugins.akamai.utils import SchemaValidators
 from bossman.logging import get_class_logger
 from bossman.cache import cache
 from bossman.errors import BossmanError
 
 _cache = cache.key(__name__)
 
+# Property versions are fetched in pages growing from VERSIONS_PAGE_SIZE to VERSIONS_MAX_PAGE_SIZE
+VERSIONS_PAGE_SIZE = 10
+VERSIONS_MAX_PAGE_SIZE = 500
+# Rule trees are mostly repetitive JSON, a low level compresses them nearly as well, much faster
+RULE_TREE_COMPRESSION_LEVEL = 3
+
 class PAPIError(BossmanError):
   pass
 class PAPIValidationError(PAPIError):
@@ -155,21 +161,90 @@ class PAPIBulkActivation:
   def length(self):
     return len(self.payload.get("activatePropertyVersions", []))
 
-  def add(self, property_id, property_version, network, notifyEmails):
-    self.payload.get("activatePropertyVersions").append(dict(
+  def add(self, property_id, property_version, network, notifyEmails, note=None):
+    activation = dict(
       propertyId=property_id,
       propertyVersion=property_version,
       network=network,
       notifyEmails=notifyEmails,
-    ))
+    )
+    if note:
+      activation.update(note=note)
+    self.payload.get("activatePropertyVersions").append(activation)
 
   def __str__(self):
     return json.dumps(self.payload)
 
+class PAPIBulkActivationItemStatus:
+  def __init__(self, **kwargs):
+    self.property_id = kwargs.get("propertyId")
+    self.property_name = kwargs.get("propertyName")
+    self.property_version = kwargs.get("propertyVersion")
+    self.network = kwargs.get("network")
+    self.task_status = kwargs.get("taskStatus")
+    self.activation_id = kwargs.get("activationId")
+    self.activation_status = kwargs.get("activationStatus")
+    self.fatal_error = kwargs.get("fatalError")
+
+  @property
+  def error(self):
+    """
+    The reason why the activation could not be submitted, if it failed.
+    """
+    if self.task_status != "SUBMISSION_ERROR":
+      return None
+    fatal_error = self._parse_fatal_error()
+    if fatal_error is None:
+      return self.fatal_error or self.task_status
+    return fatal_error.get("title", fatal_error.get("detail", self.task_status))
+
+  @property
+  def already_active(self) -> bool:
+    """
+    True if the activation was not submitted because the version is already active
+    on the network, which the activation endpoint reports as a 422.
+    """
+    if self.task_status != "SUBMISSION_ERROR":
+      return False
+    fatal_error = self._parse_fatal_error() or {}
+    if 422 in (fatal_error.get("status"), fatal_error.get("statusCode")):
+      return True
+    text = " ".join(str(fatal_error.get(k, "")) for k in ("type", "title", "detail")).lower()
+    return "already active" in text or "already-active" in text
+
+  def _parse_fatal_error(self):
+    try:
+      fatal_error = json.loads(self.fatal_error or "{}")
+      return fatal_error if isinstance(fatal_error, dict) else None
+    except (TypeError, json.decoder.JSONDecodeError):
+      return None
+
+class PAPIBulkActivationStatus:
+  def __init__(self, **kwargs):
+    self.bulk_activation_id = kwargs.get("bulkActivationId")
+    self.status = kwargs.get("bulkActivationStatus")
+    self.items = list(PAPIBulkActivationItemStatus(**item) for item in kwargs.get("activatePropertyVersions", []))
+
+  @property
+  def done(self):
+    return self.status == "COMPLETE"
+
+def is_frozen(version: dict) -> bool:
+  """
+  Returns True if the property {version} (as indexed) can no longer be edited,
+  which is the case once it was activated on either network.
+  """
+  return any(version.get(field) not in (None, "INACTIVE") for field in ("stagingStatus", "productionStatus"))
+
+_validators = SchemaValidators()
+
 class PAPIClient:
   def __init__(self, edgerc, section, switch_key=None, **kwargs):
     self.logger = get_class_logger(self)
     self.session = Session(edgerc, section, switch_key=switch_key, **kwargs)
+    self.section = section
+    # property id -> name, for the ids resolved through the cache
+    self._property_names = dict()
 
   def get_edgehostnames(self, contractId, groupId):
     self.logger.debug(f'get_edgehostnames contractId=${contractId} groupId=${groupId}')
@@ -215,34 +290,104 @@ class PAPIClient:
     )
     return filtered[0] if len(filtered) else None
 
+  def _property_id_cache(self, propertyName):
+    return _cache.key("property_id", self.section, self.session.switch_key or "", propertyName)
+
   def get_property_id(self, propertyName):
+    """
+    Returns the id of the property named {propertyName}, or None if it doesn't exist.
+
+    Property ids never change, so they are cached persistently. A cached id is
+    only forgotten when a request scoped to the property yields a 404.
+    """
     self.logger.debug("get_property_id propertyName={propertyName}".format(propertyName=propertyName))
-    property_id = None
-    response = self.session.post("/papi/v1/search/find-by-value", json={"propertyName": propertyName})
-    if response.status_code == 200:
-      versions = list(PAPIPropertyVersion(**item) for item in response.json().get("versions", {}).get("items", []))
-      if len(versions) > 0:
-        property_id = str(versions[0].propertyId)
+    cache = self._property_id_cache(propertyName)
+    property_id = cache.get_str()
+    if property_id is None:
+      response = self.session.post("/papi/v1/search/find-by-value", json={"propertyName": propertyName})
+      if response.status_code == 200:
+        versions = list(PAPIPropertyVersion(**item) for item in response.json().get("versions", {}).get("items", []))
+        if len(versions) > 0:
+          property_id = str(versions[0].propertyId)
+          cache.update(property_id)
+    if property_id is not None:
+      self._property_names[property_id] = propertyName
     return property_id
 
+  def _remember_property_id(self, propertyName, propertyId):
+    self._property_id_cache(propertyName).update(propertyId)
+    self._property_names[propertyId] = propertyName
+
+  def forget_property_id(self, propertyId):
+    """
+    Removes {propertyId} from the persistent cache, if it was resolved from there.
+    """
+    propertyName = self._property_names.pop(str(propertyId), None)
+    if propertyName is not None:
+      self.logger.debug("forget_property_id propertyId={propertyId} propertyName={propertyName}".format(propertyId=propertyId, propertyName=propertyName))
+      self._property_id_cache(propertyName).delete()
+
+  def _property_request(self, method, propertyId, url, **kwargs):
+    """
+    Performs a request scoped to {propertyId}; a 404 for the property itself means
+    that the property id we have on record is no longer valid.
+    """
+    response = self.session.request(method, url, **kwargs)
+    if response.status_code == 404 and self._is_property_not_found(propertyId, url, response):
+      self.forget_property_id(propertyId)
+    return response
+
+  @staticmethod
+  def _is_property_not_found(propertyId, url, response) -> bool:
+    """
+    Tells a 404 for the property from a 404 for something within it, such as a
+    version or an activation.
+    """
+    if url.split("?")[0].rstrip("/") == "/papi/v1/properties/{}".format(propertyId):
+      return True
+    try:
+      problem = response.json()
+    except ValueError:
+      return False
+    if not isinstance(problem, dict):
+      return False
+    text = " ".join(str(problem.get(k, "")) for k in ("type", "title")).lower()
+    if "version" in text or "activation" in text:
+      return False
+    return "property" in text and ("not found" in text or "not-found" in text)
+
   def get_property(self, propertyName) -> PAPIProperty:
     self.logger.debug("get_property propertyName={propertyName}".format(propertyName=propertyName))
     property_id = self.get_property_id(propertyName)
     if not property_id:
       return None
-    response = self.session.get("/papi/v1/properties/{}".format(property_id))
+    response = self._property_request("GET", property_id, "/papi/v1/properties/{}".format(property_id))
     if response.status_code != 200:
       raise PAPIError(response.json())
     property_json = response.json().get("properties").get("items")[0]
     return PAPIProperty(**property_json)
 
+  def list_properties(self, contractId, groupId) -> list:
+    """
+    Returns all the properties in {contractId} and {groupId}. The property ids are
+    remembered, saving a lookup by name later on.
+    """
+    self.logger.debug("list_properties contractId={contractId} groupId={groupId}".format(contractId=contractId, groupId=groupId))
+    response = self.session.get("/papi/v1/properties", params=dict(contractId=contractId, groupId=groupId))
+    if response.status_code != 200:
+      raise PAPIError(response.json())
+    properties = list(PAPIProperty(**item) for item in response.json().get("properties").get("items", []))
+    for prop in properties:
+      self._remember_property_id(prop.propertyName, prop.propertyId)
+    return properties
+
   def get_latest_property_version(self, propertyId, network=None) -> PAPIPropertyVersion:
     self.logger.debug("get_latest_property_version propertyId={propertyId} network={network}".format(propertyId=propertyId, network=network))
     params = dict()
     if not network is None:
       params["activatedOn"] = network
     url = "/papi/v1/properties/{propertyId}/versions/latest".format(propertyId=propertyId)
-    response = self.session.get(url, params=params)
+    response = self._property_request("GET", propertyId, url, params=params)
     if response.status_code != 200:
       raise PAPIError(response.json())
     version_dict = response.json().get("versions").get("items")[0]
@@ -251,38 +396,139 @@ class PAPIClient:
   def get_property_version(self, propertyId, propertyVersion):
     self.logger.debug("get_property_version propertyId={propertyId} propertyVersion={propertyVersion}".format(propertyId=propertyId, propertyVersion=propertyVersion))
     url = "/papi/v1/properties/{propertyId}/versions/{propertyVersion}".format(propertyId=propertyId, propertyVersion=propertyVersion)
-    response = self.session.get(url)
-    version_dict = response.json().get("versions").get("items")[0]
-    return PAPIPropertyVersion(**version_dict)
+    response = self._property_request("GET", propertyId, url)
+    if response.status_code != 200:
+      raise PAPIError(response.json())
+    response = response.json()
+    meta_fields = dict((k, v) for (k, v) in response.items() if k in ("accountId", "contractId", "propertyId", "groupId", "propertyName"))
+    version_dict = response.get("versions").get("items")[0]
+    return PAPIPropertyVersion(**meta_fields, **version_dict)
 
   def get_property_versions(self, propertyId, limit=500, offset=0):
     self.logger.debug("get_property_versions propertyId={propertyId} limit={limit} offset={offset}".format(propertyId=propertyId, limit=limit, offset=offset))
     params = dict(limit=str(limit), offset=str(offset))
     url = "/papi/v1/properties/{propertyId}/versions".format(propertyId=propertyId)
-    response = self.session.get(url, params=params).json()
+    response = self._property_request("GET", propertyId, url, params=params).json()
     meta_fields = dict((k, v) for (k, v) in response.items() if k in ("accountId", "contractId", "propertyId", "groupId", "propertyName"))
     versions = list({**meta_fields, **version} for version in response.get("versions").get("items"))
     return list(PAPIPropertyVersion(**version) for version in versions)
 
-  def iter_property_versions(self, propertyId, predicate, pageSize=20):
-    self.logger.debug("iter_property_versions propertyId={propertyId}".format(propertyId=propertyId))
-    offset = 0
-    while True:
-      self.logger.debug("... iter_property_versions propertyId={propertyId} offset={offset}".format(propertyId=propertyId, offset=offset))
-      versions = self.get_property_versions(propertyId, pageSize, offset)
-      if len(versions) == 0:
-        break
-      for idx, version in enumerate(versions):
-        if offset + idx > 10:
-          return
-        if predicate(version):
+  def iter_property_versions(self, propertyId, predicate=None, offset=0, depth=None, pageSize=VERSIONS_PAGE_SIZE):
+    """
+    Yields the versions of {propertyId} matching {predicate}, newest first, skipping
+    the {offset} latest versions and scanning at most {depth} versions.
+
+    Pages are only fetched as the iteration progresses, and double in size from
+    {pageSize} up to `VERSIONS_MAX_PAGE_SIZE`: shallow searches stay cheap and deep
+    ones take few requests.
+    """
+    self.logger.debug("iter_property_versions propertyId={propertyId} offset={offset} depth={depth}".format(propertyId=propertyId, offset=offset, depth=depth))
+    scanned = 0
+    while depth is None or scanned < depth:
+      limit = pageSize if depth is None else min(pageSize, depth - scanned)
+      versions = self.get_property_versions(propertyId, limit, offset + scanned)
+      for version in versions:
+        if predicate is None or predicate(version):
           yield version
-      offset += pageSize
-    return None
+      scanned += len(versions)
+      if len(versions) < limit:
+        return
+      pageSize = min(pageSize * 2, VERSIONS_MAX_PAGE_SIZE)
 
-  def find_latest_property_version(self, propertyId, predicate, pageSize=500):
+  def find_latest_property_version(self, propertyId, predicate, depth=None):
     self.logger.debug("find_latest_property_version propertyId={propertyId}".format(propertyId=propertyId))
-    return next(self.iter_property_versions(propertyId, predicate, pageSize), None)
+    return next(self.iter_property_versions(propertyId, predicate, depth=depth), None)
+
+  def iter_indexed_property_versions(self, propertyId, predicate=None, depth=None, latestVersion=None):
+    """
+    Like `iter_property_versions`, except that versions are recorded in a persistent
+    index, and versions already in the index are not fetched again.
+
+    Property versions are numbered contiguously from 1 to {latestVersion}, so
+    the offset of a version missing from the index is known, and only the gaps are
+    fetched. If {latestVersion} is not provided, it is looked up.
+
+    The latest version is fetched again unless it was activated, as it can still be
+    edited (e.g. in the Control Center) and its note or etag may have changed. Versions
+    written by this client are dropped from the index (see `forget_property_version`).
+    """
+    self.logger.debug("iter_indexed_property_versions propertyId={propertyId} depth={depth}".format(propertyId=propertyId, depth=depth))
+    cache = self._property_versions_cache(propertyId)
+    index = cache.get_json({})
+    if latestVersion is None:
+      latestVersion = self.get_latest_property_version(propertyId).propertyVersion
+    lowest = max(1, latestVersion - depth + 1) if depth else 1
+    number, pageSize = latestVersion, VERSIONS_PAGE_SIZE
+    while number >= lowest:
+      indexed = index.get(str(number))
+      if indexed is None or (number == latestVersion and not is_frozen(indexed)):
+        versions = self.get_property_versions(propertyId, min(pageSize, number - lowest + 1), latestVersion - number)
+        pageSize = min(pageSize * 2, VERSIONS_MAX_PAGE_SIZE)
+        for version in versions:
+          index[str(version.propertyVersion)] = version.__dict__
+        cache.update_json(index)
+        if not any(version.propertyVersion == number for version in versions):
+          if len(versions) == 0 or versions[0].propertyVersion <= number:
+            break
+          # versions were created since we looked up the latest, shifting the offsets
+          latestVersion += versions[0].propertyVersion - number
+          continue
+      version = PAPIPropertyVersion(**index[str(number)])
+      if predicate is None or predicate(version):
+        yield version
+      number -= 1
+
+  def _property_versions_cache(self, propertyId):
+    return _cache.key("property_versions", str(propertyId))
+
+  def forget_property_version(self, propertyId, version):
+    """
+    Drops {version} of {propertyId} from the version index, after it was changed.
+    """
+    cache = self._property_versions_cache(propertyId)
+    index = cache.get_json({})
+    if index.pop(str(version), None) is not None:
+      cache.update_json(index)
+
+  def get_indexed_property_versions(self, prop: PAPIProperty, depth=None) -> list:
+    """
+    Returns the {depth} latest versions of {prop}, newest first, from the version index.
+
+    Only the versions created since the index was last updated are fetched, along
+    with the latest version if it is still editable (see `iter_indexed_property_versions`).
+    Apart from their activation statuses, activated versions are immutable: statuses are derived from
+    the staging and production versions of {prop}, and PENDING versions are fetched
+    again until their activation completes. An activation started after a version was
+    indexed is only reflected once it completes.
+    """
+    self.logger.debug("get_indexed_property_versions propertyId={propertyId} depth={depth}".format(propertyId=prop.propertyId, depth=depth))
+    indexed = set(self._property_versions_cache(prop.propertyId).get_json({}).keys())
+    versions = list(self.iter_indexed_property_versions(prop.propertyId, depth=depth, latestVersion=prop.latestVersion))
+    changed = dict()
+    for idx, version in enumerate(versions):
+      if str(version.propertyVersion) not in indexed:
+        # just fetched
+        continue
+      if "PENDING" in (version.stagingStatus, version.productionStatus):
+        version = self.get_property_version(prop.propertyId, version.propertyVersion)
+      else:
+        before = dict(version.__dict__)
+        for network, active_version in (("staging", prop.stagingVersion), ("production", prop.productionVersion)):
+          field = "{}Status".format(network)
+          if version.propertyVersion == active_version:
+            setattr(version, field, "ACTIVE")
+          elif getattr(version, field) == "ACTIVE":
+            setattr(version, field, "DEACTIVATED")
+        if version.__dict__ == before:
+          continue
+      changed[str(version.propertyVersion)] = version.__dict__
+      versions[idx] = version
+    if len(changed):
+      cache = self._property_versions_cache(prop.propertyId)
+      index = cache.get_json({})
+      index.update(changed)
+      cache.update_json(index)
+    return versions
 
   def create_property(self, propertyName, productId, ruleFormat, contractId, groupId) -> str:
     self.logger.debug("create_property propertyName={propertyName} contractId={contractId} groupId={groupId}".format(propertyName=propertyName, contractId=contractId, groupId=groupId))
@@ -300,7 +546,9 @@ class PAPIClient:
     response = self.session.get(response.headers["Location"])
     if response.status_code != 200:
       raise PAPIError(response.json())
-    return response.json().get("properties").get("items")[0].get("propertyId")
+    property_id = response.json().get("properties").get("items")[0].get("propertyId")
+    self._remember_property_id(propertyName, property_id)
+    return property_id
 
   def create_property_version(self, propertyId, baseVersion, baseVersionEtag = None):
     self.logger.debug("create_property_version propertyId={propertyId} baseVersion={baseVersion}".format(propertyId=propertyId, baseVersion=baseVersion))
@@ -308,18 +556,49 @@ class PAPIClient:
     if baseVersionEtag:
       data.update(createFromVersionEtag=baseVersionEtag)
     url = "/papi/v1/properties/{propertyId}/versions".format(propertyId=propertyId)
-    response = self.session.post(url, json=data)
+    response = self._property_request("POST", propertyId, url, json=data)
     link = response.json().get("versionLink")
     version = self.session.get(link).json().get("versions").get("items")[0]
     return PAPIPropertyVersion(**version)
 
   def update_property_rule_tree(self, propertyId, version, ruleTree):
-    self.logger.debug("update_property_rule_tree propertyId={propertyId} version={version}".format(propertyId=propertyId, version=version))
-    headers = {}
-    if "ruleFormat" in ruleTree:
-      headers["Content-Type"] = "application/vnd.akamai.papirules.{}+json".format(ruleTree.get("ruleFormat"))
+    body = json.dumps(ruleTree).encode()
+    return self.put_property_rule_tree(propertyId, version, body, ruleTree.get("ruleFormat"))
+
+  def put_property_rule_tree(self, propertyId, version, body: bytes, ruleFormat=None, compress=False):
+    """
+    Sets the rule tree of the property version from its serialized JSON {body}, which
+    is sent gzip compressed if {compress} is True.
+    """
+    self.logger.debug("put_property_rule_tree propertyId={propertyId} version={version} size={size}".format(propertyId=propertyId, version=version, size=len(body)))
+    headers = {"Content-Type": "application/json"}
+    if ruleFormat:
+      headers["Content-Type"] = "application/vnd.akamai.papirules.{}+json".format(ruleFormat)
+    if compress:
+      body = gzip.compress(body, compresslevel=RULE_TREE_COMPRESSION_LEVEL)
+      headers["Content-Encoding"] = "gzip"
+    url = "/papi/v1/properties/{propertyId}/versions/{version}/rules".format(propertyId=propertyId, version=version)
+    response = self._property_request("PUT", propertyId, url, data=body, headers=headers)
+    self.forget_property_version(propertyId, version)
+    if response.status_code == 200:
+      return PAPIPropertyVersionRuleTree(**response.json())
+    if response.status_code == 400:
+      raise PAPIRuleTreeValidationError(response.json())
+    raise PAPIError(response.json())
+
+  def update_property_rule_tree_comments(self, propertyId, version, comments, ruleFormat=None):
+    """
+    Only sets the comments of the rule tree of the property version, with a JSON
+    patch, sparing the upload of a rule tree the version already has.
+    """
+    self.logger.debug("update_property_rule_tree_comments propertyId={propertyId} version={version}".format(propertyId=propertyId, version=version))
+    headers = {"Content-Type": "application/json-patch+json"}
+    if ruleFormat:
+      headers["Accept"] = "application/vnd.akamai.papirules.{}+json".format(ruleFormat)
     url = "/papi/v1/properties/{propertyId}/versions/{version}/rules".format(propertyId=propertyId, version=version)
-    response = self.session.put(url, json=ruleTree, headers=headers)
+    patch = [dict(op="add", path="/comments", value=comments)]
+    response = self._property_request("PATCH", propertyId, url, data=json.dumps(patch), headers=headers)
+    self.forget_property_version(propertyId, version)
     if response.status_code == 200:
       return PAPIPropertyVersionRuleTree(**response.json())
     if response.status_code == 400:
@@ -329,7 +608,8 @@ class PAPIClient:
   def update_property_hostnames(self, propertyId, version, hostnames):
     self.logger.debug("update_property_hostnames propertyId={propertyId} version={version}".format(propertyId=propertyId, version=version))
     url = "/papi/v1/properties/{propertyId}/versions/{version}/hostnames".format(propertyId=propertyId, version=version)
-    response = self.session.put(url, json=hostnames)
+    response = self._property_request("PUT", propertyId, url, json=hostnames)
+    self.forget_property_version(propertyId, version)
     if response.status_code == 200:
       return PAPIPropertyVersionHostnames(**response.json())
     if response.status_code == 400:
@@ -353,6 +633,20 @@ class PAPIClient:
         cache.update_json(schema)
     return schema
 
+  def get_rule_format_validator(self, productId, ruleFormat):
+    """
+    Returns the validator for the rule format schema, compiled once for the process.
+    """
+    load = lambda: (self.get_rule_format_schema(productId, ruleFormat), None)
+    return _validators.get(("rule_format", productId, ruleFormat), load)
+
+  def get_request_validator(self, request_filename):
+    """
+    Returns the validator for the request schema, compiled once for the process.
+    """
+    load = lambda: (self.get_request_schema(request_filename), None)
+    return _validators.get(("request", request_filename), load)
+
   def get_request_schema(self, request_filename):
     self.logger.debug("get_request_schema filename={request_filename}".format(request_filename=request_filename))
     cache = _cache.key("schema", "request", request_filename)
@@ -379,7 +673,7 @@ class PAPIClient:
         nonComplianceReason="NO_PRODUCTION_TRAFFIC",
       ),
     )
-    response = self.session.post(url, json=body)
+    response = self._property_request("POST", property_id, url, json=body)
     if response.status_code == 409:
       raise PAPIVersionAlreadyActivatingError()
     if response.status_code == 422:
@@ -391,55 +685,52 @@ class PAPIClient:
     if response.status_code != 200:
       raise PAPIError(response.text)
     activation_status = response.json().get("activations").get("items")[0]
-    retry_after = int(response.headers["Retry-After"])
+    retry_after = get_retry_after(response)
     return (retry_after, PAPIActivationStatus(**activation_status))
 
   def list_activations(self, property_id):
-    self.logger.debug("list_activations property_id={}".format(property_id))
+    (_, activations) = self.get_activations(property_id)
+    return activations
+
+  def get_activations(self, property_id):
+    """
+    Lists the activations of {property_id}, along with the delay suggested by
+    the API before checking on them again (None if it didn't suggest any).
+    """
+    self.logger.debug("get_activations property_id={}".format(property_id))
     url = "/papi/v1/properties/{}/activations".format(property_id)
-    response = self.session.get(url)
+    response = self._property_request("GET", property_id, url)
     if response.status_code != 200:
       raise PAPIError(response.text)
-    return list(PAPIActivationStatus(**activation_status) for activation_status in response.json().get("activations").get("items"))
+    retry_after = get_retry_after(response)
+    return (retry_after, list(PAPIActivationStatus(**activation_status) for activation_status in response.json().get("activations").get("items")))
 
   def get_activation_status(self, property_id, activation_id):
     self.logger.debug("get_activation_status property_id={} activation_id={}".format(property_id, activation_id))
     url = "/papi/v1/properties/{}/activations/{}".format(property_id, activation_id)
-    response = self.session.get(url)
+    response = self._property_request("GET", property_id, url)
     if response.status_code != 200:
       raise PAPIError(response.text)
     activation_status = response.json().get("activations").get("items")[0]
-    retry_after = int(response.headers["Retry-After"])
+    retry_after = get_retry_after(response)
     return (retry_after, PAPIActivationStatus(**activation_status))
 
   def bulk_activate(self, bulkActivation: PAPIBulkActivation):
     """
-    No longer used - may be ressuscitated later.
+    Submits {bulkActivation} and returns the link to its status, without waiting
+    for the activations to be created.
     """
     self.logger.debug("bulk_activate bulkActivation={}".format(bulkActivation))
     url = "/papi/v1/bulk/activations"
     response = self.session.post(url, json=bulkActivation.payload)
     if response.status_code != 202:
       raise PAPIError(response.text)
-    response_json = response.json()
-    bulkActivationUrl = response_json.get("bulkActivationLink")
-    patience = 3 # number of points to print
-    while True:
-      time.sleep(2)
-      status_response = self.session.get(bulkActivationUrl)
-      status_response_json = status_response.json()
-      if status_response_json.get("bulkActivationStatus") == "COMPLETE":
-        activation_statuses = dict((apv.get("propertyName"), dict(
-          activationStatus=apv.get("activationStatus"),
-          taskStatus=apv.get("taskStatus"),
-          propertyId=apv.get("propertyId"),
-          propertyVersion=apv.get("propertyVersion"),
-          network=apv.get("network"),
-          fatalError=apv.get("fatalError", '{}')
-        )) for apv in status_response_json.get("activatePropertyVersions"))
-        sys.stderr.write("\n")
-        print(activation_statuses)
-        return activation_statuses
-      sys.stderr.write("\rpatience{}".format("." * patience))
-      patience += 1
-    return response.json()
+    return response.json().get("bulkActivationLink")
+
+  def get_bulk_activation_status(self, bulkActivationLink):
+    self.logger.debug("get_bulk_activation_status bulkActivationLink={}".format(bulkActivationLink))
+    response = self.session.get(bulkActivationLink)
+    if response.status_code != 200:
+      raise PAPIError(response.text)
+    retry_after = get_retry_after(response)
+    return (retry_after, PAPIBulkActivationStatus(**response.json()))
@@ -0,0 +1,199 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from bossman.errors import BossmanError
+from bossman.logging import get_class_logger
+
+# Delay between two status checks of a group when the API doesn't provide a Retry-After
+DEFAULT_POLL_INTERVAL = 20
+# Status checks are never closer than this, whatever the API suggests
+MIN_POLL_INTERVAL = 2
+# Number of status checks an activation can be missing from before it is fetched on its own
+MAX_MISSES = 3
+# Activations still not done after this many seconds are given up on
+ACTIVATION_TIMEOUT = 4 * 60 * 60
+
+class ActivationPollingError(BossmanError):
+  """
+  Raised when the status of an activation can't be followed anymore.
+  """
+
+def chain(source: Future, target: Future):
+  """
+  Resolves {target} like {source}, once {source} is done.
+  """
+  def on_done(source: Future):
+    if source.exception() is not None:
+      target.set_exception(source.exception())
+    else:
+      target.set_result(source.result())
+  source.add_done_callback(on_done)
+
+class _Tracked:
+  def __init__(self, on_status: callable, is_done: callable, deadline: float):
+    self.on_status = on_status
+    self.is_done = is_done
+    self.deadline = deadline
+    self.misses = 0
+    self.future = Future()
+
+class ActivationPoller:
+  """
+  Tracks in-flight activations from a single background thread.
+
+  Activations are tracked by group (e.g. the property they belong to) and the
+  status of every activation of a group is obtained with a single call to
+  {check}(key, activation_ids), which returns a tuple (retry_after, statuses)
+  where statuses is a dict activation_id => status. The next check of the
+  group is scheduled {retry_after} seconds later, or {interval} seconds if
+  the API didn't suggest a delay.
+
+  An activation missing from {MAX_MISSES} checks in a row, or from a check
+  that failed, is fetched on its own with {fetch}(key, activation_id), which
+  returns its status. The activation fails if that isn't possible, or if it
+  isn't done after {timeout} seconds; the others in its group keep going.
+
+  The thread is started when the first activation is tracked and stops when
+  none is left.
+  """
+  def __init__(self, name: str, check: callable, interval: float = DEFAULT_POLL_INTERVAL, fetch: callable = None, timeout: float = ACTIVATION_TIMEOUT):
+    self.logger = get_class_logger(self)
+    self.name = name
+    self.check = check
+    self.interval = interval
+    self.fetch = fetch
+    self.timeout = timeout
+    self.cond = threading.Condition()
+    self.groups = {}
+    self.due = {}
+    self.thread = None
+
+  def track(self, key, activation_id, on_status: callable, is_done: callable, retry_after: float = None) -> Future:
+    """
+    Starts polling the status of {activation_id} in group {key}. {on_status}
+    is called from the poller thread with every status obtained, until
+    {is_done}(status) is true, at which point the returned future resolves to
+    the final status.
+    """
+    tracked = _Tracked(on_status, is_done, time.monotonic() + self.timeout)
+    with self.cond:
+      self.groups.setdefault(key, {})[activation_id] = tracked
+      due = time.monotonic() + self._delay(retry_after)
+      self.due[key] = min(self.due.get(key, due), due)
+      if self.thread is None:
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+      self.cond.notify()
+    return tracked.future
+
+  def _delay(self, retry_after: float = None) -> float:
+    if retry_after is None:
+      return self.interval
+    return max(MIN_POLL_INTERVAL, retry_after)
+
+  def _next(self):
+    """
+    Waits until a group is due for a check and returns its key along with the
+    activations it tracks, or None once nothing is tracked anymore.
+    """
+    with self.cond:
+      while True:
+        if len(self.groups) == 0:
+          self.thread = None
+          return None
+        key, due = min(self.due.items(), key=lambda item: item[1])
+        delay = due - time.monotonic()
+        if delay <= 0:
+          del self.due[key]
+          return key, dict(self.groups.get(key))
+        self.cond.wait(delay)
+
+  def _update(self, key, activation_id, tracked: _Tracked, status) -> bool:
+    """
+    Reports {status} for {activation_id} and returns whether it is done.
+    """
+    try:
+      tracked.on_status(status)
+    except Exception as e:
+      self.logger.exception("on_status {} {}".format(key, activation_id))
+    try:
+      done = tracked.is_done(status)
+    except Exception as e:
+      tracked.future.set_exception(e)
+      return True
+    if done:
+      tracked.future.set_result(status)
+    return done
+
+  def _fetch(self, key, activation_id, tracked: _Tracked, reason: str) -> bool:
+    """
+    Fetches the status of {activation_id} on its own, failing it if that
+    isn't possible. Returns whether it is done.
+    """
+    if self.fetch is None:
+      tracked.future.set_exception(ActivationPollingError("activation {} of {}: {}".format(activation_id, key, reason)))
+      return True
+    try:
+      status = self.fetch(key, activation_id)
+    except Exception as e:
+      self.logger.warning("fetch {} {} failed: {}".format(key, activation_id, e))
+      tracked.future.set_exception(ActivationPollingError("activation {} of {}: {}, and fetching it failed: {}".format(activation_id, key, reason, e)))
+      return True
+    tracked.misses = 0
+    return self._update(key, activation_id, tracked, status)
+
+  def _poll(self, key, tracked: dict):
+    """
+    Checks on the activations {tracked} in group {key} and returns the delay
+    suggested by the API along with the activations that are finished.
+    """
+    retry_after, finished = None, set()
+    try:
+      retry_after, statuses = self.check(key, list(tracked.keys()))
+    except Exception as e:
+      # the API client already retries transient errors
+      self.logger.warning("check {} failed: {}".format(key, e))
+      for activation_id, _tracked in tracked.items():
+        if self._fetch(key, activation_id, _tracked, "checking its group failed: {}".format(e)):
+          finished.add(activation_id)
+      return retry_after, finished
+    for activation_id, _tracked in tracked.items():
+      if activation_id in statuses:
+        _tracked.misses = 0
+        if self._update(key, activation_id, _tracked, statuses.get(activation_id)):
+          finished.add(activation_id)
+        continue
+      _tracked.misses += 1
+      if _tracked.misses >= MAX_MISSES:
+        reason = "missing from the last {} status checks".format(_tracked.misses)
+        if self._fetch(key, activation_id, _tracked, reason):
+          finished.add(activation_id)
+    return retry_after, finished
+
+  def _run(self):
+    while True:
+      next = self._next()
+      if next is None:
+        return
+      key, tracked = next
+      retry_after, finished = None, set()
+      try:
+        retry_after, finished = self._poll(key, tracked)
+      except Exception as e:
+        self.logger.exception("poll {}".format(key))
+      now = time.monotonic()
+      for activation_id, _tracked in tracked.items():
+        if activation_id not in finished and now >= _tracked.deadline:
+          _tracked.future.set_exception(ActivationPollingError("activation {} of {} is not done after {}s".format(activation_id, key, self.timeout)))
+          finished.add(activation_id)
+      with self.cond:
+        group = self.groups.get(key)
+        for activation_id in finished:
+          group.pop(activation_id, None)
+        if len(group):
+          due = time.monotonic() + self._delay(retry_after)
+          self.due[key] = min(self.due.get(key, due), due)
+        else:
+          del self.groups[key]
+          self.due.pop(key, None)
@@ -1,29 +1,32 @@
 from bossman.plugins.akamai.lib.edgegrid import EdgegridError
 import re
-import time
 import json
-import random
+import hashlib
 import pathlib
 from io import StringIO
 from os import getenv
 from os.path import expanduser, basename, dirname, join
 from collections import OrderedDict
 from types import SimpleNamespace
+from functools import partial
+from concurrent.futures import Future
 import jsonschema
 
 from bossman.cache import cache
-from bossman.errors import BossmanError, BossmanValidationError
+from bossman.errors import BossmanError, BossmanValidationError, error_to_dict
 from bossman.abc import ResourceTypeABC
 from bossman.abc import ResourceStatusABC
 from bossman.abc import ResourceABC
 from bossman.abc import ResourceApplyResultABC
-from bossman.plugins.akamai.utils import GenericVersionComments
+from bossman.plugins.akamai.utils import GenericVersionComments, SchemaValidators, validation_cache
 from bossman.repo import Repo, Revision, RevisionDetails
+from bossman.plugins.akamai.lib.poller import ActivationPoller, chain
 from bossman.plugins.akamai.lib.papi import (
   PAPIClient,
   PAPIPropertyVersion,
   PAPIPropertyVersionHostnames,
   PAPIPropertyVersionRuleTree,
+  PAPIActivationStatus,
   PAPIBulkActivation,
   PAPIError,
   PAPIValidationError,
@@ -34,9 +37,36 @@ from bossman.rich import bracketize
 from rich import print
 
 RE_COMMIT = re.compile("^commit: ([a-z0-9]*)", re.MULTILINE)
+# Fast (FMA) activations complete within minutes, their status is checked more often
+FMA_POLL_INTERVAL = 10
+# Bulk activations only take a few seconds to create the activations
+BULK_POLL_INTERVAL = 5
+# Number of properties per bulk activation request
+BULK_ACTIVATION_MAX_SIZE = 100
 
 _cache = cache.key(__name__)
 
+def content_hash(content: bytes) -> str:
+  """
+  Returns the hash of {content} recorded in the notes, to tell whether it changed.
+  """
+  if content is None:
+    return None
+  if isinstance(content, str):
+    content = content.encode()
+  return hashlib.sha256(content).hexdigest()
+
+def with_comments(rule_tree: bytes, rules_json: dict, comments: str) -> bytes:
+  """
+  Returns the serialized {rule_tree} with its top level comments set to {comments}.
+  The field is inserted at the start of the JSON object rather than serializing
+  the whole rule tree again, unless it already has comments.
+  """
+  if "comments" in rules_json or len(rules_json) == 0:
+    return json.dumps(dict(rules_json, comments=comments)).encode()
+  start = rule_tree.index(b"{")
+  return b"".join((b'{"comments": ', json.dumps(comments).encode(), b", ", memoryview(rule_tree)[start + 1:]))
+
 class PropertyValidationError(BossmanValidationError):
   pass
 
@@ -91,6 +121,24 @@ class PropertyStatus(ResourceStatusABC):
         return False
     return True
 
+  def to_dict(self) -> dict:
+    status = super(PropertyStatus, self).to_dict()
+    if self.error is not None:
+      status.update(error=error_to_dict(self.error))
+    versions = []
+    for version in self.versions:
+      comments = GenericVersionComments(version.note or "")
+      versions.append(dict(
+        version=version.propertyVersion,
+        commit=comments.commit,
+        subject=comments.message.split("\n")[0] if comments.commit else None,
+        author=comments.author or version.updatedByUser or None,
+        production=version.productionStatus,
+        staging=version.stagingStatus,
+      ))
+    status.update(versions=versions)
+    return status
+
   def __rich_console__(self, *args, **kwargs):
     if self.error is not None:
       from rich.panel import Panel
@@ -188,6 +236,23 @@ class PropertyApplyResult(ResourceApplyResultABC):
   def had_errors(self) -> bool:
     return self.error != None or (self.hostnames and self.hostnames.has_errors) or (self.rule_tree and self.rule_tree.has_errors)
 
+  def to_dict(self) -> dict:
+    result = super(PropertyApplyResult, self).to_dict()
+    result.update(
+      revision=self.revision.id,
+      previous_version=self.previous_version.propertyVersion if self.previous_version else None,
+      version=self.property_version.propertyVersion if self.property_version else None,
+    )
+    if self.error is not None:
+      result.update(error=error_to_dict(self.error))
+    validation_errors = []
+    for part in (self.hostnames, self.rule_tree):
+      if part and part.has_errors:
+        validation_errors.extend(part.errors)
+    if len(validation_errors):
+      result.update(validation_errors=validation_errors)
+    return result
+
   def __rich_console__(self, *args, **kwargs):
     parts = []
     parts.append(r':arrow_up:')
@@ -235,19 +300,52 @@ class ResourceTypeOptions:
     if "switch_key" in options:
       print('[red]WARNING: "switch_key" option is deprecated; use "account_key" instead[/]')
     self.switch_key = environ.get("%sEDGERC_SWITCH_KEY" % self.env_prefix, switch_key_opt)
+    self.max_connections = options.get("max_connections", None)
+    self.rate_limit = options.get("rate_limit", None)
+    self.compress_rule_trees = options.get("compress_rule_trees", False)
 
 class ResourceType(ResourceTypeABC):
   def __init__(self, repo: Repo, config):
     super(ResourceType, self).__init__(repo, config)
     self.options = ResourceTypeOptions(config.options)
-    self.papi = PAPIClient(self.options.edgerc, self.options.section, self.options.switch_key)
+    self.papi = PAPIClient(self.options.edgerc, self.options.section, self.options.switch_key, max_connections=self.options.max_connections, rate_limit=self.options.rate_limit)
+    # property name -> PAPIProperty, filled by prefetch_resource_statuses
+    self._properties = dict()
+    self.poller = ActivationPoller("property-activations", self._check_activations, fetch=self._fetch_activation)
+    self.bulk_poller = ActivationPoller("property-bulk-activations", self._check_bulk_activation, interval=BULK_POLL_INTERVAL)
 
   def create_resource(self, path: str, **kwargs):
     return PropertyResource(path, **kwargs)
 
+  def prefetch_resource_statuses(self, resources: list):
+    """
+    Lists the properties of each contract and group referenced by the rule trees of
+    {resources} at HEAD, so that their statuses don't require a lookup per property.
+    """
+    head = self.repo.get_head()
+    if head is None:
+      return
+    contents = head.show_paths(list(resource.rules_path for resource in resources), textconv=True)
+    contract_groups = set()
+    for rules in contents.values():
+      try:
+        rules_json = json.loads(rules)
+        contract_groups.add((rules_json["contractId"], rules_json["groupId"]))
+      except (json.decoder.JSONDecodeError, TypeError, KeyError):
+        # invalid rule trees are reported by the status itself
+        continue
+    for contract_id, group_id in sorted(contract_groups):
+      try:
+        for prop in self.papi.list_properties(contract_id, group_id):
+          self._properties[prop.propertyName] = prop
+      except PAPIError as e:
+        self.logger.warning("failed to list properties contractId={} groupId={}: {}".format(contract_id, group_id, e))
+
   def get_resource_status(self, resource: PropertyResource):
     try:
-      prop = self.papi.get_property(resource.name)
+      prop = self._properties.get(resource.name)
+      if prop is None:
+        prop = self.papi.get_property(resource.name)
 
       interesting_versions = set()
       versions = []
@@ -273,7 +371,7 @@ class ResourceType(ResourceTypeABC):
         versions = [
           version 
             for version 
-            in self.papi.get_property_versions(prop.propertyId, fetch_last_count)
+            in self.papi.get_indexed_property_versions(prop, fetch_last_count)
             if (
               version.propertyVersion in interesting_versions or
               version.stagingStatus == "PENDING" or
@@ -287,7 +385,7 @@ class ResourceType(ResourceTypeABC):
 
   def is_pending(self, resource: PropertyResource, revision: Revision):
     notes = revision.get_notes(resource.path)
-    if notes.get("has_errors", False):
+    if notes.get("has_errors", False) or self.is_squashed(resource, revision):
       return False
     return not self.is_applied(resource, revision)
 
@@ -307,41 +405,60 @@ class ResourceType(ResourceTypeABC):
       raise PropertyNotFoundError(property_name, "not found")
     return property_id
 
-  def apply_change(self, resource: PropertyResource, revision: Revision, previous_revision: Revision=None) -> PropertyApplyResult:
-    # we should only call this function if the Revision concerns the resource
-    assert len(set(resource.paths).intersection(revision.affected_paths)) > 0
-
-    notes = SimpleNamespace(
-      property_id=None,
-      property_version=None,
-      etag=None,
-      has_errors=False
-    )
-
+  def prepare_change(self, resource: PropertyResource, revision: Revision):
+    """
+    Reads the rule tree and hostnames from {revision} and validates them, before
+    anything is changed in PAPI. Validation errors are returned, not raised.
+    """
+    prepared = SimpleNamespace(rules_json=None, rules_body=None, rules_hash=None, hostnames_json=None, hostnames_hash=None, comments=None, error=None)
     try:
-      # Get the rules json from the commit
-      rules = revision.show_path(resource.rules_path, textconv=True)
+      # Get the rules json from the commit, as bytes to spare copies of large rule trees
+      contents = revision.show_paths(resource.paths, textconv=True, decode=False)
+      rules = contents.get(resource.rules_path)
       if rules is None:
         raise PropertyValidationError("missing rule tree")
 
       # before changing anything in PAPI, check that the json files are valid
-      rules_json = self.validate_rules(resource, rules)
+      prepared.rules_json = self.validate_rules(resource, rules)
       # Update the rule tree with metadata from the revision commit. PAPI supports less than
       # 1000 characters here.
-      comments = GenericVersionComments.from_revision(revision, truncate_to=999)
-      rules_json.update(comments=str(comments))
+      prepared.comments = str(GenericVersionComments.from_revision(revision, truncate_to=999))
+      prepared.rules_body = with_comments(rules, prepared.rules_json, prepared.comments)
+      prepared.rules_hash = content_hash(rules)
 
-      hostnames_json = None
-      hostnames = revision.show_path(resource.hostnames_path, textconv=True)
-      hostnames_json = self.validate_hostnames(resource, hostnames)
+      hostnames = contents.get(resource.hostnames_path)
+      prepared.hostnames_json = self.validate_hostnames(resource, hostnames)
+      prepared.hostnames_hash = content_hash(hostnames)
     except EdgegridError as e:
       raise e
     except (PropertyValidationError, RuntimeError) as e:
+      prepared.error = e
+    return prepared
+
+  def apply_change(self, resource: PropertyResource, revision: Revision, previous_revision: Revision=None, prepared=None) -> PropertyApplyResult:
+    # we should only call this function if the Revision concerns the resource
+    assert len(set(resource.paths).intersection(revision.affected_paths)) > 0
+
+    notes = SimpleNamespace(
+      property_id=None,
+      property_version=None,
+      etag=None,
+      has_errors=False,
+      rules_hash=None,
+      hostnames_hash=None
+    )
+
+    if prepared is None:
+      prepared = self.prepare_change(resource, revision)
+    if prepared.error is not None:
       notes.has_errors = True
       revision.get_notes(resource.path).set(**vars(notes))
-      return PropertyApplyResult(resource, revision, error=e)
+      return PropertyApplyResult(resource, revision, error=prepared.error)
+    rules_json, hostnames_json = prepared.rules_json, prepared.hostnames_json
 
     latest_version = next_version = None
+    # the notes of the revision the new version is based on, when it is known
+    base_notes = None
 
     try:
       property_id = self.get_property_id(resource.name)
@@ -349,6 +466,8 @@ class ResourceType(ResourceTypeABC):
       # figure out the property version to base the new version on
       if previous_revision:
         latest_version = self.get_property_version_for_revision_id(property_id, previous_revision.id)
+        if latest_version:
+          base_notes = previous_revision.get_notes(resource.path)
       # if we failed to figure out the version from a previous revision, we use the latest
       if not latest_version:
         latest_version = self.papi.get_latest_property_version(property_id)
@@ -374,16 +493,42 @@ class ResourceType(ResourceTypeABC):
     notes.property_id = property_id
     notes.property_version = next_version.propertyVersion
 
+    def unchanged(hash_name):
+      """
+      Whether the new version, copied from the base version, already has the content
+      with the hash {hash_name}: it does if the base version was created without errors
+      from the previous revision, whose notes record the same hash.
+      """
+      if base_notes is None or next_version is latest_version:
+        return False
+      return (base_notes.get("has_errors") == False
+        and base_notes.get("property_version") == latest_version.propertyVersion
+        and base_notes.get(hash_name) is not None
+        and base_notes.get(hash_name) == getattr(prepared, hash_name))
+
     try:
       # first, we apply the hostnames change
-      hostnames_result = self.papi.update_property_hostnames(property_id, next_version.propertyVersion, hostnames_json)
-      notes.etag = hostnames_result.etag
-      notes.has_errors = notes.has_errors or hostnames_result.has_errors
+      hostnames_result = None
+      if not unchanged("hostnames_hash"):
+        hostnames_result = self.papi.update_property_hostnames(property_id, next_version.propertyVersion, hostnames_json)
+        notes.etag = hostnames_result.etag
+        notes.has_errors = notes.has_errors or hostnames_result.has_errors
       # then, regardless of whether there was a change to the rule tree, we need to update it with
       # the commit message and id, otherwise we will get a dirty status
-      rule_tree_result = self.papi.update_property_rule_tree(property_id, next_version.propertyVersion, rules_json)
+      if unchanged("rules_hash"):
+        rule_tree_result = self.papi.update_property_rule_tree_comments(property_id, next_version.propertyVersion, prepared.comments, rules_json.get("ruleFormat"))
+      else:
+        rule_tree_result = self.papi.put_property_rule_tree(
+          property_id,
+          next_version.propertyVersion,
+          prepared.rules_body,
+          rules_json.get("ruleFormat"),
+          compress=self.options.compress_rule_trees
+        )
       notes.etag = rule_tree_result.etag
       notes.has_errors = notes.has_errors or rule_tree_result.has_errors
+      notes.rules_hash = prepared.rules_hash
+      notes.hostnames_hash = prepared.hostnames_hash
 
       # Finally, assign the updated values to the git notes
       revision.get_notes(resource.path).set(**vars(notes))
@@ -401,40 +546,55 @@ class ResourceType(ResourceTypeABC):
       return PropertyApplyResult(resource, revision, error=e)
 
 
-  def get_property_version_for_revision_id(self, property_id, revision_id):
-    cache = _cache.key("property_version", property_id, revision_id)
-    property_version = cache.get_json()
-    if property_version is None:
-      search = r'commit: {}'.format(revision_id)
-      predicate = lambda v: search in v.note
-      property_version = self.papi.find_latest_property_version(property_id, predicate)
-      if property_version != None:
-        cache.update_json(property_version.__dict__)
-    else:
-      property_version = PAPIPropertyVersion(**property_version)
-    return property_version
+  def get_property_version_for_revision_id(self, property_id, revision_id, depth=None):
+    """
+    Returns the latest version of the property created from {revision_id}, searching
+    at most {depth} versions (all by default).
+    """
+    search = r'commit: {}'.format(revision_id)
+    predicate = lambda v: search in v.note
+    return next(self.papi.iter_indexed_property_versions(property_id, predicate, depth), None)
 
-  def get_last_applied_revision_id(self, property_id):
+  def get_last_applied_revision_id(self, property_id, depth=None):
     """
     Return the last revision id applied to the resource.
     This works by searching for a pattern in the property version notes.
     """
-    property_version = self.papi.find_latest_property_version(
+    property_version = next(self.papi.iter_indexed_property_versions(
       property_id,
-      lambda v: RE_COMMIT.search(v.get("note", ""))
-    )
+      lambda v: RE_COMMIT.search(v.note),
+      depth
+    ), None)
     if property_version:
-      return RE_COMMIT.search(property_version.get("note")).group(1)
+      return RE_COMMIT.search(property_version.note).group(1)
     return None
 
+  def is_validated(self, resource: PropertyResource) -> bool:
+    try:
+      with open(resource.hostnames_path, "r") as hfd:
+        if validation_cache("hostnames", hfd.read()).get() is None:
+          return False
+      with open(resource.rules_path, "r") as hfd:
+        return validation_cache("rules", hfd.read()).get() is not None
+    except (NotADirectoryError, FileNotFoundError):
+      return False
+
   def validate_working_tree(self, resource: PropertyResource):
     try:
       with open(resource.hostnames_path, "r") as hfd:
         hostnames = hfd.read()
-        self.validate_hostnames(resource, hostnames)
+        passed = validation_cache("hostnames", hostnames)
+        if passed.get() is None:
+          self.validate_hostnames(resource, hostnames)
+          passed.update("1")
       with open(resource.rules_path, "r") as hfd:
         rules = hfd.read()
-        self.validate_rules(resource, rules)
+        passed = validation_cache("rules", rules)
+        if passed.get() is None:
+          rules_json = self.validate_rules(resource, rules)
+          # the schema of the latest rule format changes over time, the others are frozen
+          if rules_json.get("ruleFormat") != "latest":
+            passed.update("1")
     except (NotADirectoryError, FileNotFoundError) as e:
       raise PropertyValidationError("file not found {}".format(e.filename))
 
@@ -449,8 +609,8 @@ class ResourceType(ResourceTypeABC):
       if len(missing):
         raise PropertyValidationError("{}: {} field is required".format(resource.rules_path, ", ".join(missing)))
 
-      schema = self.papi.get_rule_format_schema(rules_json.get("productId"), rules_json.get("ruleFormat"))
-      jsonschema.validate(rules_json, schema)
+      validator = self.papi.get_rule_format_validator(rules_json.get("productId"), rules_json.get("ruleFormat"))
+      SchemaValidators.validate(validator, rules_json)
       return rules_json
     except json.decoder.JSONDecodeError as err:
       raise PropertyValidationError("bad rules.json", err.args)
@@ -463,8 +623,8 @@ class ResourceType(ResourceTypeABC):
   def validate_hostnames(self, resource: PropertyResource, hostnames: str):
     try:
       hostnames_json = json.loads(hostnames)
-      schema = self.papi.get_request_schema("SetPropertyVersionsHostnamesRequestV0.json")
-      jsonschema.validate(hostnames_json, schema)
+      validator = self.papi.get_request_validator("SetPropertyVersionsHostnamesRequestV0.json")
+      SchemaValidators.validate(validator, hostnames_json)
       return hostnames_json
     except json.decoder.JSONDecodeError as err:
       raise PropertyValidationError("bad hostnames.json", err.args)
@@ -474,7 +634,11 @@ class ResourceType(ResourceTypeABC):
         "path": '/' + '/'.join(str(i) for i in err.absolute_path)
       })
 
-  def _release(self, network: str, resource: ResourceABC, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None):
+  def _prepare_release(self, network: str, resource: ResourceABC, revision: Revision, message: str, on_update: callable):
+    """
+    Checks that {revision} was applied to {resource} and returns what its activation
+    on {network} requires, or None once {on_update} was told why it can't be activated.
+    """
     notes = revision.get_notes(resource.path)
     property_id = notes.get("property_id")
     if not property_id:
@@ -482,29 +646,55 @@ class ResourceType(ResourceTypeABC):
     property_version = notes.get("property_version")
     if not property_id:
       on_update(resource, "[magenta]Property does not exist[/]", None)
-      return
+      return None
     if not property_version:
       on_update(resource, "[magenta]Revision not deployed[/]", 1)
-      return
+      return None
     if notes.get("has_errors") == True:
       on_update(resource, ":boom: [grey53]v{:<3}[/] Property version has validation errors".format(property_version), 1)
-      return
+      return None
     emails = set([revision.author_email, revision.committer_email, self.repo.get_current_user_email()])
     network_color = "green" if network == "production" else "magenta"
     network_alias = re.sub("[aeiou]", "", network, flags=re.IGNORECASE)[:3].upper()
     describe = lambda activation_status: "[{}]{}[/] [grey53]v{:<3}[/] [bright_white]{}[/]".format(network_color, network_alias, property_version, activation_status)
+    from bossman import __version__ as bossman_version
+    tags = self.repo.get_tags_pointing_at(revision.id)
+    activation_notes_revision = "{} ({})".format(revision.id, ", ".join(tags)) if len(tags) else revision.id
+    activation_notes = "activation of {} by {} using bossman {}".format(activation_notes_revision, self.repo.get_current_user_email(), bossman_version)
+    if message:
+      activation_notes = "{}; {}".format(message.strip(), activation_notes)
+    return SimpleNamespace(
+      property_id=property_id,
+      property_version=property_version,
+      emails=list(emails),
+      note=activation_notes,
+      describe=describe,
+    )
+
+  def _track_activation(self, resource: ResourceABC, release, activation_status: PAPIActivationStatus, retry_after, on_update: callable):
+    on_update(resource, release.describe(activation_status.status), activation_status.progress)
+    if activation_status.done:
+      return None
+    return self.poller.track(
+      release.property_id,
+      activation_status.activation_id,
+      lambda status: on_update(resource, release.describe(status.status), status.progress),
+      lambda status: status.done,
+      retry_after
+    )
+
+  def _release(self, network: str, resource: ResourceABC, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None):
+    release = self._prepare_release(network, resource, revision, message, on_update)
+    if release is None:
+      return None
+    describe = release.describe
     try:
       on_update(resource, describe("STARTING"), None)
+      retry_after = None
       try:
-        from bossman import __version__ as bossman_version
-        tags = self.repo.get_tags_pointing_at(revision.id)
-        activation_notes_revision = "{} ({})".format(revision.id, ", ".join(tags)) if len(tags) else revision.id
-        activation_notes = "activation of {} by {} using bossman {}".format(activation_notes_revision, self.repo.get_current_user_email(), bossman_version)
-        if message:
-          activation_notes = "{}; {}".format(message.strip(), activation_notes)
-        (_, activation_status) = self.papi.activate(property_id, property_version, network, list(emails), activation_notes)
+        (retry_after, activation_status) = self.papi.activate(release.property_id, release.property_version, network, release.emails, release.note)
       except PAPIVersionAlreadyActivatingError:
-        activations = self.papi.list_activations(property_id)
+        activations = self.papi.list_activations(release.property_id)
         activation_status = next((activation_status
           for activation_status
           in activations
@@ -512,53 +702,123 @@ class ResourceType(ResourceTypeABC):
           and not activation_status.done), 
           None
         )
-        if activation_status.property_version != property_version:
+        if activation_status.property_version != release.property_version:
           on_update(resource, describe("ACTIVATION of {} ALREADY IN PROGRESS".format(activation_status.property_version)), 1)
           return
 
-      on_update(resource, describe(activation_status.status), activation_status.progress)
-      while not activation_status.done:
-        time.sleep(random.randint(-10, 10) + 20)
-        (_, activation_status) = self.papi.get_activation_status(activation_status.property_id, activation_status.activation_id)
-        on_update(resource, describe(activation_status.status), activation_status.progress)
+      return self._track_activation(resource, release, activation_status, retry_after, on_update)
     except PAPIVersionAlreadyActiveError:
       on_update(resource, describe("ALREADY ACTIVE"), 1)
 
+  def _check_activations(self, property_id, activation_ids: list):
+    """
+    Polls the status of {activation_ids} with a single listing of the activations
+    of {property_id}.
+    """
+    (retry_after, activations) = self.papi.get_activations(property_id)
+    statuses = dict((activation_status.activation_id, activation_status)
+      for activation_status
+      in activations
+      if activation_status.activation_id in activation_ids)
+    if retry_after is None and any(status.fma_state is not None and not status.done for status in statuses.values()):
+      retry_after = FMA_POLL_INTERVAL
+    return (retry_after, statuses)
+
+  def _fetch_activation(self, property_id, activation_id):
+    (_, activation_status) = self.papi.get_activation_status(property_id, activation_id)
+    return activation_status
+
   def prerelease(self, resource: ResourceABC, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None):
     return self._release("STAGING", resource, revision, message, on_update)
 
   def release(self, resource: ResourceABC, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None):
     return self._release("PRODUCTION", resource, revision, message, on_update)
 
-
-  # def _release(self, resources: list, revision: Revision, network: str):
-  #   bulk_activation = PAPIBulkActivation()
-  #   resources = sorted(resources)
-  #   for resource in resources:
-  #     notes = revision.get_notes(resource.path)
-  #     property_id = notes.get("property_id")
-  #     property_version = notes.get("property_version")
-  #     if property_version:
-  #       print("{}: {}".format(resource.path, "preparing to activate {}@{} (v{}) on {}`)".format(resource.path, revision.id, property_version, network)))
-  #       emails = [revision.author_email]
-  #       if revision.committer_email and revision.committer_email != revision.author_email:
-  #         emails.append(revision.committer_email)
-  #       bulk_activation.add(property_id, property_version, network, emails)
-  #     else:
-  #       print("{}: {}".format(resource.path, "skipping {}@{} (use `bossman apply --rev {} {}`)".format(resource.path, revision.id, revision.id, resource.path)))
-  #   if bulk_activation.length > 0:
-  #     result = self.papi.bulk_activate(bulk_activation)
-  #     for resource in resources:
-  #       status = result.get(resource.name)
-  #       if status is not None:
-  #         msg = "activation of v{propertyVersion} on {network} started".format(**status)
-  #         if status.get("taskStatus") == "SUBMISSION_ERROR":
-  #           fatalError = json.loads(status.get("fatalError"))
-  #           msg = "activation of v{propertyVersion} on {network} failed: {error}".format(error=fatalError.get("title", status.get("taskStatus")), **status)
-  #         print("{}: {}".format(resource.path, msg))
-
-  # def prerelease(self, resources: list, revision: Revision):
-  #   self._release(resources, revision, "STAGING")
-
-  # def release(self, resources: list, revision: Revision):
-  #   self._release(resources, revision, "PRODUCTION")
+  def _release_many(self, network: str, resources: list, revision: Revision, message: str, on_update: callable):
+    """
+    Submits the activations of {resources} with bulk activation requests of up to
+    BULK_ACTIVATION_MAX_SIZE properties. The bulk activations are polled in the
+    background, then each activation they created is tracked like an individual one.
+    """
+    futures = []
+    batch = []
+    for resource in resources:
+      future = Future()
+      futures.append(future)
+      try:
+        release = self._prepare_release(network, resource, revision, message, on_update)
+      except Exception as e:
+        future.set_exception(e)
+        continue
+      if release is None:
+        future.set_result(None)
+        continue
+      batch.append((resource, release, future))
+      if len(batch) == BULK_ACTIVATION_MAX_SIZE:
+        self._submit_bulk_activation(network, batch, on_update)
+        batch = []
+    if len(batch):
+      self._submit_bulk_activation(network, batch, on_update)
+    return futures
+
+  def _submit_bulk_activation(self, network: str, batch: list, on_update: callable):
+    bulk_activation = PAPIBulkActivation()
+    for resource, release, _ in batch:
+      on_update(resource, release.describe("STARTING"), None)
+      bulk_activation.add(release.property_id, release.property_version, network, release.emails, release.note)
+    try:
+      bulk_activation_link = self.papi.bulk_activate(bulk_activation)
+    except Exception as e:
+      for resource, release, future in batch:
+        future.set_exception(e)
+      return
+    def on_status(bulk_activation_status):
+      for resource, release, _ in batch:
+        on_update(resource, release.describe("BULK {}".format(bulk_activation_status.status)), None)
+    tracked = self.bulk_poller.track(bulk_activation_link, bulk_activation_link, on_status, lambda status: status.done)
+    tracked.add_done_callback(partial(self._on_bulk_activation_done, batch, on_update))
+
+  def _on_bulk_activation_done(self, batch: list, on_update: callable, tracked: Future):
+    if tracked.exception() is not None:
+      for resource, release, future in batch:
+        future.set_exception(tracked.exception())
+      return
+    items = dict((str(item.property_id), item) for item in tracked.result().items)
+    for resource, release, future in batch:
+      try:
+        item = items.get(str(release.property_id))
+        if item is not None and item.already_active:
+          # same outcome as PAPIVersionAlreadyActiveError in _release
+          on_update(resource, release.describe("ALREADY ACTIVE"), 1)
+          future.set_result(None)
+          continue
+        if item is None or item.error is not None:
+          error = item.error if item is not None else "missing from the bulk activation"
+          on_update(resource, ":boom: [grey53]v{:<3}[/] {}".format(release.property_version, error), 1)
+          future.set_result(None)
+          continue
+        activation_status = PAPIActivationStatus(
+          activationId=item.activation_id,
+          activationType="ACTIVATE",
+          propertyId=item.property_id,
+          propertyVersion=item.property_version,
+          network=item.network,
+          status=item.activation_status,
+        )
+        activation = self._track_activation(resource, release, activation_status, None, on_update)
+        if activation is None:
+          future.set_result(activation_status)
+        else:
+          chain(activation, future)
+      except Exception as e:
+        future.set_exception(e)
+
+  def _check_bulk_activation(self, bulk_activation_link, _):
+    (retry_after, bulk_activation_status) = self.papi.get_bulk_activation_status(bulk_activation_link)
+    return (retry_after, {bulk_activation_link: bulk_activation_status})
+
+  def prerelease_many(self, resources: list, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None):
+    return self._release_many("STAGING", resources, revision, message, on_update)
+
+  def release_many(self, resources: list, revision: Revision, message: str, on_update: callable = lambda resource, status, progress: None):
+    return self._release_many("PRODUCTION", resources, revision, message, on_update)
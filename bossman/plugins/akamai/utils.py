@@ -3,9 +3,75 @@ from collections import OrderedDict
 from io import StringIO
 from copy import deepcopy
 import re
+import hashlib
+import threading
+import jsonschema, jsonschema.validators
+from bossman.cache import cache
 from bossman.repo import Revision
 from bossman.errors import BossmanError
 
+_cache = cache.key(__name__)
+
+def validation_cache(kind: str, content: str):
+  """
+  Returns the cache entry recording that {content} passed validation as {kind}.
+  Entries are specific to the version of bossman, whose validation rules may change.
+  """
+  from bossman import __version__ as bossman_version
+  digest = hashlib.sha256(content.encode()).hexdigest()
+  return _cache.key("validated", bossman_version, kind, digest)
+
+
+class SchemaValidators:
+  """
+  Registry of JSON schema validators, kept for the life of the process.
+
+  Schemas are only loaded and checked against their meta-schema once. Validators
+  resolve references statefully and cannot be shared between threads, so each
+  thread gets its own.
+  """
+  def __init__(self):
+    self._schemas = dict()
+    self._locks = dict()
+    self._lock = threading.Lock()
+    self._local = threading.local()
+
+  def _load(self, key, load: callable):
+    with self._lock:
+      # loading a schema is slow, only threads waiting for the same one should wait
+      key_lock = self._locks.setdefault(key, threading.Lock())
+    with key_lock:
+      if key not in self._schemas:
+        schema, store = load()
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        self._schemas[key] = (cls, schema, store)
+    return self._schemas[key]
+
+  def get(self, key, load: callable):
+    """
+    Returns the validator for {key}. The first time, {load} is called to obtain
+    the schema, along with a {uri: schema} dict of the schemas it references.
+    """
+    validators = self._local.__dict__.setdefault("validators", dict())
+    validator = validators.get(key)
+    if validator is None:
+      cls, schema, store = self._schemas.get(key) or self._load(key, load)
+      validator = cls(schema)
+      if store:
+        validator.resolver.store.update(store)
+      validators[key] = validator
+    return validator
+
+  @staticmethod
+  def validate(validator, instance):
+    """
+    Validates {instance}, raising the same error as `jsonschema.validate` would.
+    """
+    error = jsonschema.exceptions.best_match(validator.iter_errors(instance))
+    if error is not None:
+      raise error
+
 
 class GenericVersionComments:
   @staticmethod
@@ -17,7 +83,7 @@ class GenericVersionComments:
     comments.write("branch: {}\n".format(", ".join(revision.branches)))
     comments.write("author: {} <{}>\n".format(revision.author_name, revision.author_email))
     if revision.author_email != revision.committer_email:
-      comments.write("committer: {} <{}>\n".format(revision.commit.committer.name, revision.commit.committer.email))
+      comments.write("committer: {} <{}>\n".format(revision.committer_name, revision.committer_email))
     return GenericVersionComments(comments.getvalue(), truncate_to)
 
   def __init__(self, comments: str, truncate_to: int = None):
@@ -1,19 +1,30 @@
 from abc import ABC, abstractmethod, abstractproperty
 import sys
+import time
 import git, gitdb
 from os.path import basename
+from bossman.cache import cache
 from bossman.errors import BossmanError
 from bossman.logging import get_class_logger
 from datetime import datetime
+from functools import cached_property
 import gitdb.exc
+from gitdb.base import IStream
+from git.objects.fun import tree_to_stream
+from io import BytesIO
 import yaml
 import threading
+import atexit
 
 from bossman.rich import bracketize
 
 def true(*args, **kwargs):
   return True
 
+NOTE_FILE_MODE = 0o100644
+NOTES_SYNC_ATTEMPTS = 3
+NOTES_SYNC_BACKOFF = 2 # seconds, doubled after each failed attempt
+
 def short_rev(rev):
   return rev[:8] if rev else rev
 
@@ -110,164 +121,357 @@ class DeleteChange(Change):
   def contents(self):
     return self.diff.a_blob.data_stream.read()
 
+class NotesStore:
+  """
+  In-memory index of the notes stored under refs/notes/{ns}.
+
+  The notes tree is read once through the object database, and notes
+  are only parsed when they are first requested. Writes are buffered
+  and flushed as a single notes commit.
+  """
+  def __init__(self, repo, ns: str):
+    self.repo = repo
+    self.ns = ns
+    self.ref = "refs/notes/" + ns
+    self.lock = threading.RLock()
+    self._notes_hexsha = None
+    self._blobs = None
+    self._parsed = dict()
+    self._dirty = dict()
+
+  def _load(self):
+    if self._blobs is not None:
+      return
+    blobs = dict()
+    ref = git.Reference(self.repo._repo, self.ref, check_path=False)
+    if ref.is_valid():
+      notes_commit = ref.commit
+      self._notes_hexsha = notes_commit.hexsha
+      for entry in notes_commit.tree.traverse():
+        if entry.type == "blob":
+          # notes trees may be fanned out (ab/cdef...), the annotated
+          # object id is the path without the separators
+          blobs[entry.path.replace("/", "")] = entry.binsha
+    self._blobs = blobs
+
+  def read(self, hexsha: str) -> dict:
+    with self.lock:
+      self._load()
+      if hexsha in self._dirty:
+        return dict(self._dirty[hexsha])
+      if hexsha not in self._parsed:
+        notes = {}
+        binsha = self._blobs.get(hexsha, None)
+        if binsha is not None:
+          data = self.repo._repo.odb.stream(binsha).read()
+          notes = yaml.safe_load(data) or {}
+        self._parsed[hexsha] = notes
+      return dict(self._parsed[hexsha])
+
+  def write(self, hexsha: str, notes: dict):
+    with self.lock:
+      self._load()
+      self._dirty[hexsha] = dict(notes)
+
+  @property
+  def dirty(self) -> bool:
+    return len(self._dirty) > 0
+
+  def flush(self):
+    """
+    Writes the buffered notes as a single commit on top of refs/notes/{ns}.
+    """
+    with self.lock:
+      if not self.dirty:
+        return
+      _repo = self.repo._repo
+      blobs = dict(self._blobs)
+      for hexsha, notes in self._dirty.items():
+        data = yaml.safe_dump(notes).encode()
+        blobs[hexsha] = _repo.odb.store(IStream(git.Blob.type, len(data), BytesIO(data))).binsha
+      # A flat tree is valid regardless of the fanout used by the previous
+      # notes commit, git figures out the layout when reading it. Tree entries
+      # must be sorted by name, or fsck (and receive.fsckObjects) rejects them.
+      tree_data = BytesIO()
+      tree_to_stream(sorted((
+        (binsha, NOTE_FILE_MODE, hexsha)
+        for (hexsha, binsha)
+        in blobs.items()
+      ), key=lambda entry: entry[2]), tree_data.write)
+      tree_data = tree_data.getvalue()
+      tree_binsha = _repo.odb.store(IStream(git.Tree.type, len(tree_data), BytesIO(tree_data))).binsha
+      parents = [self.repo._commit(self._notes_hexsha)] if self._notes_hexsha else []
+      commit = git.Commit.create_from_tree(
+        _repo,
+        git.Tree(_repo, tree_binsha),
+        "Notes added by bossman",
+        parent_commits=parents,
+      )
+      try:
+        # update-ref with the expected old value so concurrent writers are detected
+        _repo.git.update_ref(self.ref, commit.hexsha, self._notes_hexsha or "")
+      except git.GitCommandError as err:
+        raise RepoError("failed to update {}: {}".format(self.ref, err.stderr))
+      self._notes_hexsha = commit.hexsha
+      self._blobs = blobs
+      self._parsed.update(self._dirty)
+      self._dirty = dict()
+
 class Notes:
-  def __init__(self, repo, commit: git.Commit, ns: str = None):
+  def __init__(self, repo, hexsha: str, ns: str = None):
     self.repo = repo
-    self.commit = commit
-    self.ns = ns.strip("/")
+    self.hexsha = hexsha
+    self.ns = ns.strip("/") if ns is not None else "commits"
+
+  @property
+  def store(self) -> NotesStore:
+    return self.repo.get_notes_store(self.ns)
 
   def set(self, **kwargs):
-    notes = self.read()
-    notes.update(kwargs)
-    self.write(notes)
+    store = self.store
+    with store.lock:
+      notes = store.read(self.hexsha)
+      notes.update(kwargs)
+      store.write(self.hexsha, notes)
 
   def get(self, k: str, default=None):
     notes = self.read()
     return notes.get(k, default)
 
   def read(self) -> dict:
-    with self.repo._lock:
-      try:
-        args = []
-        if self.ns is not None:
-          args.extend(("--ref", self.ns))
-        args.extend(("show", self.commit.hexsha))
-        notes = self.commit.repo.git.notes(*args)
-        return yaml.safe_load(notes if notes else '{}')
-      except git.GitCommandError:
-        return {}
+    return self.store.read(self.hexsha)
 
   def write(self, notes):
-    try:
-      with self.repo._lock:
-        args = []
-        if self.ns is not None:
-          args.extend(("--ref", self.ns))
-        args.extend(("add", "-f", "-m", yaml.safe_dump(notes), self.commit.hexsha))
-        self.commit.repo.git.notes(*args)
-    except git.GitCommandError as err:
-      raise BossmanError(err)
+    self.store.write(self.hexsha, notes)
 
 
 
 class Revision:
-  def __init__(self, repo, commit: git.Commit, diffs: git.Diff):
+  """
+  A commit, as seen by bossman.
+
+  The commit metadata is read once when the revision is created, so that it can be
+  shared between threads without locking. Git objects are always accessed through
+  the git handle of the calling thread (see {Repo._repo}).
+  """
+  def __init__(self, repo, commit: git.Commit, diffs: git.Diff = None, paths: list = None, affected_paths: list = None):
+    """
+    If {diffs} is None, the diff against the first parent (restricted to {paths})
+    is only computed when the changes are required. {affected_paths} can be provided
+    when they are already known, which avoids the diff altogether.
+    """
     self.repo = repo
-    self.commit = commit
-    self.changes = dict(
-      (diff.b_path or diff.a_path, Change.from_diff(diff))
-      for diff
-      in diffs
-    )
+    self.hexsha = commit.hexsha
+    self.parent_hexshas = tuple(parent.hexsha for parent in commit.parents)
+    self.date = commit.committed_datetime
+    self.message = commit.message
+    self.author_name = commit.author.name
+    self.author_email = commit.author.email
+    self.committer_name = commit.committer.name
+    self.committer_email = commit.committer.email
+    self._diffs = diffs
+    self._paths = paths
+    self._changes = None
+    self._affected_paths = affected_paths
 
   @property
-  def id(self):
-    with self.repo._lock:
-      return short_rev(self.commit.hexsha)
+  def commit(self) -> git.Commit:
+    return self.repo._commit(self.hexsha)
 
   @property
-  def parent_id(self):
-    try:
-      with self.repo._lock:
-        return short_rev(self.commit.parents[0].hexsha)
-    except IndexError:
-      return None
+  def changes(self) -> dict:
+    if self._changes is None:
+      diffs = self._diffs
+      if diffs is None:
+        commit = self.commit
+        prev = commit.parents[0] if commit.parents else git.NULL_TREE
+        diffs = commit.diff(prev, paths=self._paths, R=True) # R=True -> reverse
+      self._changes = dict(
+        (diff.b_path or diff.a_path, Change.from_diff(diff))
+        for diff
+        in diffs
+      )
+    return self._changes
 
   @property
-  def branches(self):
-    with self.repo._lock:
-      return self.repo.get_branches_containing(self.id)
+  def id(self):
+    return short_rev(self.hexsha)
 
   @property
-  def date(self) -> datetime:
-    with self.repo._lock:
-      return self.commit.committed_datetime
+  def parent_id(self):
+    if len(self.parent_hexshas):
+      return short_rev(self.parent_hexshas[0])
+    return None
 
   @property
-  def message(self) -> str:
-    with self.repo._lock:
-      return self.commit.message
+  def branches(self):
+    return self.repo.get_branches_containing(self.id)
 
   @property
   def short_message(self) -> str:
-    with self.repo._lock:
-      return self.message.split("\n").pop(0)
-
-  @property
-  def author_name(self) -> str:
-    with self.repo._lock:
-      return self.commit.author.name
-
-  @property
-  def author_email(self) -> str:
-    with self.repo._lock:
-      return self.commit.author.email
-
-  @property
-  def committer_name(self) -> str:
-    with self.repo._lock:
-      return self.commit.committer.name
-
-  @property
-  def committer_email(self) -> str:
-    with self.repo._lock:
-      return self.commit.committer.email
+    return self.message.split("\n").pop(0)
 
   @property
   def affected_paths(self) -> list:
-    with self.repo._lock:
-      return self.changes.keys()
+    if self._affected_paths is not None:
+      return self._affected_paths
+    return self.changes.keys()
 
   def show_path(self, path, textconv=False) -> dict:
-    with self.repo._lock:
-      contents = self.show_paths([path], textconv)
-      return contents.get(path, None)
-
-  def show_paths(self, paths: list, textconv=False) -> dict:
-    with self.repo._lock:
-      contents = dict()
-      def get_blob_contents(blob):
-        if blob.path in paths:
-          if textconv:
-            contents[blob.path] = self.repo._repo.git.show(
-              '--textconv',
-              '%s:%s' % (
-                self.commit.hexsha,
-                blob.path,
-              ),
-            )
-          else:
-            contents[blob.path] = blob.data_stream.read()
-      visitor = TreeVisitor(get_blob_contents)
-      visitor(self.commit.tree)
-      return contents
+    contents = self.show_paths([path], textconv)
+    return contents.get(path, None)
+
+  def show_paths(self, paths: list, textconv=False, decode=None) -> dict:
+    """
+    Returns the contents of the blobs at {paths}, omitting missing paths. The contents
+    are bytes, unless {textconv} is True, in which case they are text, converted by
+    the textconv driver configured for the path if there is one.
+    With {decode} False, converted contents are returned as bytes, sparing a copy of
+    large files.
+    """
+    if decode is None:
+      decode = textconv
+    tree = self.commit.tree
+    blobs = dict()
+    for path in paths:
+      try:
+        obj = tree / path
+      except KeyError:
+        continue
+      if obj.type == "blob":
+        blobs[path] = obj
+    textconv_paths = self.repo.get_textconv_paths(list(blobs.keys())) if textconv else set()
+    contents = dict()
+    for path, blob in blobs.items():
+      if path in textconv_paths:
+        contents[path] = self.repo._repo.git.show('--textconv', '%s:%s' % (self.hexsha, path), stdout_as_string=decode)
+      elif decode:
+        contents[path] = blob.data_stream.read().decode()
+      else:
+        contents[path] = blob.data_stream.read()
+    return contents
 
   def get_changes(self, paths: str) -> Change:
-    with self.repo._lock:
-      return list(change for (path, change) in self.changes.items() if path in paths)
+    return list(change for (path, change) in self.changes.items() if path in paths)
 
   def get_change(self, path: str) -> Change:
-    with self.repo._lock:
-      return self.changes.get(path, None)
+    return self.changes.get(path, None)
 
   def get_notes(self, ns: str = None) -> Notes:
-    with self.repo._lock:
-      return Notes(self.repo, self.commit, ns)
+    return Notes(self.repo, self.hexsha, ns)
 
   def __str__(self):
-    with self.repo._lock:
-      s = "{} {} {} | {}".format(bracketize(self.id), self.short_message, self.author_name, self.date)
-      if len(self.changes):
-        s += "\n\n  "
-        s += "\n  ".join(str(change) for change in self.changes.values())
-        s += "\n"
-      return s
+    s = "{} {} {} | {}".format(bracketize(self.id), self.short_message, self.author_name, self.date)
+    if len(self.changes):
+      s += "\n\n  "
+      s += "\n  ".join(str(change) for change in self.changes.values())
+      s += "\n"
+    return s
+
+  def to_dict(self) -> dict:
+    return dict(
+      id=self.id,
+      subject=self.short_message,
+      author=self.author_name,
+      author_email=self.author_email,
+      date=self.date.isoformat(),
+    )
 
   def __rich_console__(self, console, options):
-    with self.repo._lock:
-      yield "[bold]{}[/bold] {} | {} {}".format(bracketize(self.id), self.short_message, self.author_name, self.date)
-      # for change in self.changes.values():
-      #   yield change
+    yield "[bold]{}[/bold] {} | {} {}".format(bracketize(self.id), self.short_message, self.author_name, self.date)
+    # for change in self.changes.values():
+    #   yield change
+
+def pathspec_match(path: str, pathspec: str) -> bool:
+  """
+  Returns True if {path} is {pathspec} or is contained in it, like a literal git pathspec.
+  """
+  pathspec = pathspec.rstrip("/")
+  return path == pathspec or path.startswith(pathspec + "/")
+
+class HistoryIndex:
+  """
+  Persistent index mapping commits to the paths they touched, relative to their
+  first parent (the same diff as the one bossman uses to build revisions).
+
+  The index is stored in the bossman cache, keyed by commit sha; commit contents
+  never change for a given sha so entries never need to be invalidated. Commits
+  that were never seen are indexed in batches using a single `git log` invocation
+  per batch, so walking the history of a resource only diffs new commits once.
+  """
+  BATCH_SIZE = 500
+
+  def __init__(self, repo):
+    self.repo = repo
+    self.logger = get_class_logger(self)
+    self._cache = cache.key(__name__, "history")
+    self._touched = dict()
+    self._lock = threading.Lock()
+
+  def get_touched_paths(self, hexsha: str) -> set:
+    self.index([hexsha])
+    return self._touched[hexsha]
+
+  def iter_touching(self, hexshas: list, paths: list = None):
+    """
+    Yields the subset of {hexshas} touching {paths} (all of them if {paths} is None),
+    along with the touched paths matching {paths}, preserving the order of {hexshas}.
+    Indexing happens lazily, so stopping the iteration early avoids indexing the rest.
+    """
+    for offset in range(0, len(hexshas), self.BATCH_SIZE):
+      batch = hexshas[offset:offset+self.BATCH_SIZE]
+      self.index(batch)
+      for hexsha in batch:
+        touched = self._touched[hexsha]
+        if paths is not None:
+          touched = set(path for path in touched if any(pathspec_match(path, pathspec) for pathspec in paths))
+          if len(touched) == 0:
+            continue
+        yield hexsha, touched
+
+  def index(self, hexshas: list):
+    if all(hexsha in self._touched for hexsha in hexshas):
+      return
+    with self._lock:
+      self._index(hexshas)
+
+  def _index(self, hexshas: list):
+    missing = []
+    for hexsha in hexshas:
+      if hexsha not in self._touched:
+        touched = self._cache.key(hexsha).get_json()
+        if touched is None:
+          missing.append(hexsha)
+        else:
+          self._touched[hexsha] = set(touched)
+    if len(missing):
+      self.logger.debug("indexing {} commits".format(len(missing)))
+      for hexsha, touched in self._diff(missing).items():
+        self._touched[hexsha] = touched
+        self._cache.key(hexsha).update_json(sorted(touched))
+
+  def _diff(self, hexshas: list) -> dict:
+    # -m --first-parent: merges are diffed against their first parent only
+    # -z: raw paths, NUL separated; records are prefixed with \x01
+    output = self.repo._repo.git.log(
+      "--no-walk=unsorted", "-m", "--first-parent", "--root", "-M",
+      "--name-status", "-z", "--format=%x01%H", *hexshas
+    )
+    result = dict((hexsha, set()) for hexsha in hexshas)
+    for record in output.split("\x01")[1:]:
+      hexsha, _, changes = record.partition("\x00")
+      tokens = changes.lstrip("\n").split("\x00")
+      i = 0
+      while i < len(tokens):
+        status = tokens[i].strip()
+        if not status:
+          i += 1
+          continue
+        # renames and copies list the source and destination paths
+        count = 2 if status[0] in "RC" else 1
+        result[hexsha].update(tokens[i+1:i+1+count])
+        i += 1 + count
+    return result
 
 class RevisionDetails:
   """
@@ -282,6 +486,9 @@ class RevisionDetails:
     self.id = id
     self.details = details
 
+  def to_dict(self) -> dict:
+    return dict(id=self.id, details=self.details)
+
   def __str__(self):
     return "{} ({})".format(self.id, self.details)
 
@@ -292,68 +499,170 @@ def synchronized(method):
   return wrapper
 
 class Repo:
+  """
+  Concurrency model: read-only operations run without locking, each thread using
+  its own git handle. Only notes writes and the network operations (fetch/push)
+  are serialized.
+  """
 
   def __init__(self, root):
     self.logger = get_class_logger(self)
-    try:
-      self._repo = git.Repo(root)
-    except git.InvalidGitRepositoryError:
-      raise RepoError("Not a git repository: {}.".format(root))
+    self._root = root
+    self._local = threading.local()
+    self._repo # fail early if root is not a repository
     self._lock = threading.RLock()
+    self._notes = dict()
+    self._unpushed = set()
+    self.history = HistoryIndex(self)
+    # buffered notes must not be lost if the caller never pushes
+    atexit.register(self.flush_notes)
 
+  @property
+  def _repo(self) -> git.Repo:
+    """
+    The git handle of the calling thread. GitPython keeps persistent git processes
+    around to read objects and these cannot be shared between threads.
+    """
+    _repo = getattr(self._local, "repo", None)
+    if _repo is None:
+      try:
+        _repo = self._local.repo = git.Repo(self._root)
+      except git.InvalidGitRepositoryError:
+        raise RepoError("Not a git repository: {}.".format(self._root))
+    return _repo
+
+  @synchronized
   def config_writer(self):
     return self._repo.config_writer()
 
   def config_reader(self):
     return self._repo.config_reader()
 
+  @synchronized
+  def get_notes_store(self, ns: str) -> NotesStore:
+    store = self._notes.get(ns, None)
+    if store is None:
+      store = self._notes[ns] = NotesStore(self, ns)
+    return store
+
+  @synchronized
+  def flush_notes(self, ns: str = "*"):
+    """
+    Writes buffered notes for {ns} (all namespaces if "*").
+    """
+    for store_ns, store in self._notes.items():
+      if (ns == "*" or store_ns == ns) and store.dirty:
+        store.flush()
+        self._unpushed.add(store_ns)
+
+  @synchronized
+  def _forget_notes(self, ns: str = "*"):
+    """
+    Drops the in-memory notes index for {ns}, so that it is re-read from the
+    notes ref; this is required after the ref was updated by a fetch.
+    """
+    for store_ns in list(self._notes.keys()):
+      if ns == "*" or store_ns == ns:
+        del self._notes[store_ns]
+
   @synchronized
   def fetch_notes(self, ns: str = "*"):
-    conf = self.config_reader()
-    ref = "refs/notes/" + ns
-    for section in conf.sections():
-      if section.startswith("remote"):
-        remote = section.split(" ").pop().strip('"')
-        try:
-          self._repo.git.fetch(remote, "+{}:{}".format(ref, ref))
-        except git.GitCommandError as e:
-          if "refspec" in e.stderr.lower():
-            # if we don't have notes in this namespace we might get
-            # an invalid refspec or a "refspec xyz does not match any"
-            #print("Warning: invalid refspec error occurred when running `{}`".format(e._cmdline), file=sys.stderr)
-            pass
-          elif "couldn't find remote ref" in e.stderr.lower():
-            # if the remote doesn't know about this ref yet, this can happen; it is fine
-            pass
-          elif "authentication failures" in e.stderr:
-            raise RepoAuthError("Failed to fetch from remote {}: {}".format(remote, e.stderr))
-          else:
-            raise e
+    """
+    Fetches refs/notes/{ns} from all remotes, in a single fetch per remote.
+    """
+    # make sure what we wrote has reached the ref, then re-read it after the fetch
+    self.flush_notes(ns)
+    try:
+      ref = "refs/notes/" + ns
+      for remote in self.get_remotes():
+        self._sync_notes("fetch", remote, ["+{}:{}".format(ref, ref)])
+    finally:
+      self._forget_notes(ns)
 
   @synchronized
-  def push_notes(self, ns: str = "*"):
+  def push_notes(self, ns: str = None):
+    """
+    Pushes refs/notes/{ns} to all remotes. If {ns} is None, pushes the notes
+    refs written by this process since the last push, in a single push per remote.
+    """
+    self.flush_notes(ns or "*")
+    if ns is None:
+      namespaces = sorted(self._unpushed)
+    else:
+      namespaces = [ns]
+    if len(namespaces) == 0:
+      return
+    refspecs = list("+refs/notes/{ns}:refs/notes/{ns}".format(ns=ns) for ns in namespaces)
+    for remote in self.get_remotes():
+      self._sync_notes("push", remote, refspecs)
+    self._unpushed.difference_update(namespaces)
+
+  def get_remotes(self) -> list:
     conf = self.config_reader()
-    ref = "refs/notes/" + ns
-    for section in conf.sections():
-      if section.startswith("remote"):
-        remote = section.split(" ").pop().strip('"')
-        try:
-          self._repo.git.push(remote, "+{}:{}".format(ref, ref))
-        except git.GitCommandError as e:
-          if "refspec" in e.stderr:
-            # if we don't have notes in this namespace we might get
-            # an invalid refspec; this should be quite unlikely
-            print("Warning: invalid refspec error occurred when running `{}`".format(e._cmdline), file=sys.stderr)
-            pass
-          elif "does not match any" in e.stderr:
-            # if we did not write any notes for this ns, we will get this error
-            pass
-          elif "authentication failures" in e.stderr:
-            raise RepoAuthError("Failed to fetch from remote {}: {}".format(remote, e.stderr))
-          else:
-            raise e
+    return list(
+      section.split(" ").pop().strip('"')
+      for section in conf.sections()
+      if section.startswith("remote")
+    )
+
+  def _sync_notes(self, op: str, remote: str, refspecs: list):
+    """
+    Runs `git {op} {remote} {refspecs}` with the following failure policy:
+
+    - a missing ref on either side is not an error: there may be no notes yet
+    - authentication failures are raised immediately as {RepoAuthError}
+    - any other failure is retried up to NOTES_SYNC_ATTEMPTS times with an
+      exponential backoff, then raised as {RepoError}
+    """
+    wait = NOTES_SYNC_BACKOFF
+    for attempt in range(1, NOTES_SYNC_ATTEMPTS + 1):
+      try:
+        getattr(self._repo.git, op)(remote, *refspecs)
+        return
+      except git.GitCommandError as e:
+        stderr = e.stderr.lower()
+        if "refspec" in stderr or "does not match any" in stderr or "couldn't find remote ref" in stderr:
+          # if we don't have notes in this namespace yet (locally or on the remote)
+          return
+        if "authentication failed" in stderr or "authentication failures" in stderr or "permission denied" in stderr:
+          raise RepoAuthError("Failed to {} notes (remote {}): {}".format(op, remote, e.stderr))
+        if attempt == NOTES_SYNC_ATTEMPTS:
+          raise RepoError("Failed to {} notes (remote {}) after {} attempts: {}".format(op, remote, attempt, e.stderr))
+        self.logger.warning("{} notes (remote {}) failed, retrying in {}s: {}".format(op, remote, wait, e.stderr))
+        time.sleep(wait)
+        wait = wait * 2
+
+  @cached_property
+  def textconv_drivers(self) -> set:
+    """
+    Names of the diff drivers having a textconv command in the git config.
+    """
+    conf = self.config_reader()
+    return set(
+      section.split(" ", 1).pop().strip('"')
+      for section in conf.sections()
+      if section.startswith("diff ") and conf.has_option(section, "textconv")
+    )
+
+  def get_textconv_paths(self, paths: list) -> set:
+    """
+    Returns the subset of {paths} for which a textconv driver is configured.
+    """
+    if len(paths) == 0 or len(self.textconv_drivers) == 0:
+      return set()
+    # output is a sequence of <path> NUL <attribute> NUL <value> NUL
+    output = self._repo.git.check_attr("-z", "diff", "--", *paths).split("\x00")
+    return set(
+      path
+      for path, value
+      in zip(output[0::3], output[2::3])
+      if value in self.textconv_drivers
+    )
+
+  def _commit(self, hexsha: str) -> git.Commit:
+    # Commit objects are loaded lazily from the object database
+    return git.Commit(self._repo, bytes.fromhex(hexsha))
 
-  @synchronized
   def rev_parse(self, rev: str) -> str:
     # We can't use Repo.rev_parse since it doesn't support
     # short hexshas or indirect refs such as tag names or branches.
@@ -364,14 +673,12 @@ class Repo:
       self.logger.debug("failed to resolve revision {}".format(rev))
       raise RepoRevNotFoundError("failed to resolve revision {}, please make sure it is a valid commit/tag name".format(rev))
 
-  @synchronized
   def rev_exists(self, rev: str) -> str:
     try:
       return isinstance(self.rev_parse(rev), git.Commit)
     except BossmanError:
       return False
 
-  @synchronized
   def rev_is_reachable(self, rev: str, from_rev: str = "HEAD") -> str:
     """
     Returns True if {rev} is an ancestor of {from_rev}.
@@ -386,7 +693,6 @@ class Repo:
     except BossmanError:
       return False
 
-  @synchronized
   def get_paths(self, rev: str = "HEAD", predicate = true) -> list:
     """
     Lists the paths versioned for revision {rev}, optionally filtered
@@ -400,59 +706,83 @@ class Repo:
     visitor(tree)
     return paths
 
-  @synchronized
+  def get_tree_paths(self, rev: str = "HEAD", prefix: str = "", depth: int = 1) -> list:
+    """
+    Lists the paths of the blobs and trees exactly {depth} components deep in the
+    tree of {rev}, only visiting the subtree at {prefix}.
+    """
+    tree = self.rev_parse(rev).tree
+    if prefix:
+      try:
+        tree = tree / prefix
+      except KeyError:
+        return []
+      if tree.type != "tree":
+        return []
+    paths = []
+    def visit(tree: git.Tree, level: int):
+      for entry in tree:
+        if level == depth:
+          if entry.type in ("blob", "tree"):
+            paths.append(entry.path)
+        elif entry.type == "tree":
+          visit(entry, level + 1)
+    start = len(prefix.split("/")) + 1 if prefix else 1
+    if start <= depth:
+      visit(tree, start)
+    return paths
+
+  def get_working_tree_paths(self, prefixes: list = None) -> list:
+    """
+    Lists the paths of the files in the working tree, restricted to {prefixes} if
+    provided: tracked files that weren't deleted, and untracked files that aren't
+    ignored. The list comes from the index, so ignored directories are never walked.
+    """
+    pathspec = ["--", *prefixes] if prefixes else []
+    split = lambda output: list(path for path in output.split("\0") if path)
+    paths = split(self._repo.git.ls_files("-z", "--cached", "--others", "--exclude-standard", *pathspec))
+    deleted = set(split(self._repo.git.ls_files("-z", "--deleted", *pathspec)))
+    return list(path for path in dict.fromkeys(paths) if path not in deleted)
+
   def get_head(self):
     """
     Returns the HEAD revision, or None if this is the first commit.
     """
     try:
       commit = next(self._repo.iter_commits())
-      prev = git.NULL_TREE
-      if commit.parents:
-        prev = commit.parents[0]
-      diffs = commit.diff(prev, R=True)
-      return Revision(self, commit, diffs)
+      return Revision(self, commit)
     except StopIteration:
       return None
 
-  @synchronized
   def get_last_revision(self, paths: list, rev: str = "HEAD") -> Revision:
     """
     Returns the last revision in {rev}'s ancestry to have affected {paths}.
     """
-    try:
-      rev = self.rev_parse(rev) if rev is not None else "HEAD"
-      # see also the comment in self.get_revisions
-      commit = next(self._repo.iter_commits(rev, paths=paths, first_parent=True))
-      prev = git.NULL_TREE
-      if commit.parents:
-        prev = commit.parents[0]
-      diffs = commit.diff(prev, paths=paths, R=True)
-      return Revision(self, commit, diffs)
-    except StopIteration:
-      return None
+    rev = self.rev_parse(rev).hexsha if rev is not None else "HEAD"
+    # see also the comment in self.get_revisions
+    paths = list(str(path) for path in paths)
+    hexshas = self._repo.git.rev_list(rev, first_parent=True).split()
+    for hexsha, touched in self.history.iter_touching(hexshas, paths):
+      return Revision(self, self._commit(hexsha), paths=paths, affected_paths=touched)
+    return None
 
-  @synchronized
   def get_revision(self, rev: str, paths: list = None):
     """
     Returns the revision {rev}, with diffs for {paths}.
     """
     commit = self.rev_parse(rev)
-    prev = git.NULL_TREE
-    diffs = []
-    if commit.parents:
-      prev = commit.parents[0]
-      diffs = commit.diff(prev, paths=paths, R=True) # R=True -> reverse
-    return Revision(self, commit, diffs)
+    if paths is not None:
+      paths = list(str(path) for path in paths)
+    # the root commit is considered not to have changes
+    diffs = None if commit.parents else []
+    return Revision(self, commit, diffs, paths)
 
-  @synchronized
   def get_current_user_email(self):
     """
     Returns the result of `git config user.email`
     """
     return self._repo.git.config("user.email")
 
-  @synchronized
   def get_current_user_name(self):
     """
     Returns the result of `git config user.name`
@@ -460,11 +790,9 @@ class Repo:
     return self._repo.git.config("user.name")
 
 
-  @synchronized
   def get_current_branch(self):
     return self._repo.head.ref.name
 
-  @synchronized
   def get_branches(self, **kwargs) -> list:
     try:
       result = self._repo.git.branch(format="%(refname:short)", **kwargs)
@@ -472,11 +800,9 @@ class Repo:
     except git.GitCommandError:
       return []
 
-  @synchronized
   def get_branches_containing(self, rev: str, **kwargs) -> list:
     return self.get_branches(contains=rev, **kwargs)
 
-  @synchronized
   def get_revisions(self, since_rev: str = None, until_rev: str = "HEAD",  paths: list = None) -> list:
     """
     Returns all revisions having affected {paths} in the ancestry of {until_rev}, bounded by {since_rev} if
@@ -497,21 +823,20 @@ class Repo:
     #
     # We will traverse directly from a051acd to 4bbe5f0. For bossman, this means
     # that merge commits can effectively be used as release commits.
-    commits = self._repo.iter_commits(commitRange, paths=paths, first_parent=True)
-    revisions = []
-    for commit in commits:
-      prev = git.NULL_TREE
-      if commit.parents:
-        prev = commit.parents[0]
-      diffs = commit.diff(prev, paths=paths, R=True) # R=True -> reverse
-      # Two cases:
-      # - paths were specified: we want the list of commits affecting them (with a diff)
-      # - paths were not: we want the full log
-      if len(diffs) or paths is None:
-        revisions.append(Revision(self, commit, diffs))
-    return revisions
+    #
+    # The paths affected by each commit are looked up in the history index rather
+    # than diffed, the diffs are only computed if the revision changes are used.
+    hexshas = self._repo.git.rev_list(commitRange, first_parent=True).split()
+    if paths is None:
+      # no filtering, so no need to index anything
+      return list(Revision(self, self._commit(hexsha)) for hexsha in hexshas)
+    paths = list(str(path) for path in paths)
+    return list(
+      Revision(self, self._commit(hexsha), paths=paths, affected_paths=touched)
+      for hexsha, touched
+      in self.history.iter_touching(hexshas, paths)
+    )
 
-  @synchronized
   def get_tags_pointing_at(self, rev="HEAD") -> list:
     try:
       rev = self.rev_parse(rev)
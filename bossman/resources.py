@@ -1,10 +1,13 @@
 import importlib
 from types import SimpleNamespace
-from bossman.repo import Repo
+from bossman.cache import cache
+from bossman.config import PathPatternSet
 from bossman.repo import Repo
 from bossman.abc import ResourceTypeABC
 from bossman.abc import ResourceABC
 
+_cache = cache.key(__name__)
+
 class ResourceManager:
   def __init__(self, resource_type_configs, repo: Repo):
     self.resource_types = list()
@@ -12,11 +15,12 @@ class ResourceManager:
       plugin = importlib.import_module(config.module)
       self.resource_types.append(plugin.ResourceType(repo, config))
     self.repo = repo
+    self.patterns = PathPatternSet(resource_type.config.pattern for resource_type in self.resource_types)
 
   def get_resource_type(self, path: str) -> ResourceTypeABC:
-    for resource_type in self.resource_types:
-      if resource_type.match(path):
-        return resource_type
+    idx, _ = self.patterns.match(path)
+    if idx is not None:
+      return self.resource_types[idx]
     return None
 
   def get_resource(self, path: str) -> ResourceABC:
@@ -26,21 +30,29 @@ class ResourceManager:
     return None
 
   def get_resources(self, repo: Repo, rev: str = "HEAD") -> list:
-    paths = repo.get_paths(rev)
+    """
+    Discovers the resources in the tree of {rev}. Only the part of the tree where
+    each resource type's pattern can match is listed, and the result is cached
+    per tree, so discovery is free for a tree that was already seen.
+    """
+    commit = repo.rev_parse(rev)
+    tree_sha = commit.tree.hexsha
     resources = []
     for resource_type in self.resource_types:
-      resources.extend(resource_type.get_resources(paths))
+      pattern = resource_type.config.pattern
+      cache = _cache.key("resources", tree_sha, str(pattern))
+      paths = cache.get_json()
+      if paths is None:
+        candidates = repo.get_tree_paths(commit.hexsha, pattern.prefix, pattern.depth)
+        paths = sorted(resource.path for resource in resource_type.get_resources(candidates))
+        cache.update_json(paths)
+      resources.extend(resource_type.get_resource(path) for path in paths)
     return resources
 
   def get_resources_from_working_copy(self, repo: Repo) -> list:
-    from os import walk
-    from os.path import relpath, join
-    import pathlib
-    paths = []
-    for root, dir, files in walk(repo._repo.working_tree_dir):
-      for file in files:
-        rel = relpath(join(root, file), repo._repo.working_tree_dir)
-        paths.append(str(pathlib.PurePosixPath(pathlib.Path(rel))))
+    prefixes = list(resource_type.config.pattern.prefix for resource_type in self.resource_types)
+    # an empty prefix means that resources can be anywhere
+    paths = repo.get_working_tree_paths(prefixes if all(prefixes) else None)
     resources = []
     for resource_type in self.resource_types:
       resources.extend(resource_type.get_resources(paths))
@@ -0,0 +1,39 @@
+import threading
+import pytest
+import git
+from bossman import cache as cache_module
+
+
+@pytest.fixture(autouse=True)
+def cache_store(tmp_path, monkeypatch):
+    """
+    Points the bossman cache at a store private to the test, rather than
+    .bossmancache.sqlite in the current directory.
+    """
+    path = tmp_path / "bossmancache"
+    monkeypatch.setenv("BOSSMAN_CACHE", str(path))
+    store = cache_module.cache._cache__store
+    monkeypatch.setattr(store, "path", "{}.sqlite".format(path))
+    # connections are opened lazily, per thread, from the path
+    monkeypatch.setattr(store, "local", threading.local())
+    return store
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """
+    An empty git repository in tmp_path, with a committer identity.
+    """
+    _repo = git.Repo.init(tmp_path, initial_branch="main")
+    with _repo.config_writer() as config:
+        config.set_value("user", "name", "Bossman Test")
+        config.set_value("user", "email", "test@example.com")
+    return _repo
+
+@pytest.fixture
+def edgerc(tmp_path):
+    """
+    Path to an edgerc file with dummy credentials in a [test] section.
+    """
+    edgerc = tmp_path / "edgerc"
+    edgerc.write_text("[test]\nclient_token=a\nclient_secret=b\naccess_token=c\nhost=akab-test.luna.akamaiapis.net\n")
+    return str(edgerc)
@@ -0,0 +1,249 @@
+import io
+import json
+import threading
+import pytest
+from bossman import Bossman, __version__
+from bossman.abc import ResourceABC, ResourceTypeABC, ResourceStatusABC, ResourceApplyResultABC
+from bossman.cli import apply_cmd, log_cmd, release_cmd, validate_cmd
+from bossman.cli.jsonl import JsonlWriter
+from bossman.config import Config
+from bossman.repo import Repo
+
+
+class Resource(ResourceABC):
+    @property
+    def name(self):
+        return self.path.split("/")[-1]
+
+    @property
+    def paths(self):
+        return (self.path + "/rules.json",)
+
+class Status(ResourceStatusABC):
+    @property
+    def exists(self):
+        return True
+
+    @property
+    def dirty(self):
+        return False
+
+class ApplyResult(ResourceApplyResultABC):
+    def __init__(self, revision):
+        self.revision = revision
+
+    @property
+    def had_errors(self):
+        return False
+
+class ResourceType(ResourceTypeABC):
+    """
+    Records the calls made by bossman. Revisions can be made to fail or to
+    wait for an event, by id.
+    """
+    def __init__(self, repo, config):
+        super(ResourceType, self).__init__(repo, config)
+        self.calls = []
+        self.lock = threading.Lock()
+        self.prepared = dict()
+        self.failures = dict()
+        self.on_apply = None
+        self.validated = set()
+
+    def record(self, *call):
+        with self.lock:
+            self.calls.append(call)
+
+    def create_resource(self, path, **kwargs):
+        return Resource(path)
+
+    def get_resource_status(self, resource):
+        return Status()
+
+    def is_pending(self, resource, revision):
+        notes = revision.get_notes(resource.path)
+        return not notes.get("applied", False) and not self.is_squashed(resource, revision)
+
+    def is_applied(self, resource, revision):
+        return revision.get_notes(resource.path).get("applied", False)
+
+    def get_revision_details(self, resource, revision):
+        pass
+
+    def prepare_change(self, resource, revision):
+        self.record("prepare", revision.short_message)
+        self.prepared.setdefault(revision.id, threading.Event()).set()
+        if self.failures.get(("prepare", revision.short_message)):
+            raise self.failures[("prepare", revision.short_message)]
+        return revision.id
+
+    def apply_change(self, resource, revision, previous_revision, prepared=None):
+        self.record("apply", revision.short_message, previous_revision.short_message, prepared)
+        if self.on_apply:
+            self.on_apply(revision)
+        if self.failures.get(("apply", revision.short_message)):
+            raise self.failures[("apply", revision.short_message)]
+        revision.get_notes(resource.path).set(applied=True)
+        return ApplyResult(revision)
+
+    def validate_working_tree(self, resource):
+        self.record("validate", resource.path)
+        self.validated.add(resource.path)
+
+    def is_validated(self, resource):
+        return resource.path in self.validated
+
+    def prerelease(self, resource, revision, message, on_update):
+        pass
+
+    def release(self, resource, revision, message, on_update):
+        pass
+
+@pytest.fixture
+def bossman(tmp_path, git_repo):
+    with git_repo.config_writer() as config:
+        config.set_value("bossman", "version", __version__)
+    (tmp_path / "akamai/test/www").mkdir(parents=True)
+    for message in ("init", "one", "two", "three"):
+        (tmp_path / "akamai/test/www/rules.json").write_text(message)
+        git_repo.index.add(["akamai/test/www/rules.json"])
+        git_repo.index.commit(message)
+    return Bossman(str(tmp_path), Config({"resources": [{"module": __name__, "pattern": "akamai/test/{name}"}]}))
+
+@pytest.fixture
+def resource(bossman):
+    (resource,) = bossman.get_resources("akamai/test/www")
+    # only the first commit was applied
+    bossman.get_revisions(resources=[resource])[-1].get_notes(resource.path).set(applied=True)
+    return resource
+
+def get_resource_type(bossman, resource):
+    return bossman.resource_manager.get_resource_type(resource.path)
+
+def messages(revisions):
+    return list(revision.short_message for revision in revisions)
+
+def test_changes_are_applied_in_order(bossman, resource):
+    revisions = bossman.get_missing_revisions(resource)
+    assert(messages(revisions) == ["one", "two", "three"])
+    results = list(
+        bossman.apply_change(resource, revision, False, prepared)
+        for revision, prepared in bossman.prepare_changes(resource, revisions, False)
+    )
+    assert(messages(result.revision for result in results) == ["one", "two", "three"])
+    applied = list(call for call in get_resource_type(bossman, resource).calls if call[0] == "apply")
+    assert(applied == list(
+        ("apply", revision.short_message, previous, revision.id)
+        for revision, previous in zip(revisions, ("init", "one", "two"))
+    ))
+    assert(bossman.get_missing_revisions(resource) == [])
+
+def test_next_change_is_prepared_while_applying(bossman, resource):
+    resource_type = get_resource_type(bossman, resource)
+    revisions = bossman.get_missing_revisions(resource)
+    overlapped = []
+    def on_apply(revision):
+        idx = messages(revisions).index(revision.short_message)
+        if idx + 1 < len(revisions):
+            # blocks until the next revision is being prepared, which must happen concurrently
+            next_prepared = resource_type.prepared.setdefault(revisions[idx + 1].id, threading.Event())
+            overlapped.append(next_prepared.wait(timeout=5))
+    resource_type.on_apply = on_apply
+    for revision, prepared in bossman.prepare_changes(resource, revisions, False):
+        bossman.apply_change(resource, revision, False, prepared)
+    assert(overlapped == [True, True])
+
+@pytest.mark.parametrize("step", ["prepare", "apply"])
+def test_errors_stop_the_changes(bossman, resource, step):
+    resource_type = get_resource_type(bossman, resource)
+    resource_type.failures[(step, "two")] = RuntimeError("boom")
+    revisions = bossman.get_missing_revisions(resource)
+    applied = []
+    with pytest.raises(RuntimeError):
+        for revision, prepared in bossman.prepare_changes(resource, revisions, False):
+            bossman.apply_change(resource, revision, False, prepared)
+            applied.append(revision.short_message)
+    assert(applied == ["one"])
+    assert(("apply", "three") not in list(call[:2] for call in resource_type.calls))
+    assert(messages(bossman.get_missing_revisions(resource)) == ["two", "three"])
+
+def test_squashed_changes(bossman, resource):
+    resource_type = get_resource_type(bossman, resource)
+    revisions = bossman.get_missing_revisions(resource)
+    result = bossman.apply_squashed(resource, revisions, False)
+    assert(not result.had_errors)
+    # only the tip was applied, on top of the last applied revision
+    assert(resource_type.calls == [("apply", "three", "init", None)])
+    for revision in revisions[:-1]:
+        assert(revision.get_notes(resource.path).get("squashed_into") == revisions[-1].id)
+    assert(bossman.get_missing_revisions(resource) == [])
+
+def test_squashed_changes_are_not_marked_on_error(bossman, resource):
+    get_resource_type(bossman, resource).failures[("apply", "three")] = RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        bossman.apply_squashed(resource, bossman.get_missing_revisions(resource), False)
+    assert(messages(bossman.get_missing_revisions(resource)) == ["one", "two", "three"])
+
+def test_apply_squash_option(bossman, resource):
+    resource_type = get_resource_type(bossman, resource)
+    revisions = bossman.get_missing_revisions(resource)
+    output = io.StringIO()
+    had_errors = apply_cmd.apply_changes(bossman, resource, False, False, None, squash=True, writer=JsonlWriter(output))
+    assert(not had_errors)
+    records = list(json.loads(line) for line in output.getvalue().splitlines())
+    assert(list(record["type"] for record in records) == ["apply", "squashed"])
+    assert(records[1]["revisions"] == list(revision.id for revision in revisions[:-1]))
+    assert(records[1]["into"] == revisions[-1].id)
+    assert(list(call[:2] for call in resource_type.calls) == [("apply", "three")])
+    assert(bossman.get_missing_revisions(resource) == [])
+
+def test_log_jsonl(bossman, resource, capsys):
+    log_cmd.exec(bossman, ["akamai/test/www"], False, output="jsonl")
+    records = list(json.loads(line) for line in capsys.readouterr().out.splitlines())
+    assert(list(record["subject"] for record in records) == ["three", "two", "one", "init"])
+    assert(records[0]["resources"] == [{
+        "resource": "akamai/test/www",
+        "changes": [{"change_type": "M", "path": "akamai/test/www/rules.json"}],
+        "details": None,
+    }])
+
+def test_notes_reach_the_ref_after_each_apply(bossman, resource):
+    (revision, *_) = bossman.get_missing_revisions(resource)
+    bossman.apply_change(resource, revision, False)
+    # another process (e.g. after this one was killed) sees the note without a push
+    fresh = Repo(bossman.root)
+    assert(fresh.get_revision(revision.id).get_notes(resource.path).get("applied") == True)
+
+def test_validated_resources_are_not_dispatched(bossman, resource, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("no worker should be started")
+    monkeypatch.setattr(validate_cmd, "ProcessPoolExecutor", no_pool)
+    resource_type = get_resource_type(bossman, resource)
+    # few resources to validate are validated in-process
+    assert(list(validate_cmd.validate_all(bossman, [resource], jobs=8)) == [(resource, None)])
+    assert(resource_type.calls == [("validate", resource.path)])
+    # validated resources aren't validated again
+    assert(list(validate_cmd.validate_all(bossman, [resource], jobs=8)) == [(resource, None)])
+    assert(len(resource_type.calls) == 1)
+
+def test_apply_squash_dry_run(bossman, resource, capsys):
+    revisions = bossman.get_missing_revisions(resource)
+    output = io.StringIO()
+    apply_cmd.apply_changes(bossman, resource, False, True, None, squash=True, writer=JsonlWriter(output))
+    records = list(json.loads(line) for line in output.getvalue().splitlines())
+    assert(list((record["type"], record["dry_run"]) for record in records) == [("apply", True), ("squashed", True)])
+    apply_cmd.apply_changes(bossman, resource, False, True, None, squash=True)
+    assert("2 revisions would be squashed into {}".format(revisions[-1].id) in capsys.readouterr().out)
+    # nothing was marked
+    assert(messages(bossman.get_missing_revisions(resource)) == ["one", "two", "three"])
+
+def test_release_notes_are_pushed_on_error(bossman, resource, monkeypatch):
+    pushed = []
+    def release_many(*args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(bossman, "is_applied", lambda resource, revision: True)
+    monkeypatch.setattr(bossman, "release_many", release_many)
+    monkeypatch.setattr(bossman, "push_notes", lambda: pushed.append(True))
+    with pytest.raises(RuntimeError):
+        release_cmd.exec(bossman, True, "HEAD", ["akamai/test/www"], False, "release", None)
+    assert(pushed == [True])
@@ -0,0 +1,61 @@
+import os
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from bossman import cache as cache_module
+from bossman.cache import _cache, _store
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return _cache("", _store(str(tmp_path / "cache.sqlite")))
+
+def test_values(cache):
+    cache.key("a").update("text")
+    cache.key("b").update(b"\x00\x01")
+    cache.key("c").update_json({"x": [1, 2]})
+    assert(cache.key("a").get_str() == "text")
+    assert(cache.key("b").get() == b"\x00\x01")
+    assert(cache.key("c").get_json() == {"x": [1, 2]})
+    assert(cache.key("d").get_json("default") == "default")
+    assert(cache.key("a").delete())
+    assert(cache.key("a").get() is None)
+    assert(cache.stats() == dict(hits=3, misses=2, writes=3))
+
+def test_large_values_are_compressed(cache):
+    value = {"schema": "x" * 100000}
+    cache.key("schema").update_json(value)
+    (size,) = cache._cache__store.conn.execute("SELECT size FROM entries").fetchone()
+    assert(size < 10000)
+    assert(cache.key("schema").get_json() == value)
+
+def test_ttl(cache):
+    cache.key("short").update("x", ttl=0.05)
+    cache.key("long").update("x", ttl=60)
+    assert(cache.key("short").get_str() == "x")
+    time.sleep(0.1)
+    assert(cache.key("short").get_str() is None)
+    assert(cache.key("long").get_str() == "x")
+
+def test_lru_eviction(cache, monkeypatch):
+    store = cache._cache__store
+    store.max_size = 10000
+    monkeypatch.setattr(cache_module, "ACCESS_RESOLUTION", 0)
+    for i in range(20):
+        cache.key(str(i)).update(os.urandom(1000))
+        time.sleep(0.001)
+    cache.key("0").get()
+    store.evict()
+    remaining = set(key for (key,) in store.conn.execute("SELECT key FROM entries"))
+    # the recently read entry survives, the oldest ones are gone
+    assert(".0" in remaining)
+    assert(".1" not in remaining)
+    assert(".19" in remaining)
+
+def test_concurrent_access(cache):
+    def work(i):
+        cache.key("shared", str(i % 10)).update_json(i)
+        return cache.key("shared", str(i % 10)).get_json()
+    with ThreadPoolExecutor(16) as executor:
+        results = list(executor.map(work, range(200)))
+    assert(all(result is not None for result in results))
@@ -0,0 +1,68 @@
+import pytest
+from bossman.plugins.akamai.cloudlet_v3 import client as cloudlet_client
+from bossman.plugins.akamai.cloudlet_v3.client import CloudletAPIV3Client
+from bossman.plugins.akamai.cloudlet_v3.error import PolicyNameNotFound
+from tests.test_papi import FakeSession
+
+
+def policy(id):
+    return {
+        "id": id,
+        "name": "policy_{}".format(id),
+        "description": "",
+        "policyType": "SHARED",
+        "cloudletType": "ER",
+        "createdBy": "a",
+        "createdDate": "2021-01-01T00:00:00Z",
+        "currentActivations": {"production": {}, "staging": {}},
+        "groupId": 1,
+        "modifiedBy": "a",
+        "modifiedDate": "2021-01-01T00:00:00Z",
+    }
+
+@pytest.fixture
+def client(edgerc, monkeypatch):
+    monkeypatch.setattr(cloudlet_client, "POLICIES_PAGE_SIZE", 2)
+    client = CloudletAPIV3Client(edgerc, "test")
+    policies = [policy(id) for id in range(1, 6)]
+    def list_policies(page, size):
+        return {
+            "content": policies[page * size:(page + 1) * size],
+            "page": {"number": page, "size": size, "totalElements": len(policies), "totalPages": 3},
+        }
+    client.session = FakeSession({
+        ("GET", "/cloudlets/v3/policies"): (200, list_policies),
+        ("GET", "/cloudlets/v3/policies/5"): (200, policy(5)),
+    })
+    return client
+
+def test_policy_catalog_is_listed_once(client):
+    # the policy is on the last page
+    assert(client.get_policy_by_name("policy_5").id == 5)
+    assert(client.get_policy_by_name("policy_1").id == 1)
+    with pytest.raises(PolicyNameNotFound):
+        client.get_policy_by_name("policy_6")
+    assert(client.session.calls.count(("GET", "/cloudlets/v3/policies")) == 3)
+
+def test_policy_ids_are_cached(client):
+    client.get_policy_catalog()
+    # a later run doesn't need to list the policies to find one of them
+    client._policies = None
+    client.session.calls.clear()
+    assert(client.get_policy_id("policy_5") == 5)
+    assert(client.get_policy_by_name("policy_5").id == 5)
+    assert(client.session.calls == [("GET", "/cloudlets/v3/policies/5")])
+
+def test_match_rules_are_not_structured():
+    from bossman.plugins.akamai.cloudlet_v3.converter import converter, parse_datetime
+    from bossman.plugins.akamai.cloudlet_v3.data import SharedPolicyVersion
+    import dateutil.parser
+    data = {
+        "policyId": 1, "version": 2, "createdBy": "a", "createdDate": "2021-06-01T12:00:00.123Z",
+        "modifiedBy": "a", "modifiedDate": "2021-06-01T12:00:00Z", "description": "",
+        "matchRules": [{"name": "rule"}],
+    }
+    version = converter.structure(data, SharedPolicyVersion)
+    assert(version.matchRules is data["matchRules"])
+    assert(version.createdDate == dateutil.parser.isoparse("2021-06-01T12:00:00.123Z"))
+    assert(parse_datetime("2021-06-01T12:00:00.1234Z") == dateutil.parser.isoparse("2021-06-01T12:00:00.1234Z"))
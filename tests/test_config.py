@@ -0,0 +1,35 @@
+from bossman.config import PathPattern, PathPatternSet
+
+
+def test_path_pattern_match():
+    pattern = PathPattern("akamai/property/{name}")
+    match = pattern.match("akamai/property/www/rules.json")
+    assert(match.canonical == "akamai/property/www")
+    assert(match.values == dict(name="www"))
+    assert(pattern.match("akamai/property/") is None)
+    assert(pattern.match("other/akamai/property/www") is None)
+
+def test_path_pattern_literals_are_escaped():
+    pattern = PathPattern("akamai/edgehostname/{name}.json")
+    assert(pattern.match("akamai/edgehostname/www.example.com.json").values == dict(name="www.example.com"))
+    assert(pattern.match("akamai/edgehostname/www_json") is None)
+
+def test_path_pattern_repeated_placeholder():
+    pattern = PathPattern("{env}/property/{env}")
+    assert(pattern.match("dev/property/dev").canonical == "dev/property/dev")
+    assert(pattern.match("dev/property/prod") is None)
+
+def test_path_pattern_set():
+    patterns = PathPatternSet([
+        PathPattern("akamai/property/{name}"),
+        PathPattern("akamai/edgehostname/{name}.json"),
+        PathPattern("akamai/{kind}/{name}"),
+    ])
+    idx, match = patterns.match("akamai/edgehostname/www.json")
+    assert(idx == 1)
+    assert(match.values == dict(name="www"))
+    idx, match = patterns.match("akamai/cloudlet/er/policy.json")
+    assert(idx == 2)
+    assert(match.canonical == "akamai/cloudlet/er")
+    assert(patterns.match("docs/index.md") == (None, None))
+    assert(PathPatternSet([]).match("akamai/property/www") == (None, None))
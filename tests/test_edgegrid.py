@@ -0,0 +1,64 @@
+import time
+import requests
+from bossman.plugins.akamai.lib import edgegrid
+from bossman.plugins.akamai.lib.edgegrid import RateLimiter, Session, get_retry_after
+
+
+def response(status_code, **headers):
+    _response = requests.Response()
+    _response.status_code = status_code
+    _response.headers.update(dict((k.replace("_", "-"), v) for k, v in headers.items()))
+    return _response
+
+def test_rate_limiter_paces_requests():
+    limiter = RateLimiter("test", rate=100, burst=2)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    # the first two requests use the burst, the next four wait for 10ms each
+    assert(time.monotonic() - start >= 0.035)
+    assert(limiter.metrics.requests == 6)
+    assert(limiter.metrics.queued >= 4)
+
+def test_rate_limiter_honors_retry_after():
+    limiter = RateLimiter("test", rate=1000, burst=10)
+    limiter.update(response(429, Retry_After="1"))
+    assert(limiter.metrics.throttled == 1)
+    start = time.monotonic()
+    limiter.acquire()
+    assert(time.monotonic() - start >= 0.9)
+
+def test_rate_limiter_honors_exhausted_quota():
+    limiter = RateLimiter("test", rate=1000, burst=10)
+    limiter.update(response(200, X_RateLimit_Remaining="3"))
+    assert(limiter.tokens <= 3)
+    next_time = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 2))
+    limiter.update(response(200, X_RateLimit_Remaining="0", X_RateLimit_Next=next_time))
+    assert(limiter.not_before > time.monotonic())
+
+def test_sessions_share_an_adapter_per_host(tmp_path, monkeypatch):
+    monkeypatch.setattr(edgegrid, "_adapters", dict())
+    edgerc = tmp_path / "edgerc"
+    credentials = "client_token=a\nclient_secret=b\naccess_token=c\n"
+    edgerc.write_text(
+        "[one]\n{0}host=akab-one.luna.akamaiapis.net\n"
+        "[other]\n{0}host=akab-other.luna.akamaiapis.net\n".format(credentials)
+    )
+    first = Session(str(edgerc), "one", max_connections=4)
+    second = Session(str(edgerc), "one", max_connections=8)
+    other = Session(str(edgerc), "other")
+    adapter = first.get_adapter("https://akab-one.luna.akamaiapis.net/")
+    assert(second.get_adapter("https://akab-one.luna.akamaiapis.net/") is adapter)
+    assert(other.get_adapter("https://akab-other.luna.akamaiapis.net/") is not adapter)
+    # the pool is sized by the first session for the host, and blocks when exhausted
+    assert(adapter.poolmanager.connection_pool_kw["maxsize"] == 4)
+    assert(adapter.poolmanager.connection_pool_kw["block"] is True)
+    other_adapter = other.get_adapter("https://akab-other.luna.akamaiapis.net/")
+    assert(other_adapter.poolmanager.connection_pool_kw["maxsize"] == edgegrid.DEFAULT_MAX_CONNECTIONS)
+
+def test_retry_after():
+    assert(get_retry_after(response(200)) is None)
+    assert(get_retry_after(response(200, Retry_After="5")) == 5)
+    date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert(25 <= get_retry_after(response(200, Retry_After=date)) <= 30)
+    assert(get_retry_after(response(200, Retry_After="soon")) is None)
@@ -0,0 +1,64 @@
+import pytest
+from bossman.repo import Repo
+
+
+@pytest.fixture
+def repo(tmp_path, git_repo):
+    _repo = git_repo
+    def commit(message, **files):
+        for path, contents in files.items():
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).write_text(contents)
+            _repo.index.add([path])
+        _repo.index.commit(message)
+    commit("init", **{"akamai/property/www/rules.json": "{}", "akamai/property/www/hostnames.json": "[]"})
+    commit("api", **{"akamai/property/api/rules.json": "{}"})
+    _repo.git.checkout("-b", "feature")
+    commit("www rules", **{"akamai/property/www/rules.json": '{"a": 1}'})
+    _repo.git.checkout("main")
+    commit("api rules", **{"akamai/property/api/rules.json": '{"a": 1}'})
+    _repo.git.merge("feature", "--no-ff", "-m", "merge feature")
+    _repo.git.mv("akamai/property/api/rules.json", "akamai/property/api/rules2.json")
+    _repo.index.commit("rename")
+    return Repo(str(tmp_path))
+
+def messages(revisions):
+    return list(revision.short_message for revision in revisions)
+
+def test_full_log_follows_first_parent(repo):
+    assert(messages(repo.get_revisions()) == ["rename", "merge feature", "api rules", "api", "init"])
+    # without paths, nothing is filtered so nothing is indexed
+    assert(len(repo.history._touched) == 0)
+
+def test_log_restricted_to_paths(repo):
+    assert(messages(repo.get_revisions(paths=["akamai/property/www"])) == ["merge feature", "init"])
+    assert(messages(repo.get_revisions(paths=["akamai/property/api/rules.json"])) == ["rename", "api rules", "api"])
+
+def test_log_range(repo):
+    since = repo.get_revisions(paths=["akamai/property/api"])[-1].id
+    assert(messages(repo.get_revisions(since, "HEAD", ["akamai/property/api"])) == ["rename", "api rules"])
+
+def test_affected_paths_match_diffs(repo):
+    for revision in repo.get_revisions(paths=["akamai/property"]):
+        diffs = set(revision.changes.keys())
+        assert(diffs.issubset(set(revision.affected_paths)))
+
+def test_last_revision(repo):
+    revision = repo.get_last_revision(["akamai/property/www/hostnames.json"])
+    assert(revision.short_message == "init")
+
+def test_index_is_persisted(repo):
+    repo.get_revisions(paths=["akamai"])
+    fresh = Repo(repo._repo.working_tree_dir)
+    fresh.history._diff = None # would fail if anything had to be diffed again
+    assert(messages(fresh.get_revisions(paths=["akamai/property/www"])) == ["merge feature", "init"])
+
+def test_concurrent_reads(repo):
+    from concurrent.futures import ThreadPoolExecutor
+    expected = messages(repo.get_revisions(paths=["akamai/property/api"]))
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: repo.get_revisions(paths=["akamai/property/api"]), range(32)))
+    for revisions in results:
+        assert(messages(revisions) == expected)
+        # revisions created by other threads can be used from this one
+        assert(set(revisions[0].changes.keys()) == {"akamai/property/api/rules2.json"})
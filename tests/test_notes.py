@@ -0,0 +1,73 @@
+import pytest
+import git
+import yaml
+from bossman.repo import Repo
+
+
+@pytest.fixture
+def repo(tmp_path, git_repo):
+    _repo = git_repo
+    for i in range(3):
+        (tmp_path / "file.txt").write_text(str(i))
+        _repo.index.add(["file.txt"])
+        _repo.index.commit("commit {}".format(i))
+    return Repo(str(tmp_path))
+
+def test_notes_written_by_git_are_read(repo):
+    head = repo.get_head()
+    repo._repo.git.notes("--ref", "akamai/property/www", "add", "-m", yaml.safe_dump(dict(property_version=3)), head.commit.hexsha)
+    assert(head.get_notes("akamai/property/www").get("property_version") == 3)
+
+def test_notes_are_buffered_until_flushed(repo):
+    revisions = repo.get_revisions()
+    for idx, revision in enumerate(revisions):
+        revision.get_notes("akamai/property/www").set(property_version=idx)
+    with pytest.raises(git.GitCommandError):
+        repo._repo.git.notes("--ref", "akamai/property/www", "show", revisions[0].commit.hexsha)
+    repo.flush_notes()
+    # all the notes were written by a single notes commit
+    assert(len(list(repo._repo.iter_commits("refs/notes/akamai/property/www"))) == 1)
+    for idx, revision in enumerate(revisions):
+        notes = repo._repo.git.notes("--ref", "akamai/property/www", "show", revision.commit.hexsha)
+        assert(yaml.safe_load(notes) == dict(property_version=idx))
+
+def test_notes_update_existing(repo):
+    head = repo.get_head()
+    head.get_notes("akamai/property/www").set(property_version=1, has_errors=False)
+    repo.flush_notes()
+    head.get_notes("akamai/property/www").set(has_errors=True)
+    repo.flush_notes()
+    repo._forget_notes()
+    assert(head.get_notes("akamai/property/www").read() == dict(property_version=1, has_errors=True))
+
+def test_changed_notes_are_pushed_together(repo, tmp_path_factory):
+    remote = tmp_path_factory.mktemp("remote")
+    git.Repo.init(remote, bare=True)
+    repo._repo.create_remote("origin", str(remote))
+    head = repo.get_head()
+    head.get_notes("akamai/property/www").set(property_version=1)
+    head.get_notes("akamai/property/api").set(property_version=2)
+    repo.push_notes()
+    remote_refs = git.Repo(remote).git.for_each_ref("refs/notes/", format="%(refname)").splitlines()
+    assert(sorted(remote_refs) == ["refs/notes/akamai/property/api", "refs/notes/akamai/property/www"])
+    # nothing left to push
+    assert(len(repo._unpushed) == 0)
+    # fetching replaces the local index with what the remote has
+    repo._repo.git.update_ref("-d", "refs/notes/akamai/property/www")
+    repo.fetch_notes()
+    assert(head.get_notes("akamai/property/www").get("property_version") == 1)
+
+def test_notes_tree_is_valid(repo, tmp_path_factory):
+    _repo = repo._repo
+    for i in range(10):
+        _repo.index.commit("empty {}".format(i))
+    # with enough notes, sorting by blob rather than by name is bound to show
+    for idx, revision in enumerate(repo.get_revisions()):
+        revision.get_notes("akamai/property/www").set(property_version=idx)
+    repo.flush_notes()
+    repo._repo.git.fsck("--strict")
+    # hosts checking objects on push accept the notes
+    remote = tmp_path_factory.mktemp("remote")
+    git.Repo.init(remote, bare=True).git.config("receive.fsckObjects", "true")
+    repo._repo.create_remote("origin", str(remote))
+    repo._repo.git.push("origin", "refs/notes/akamai/property/www")
@@ -0,0 +1,191 @@
+import pytest
+import requests
+from bossman.plugins.akamai.lib.papi import PAPIClient, PAPIError
+
+
+class FakeSession:
+    """
+    Answers PAPI requests from a {(method, url): (status, json)} dict, recording them.
+    Values can also be functions of the request parameters.
+    """
+    def __init__(self, responses):
+        self.switch_key = None
+        self.responses = responses
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        status_code, json = self.responses.get((method, url), (404, {}))
+        if callable(json):
+            json = json(**kwargs.get("params", {}))
+        response = requests.Response()
+        response.status_code = status_code
+        response.json = lambda: json
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+@pytest.fixture
+def papi(edgerc):
+    client = PAPIClient(edgerc, "test")
+    client.session = FakeSession({
+        ("POST", "/papi/v1/search/find-by-value"): (200, {"versions": {"items": [{"propertyId": "prp_1"}]}}),
+        ("GET", "/papi/v1/properties/prp_1/versions/latest"): (200, {"versions": {"items": [{"propertyVersion": 3}]}}),
+    })
+    return client
+
+def test_property_id_is_cached(papi):
+    assert(papi.get_property_id("www") == "prp_1")
+    assert(papi.get_property_id("www") == "prp_1")
+    assert(papi.session.calls.count(("POST", "/papi/v1/search/find-by-value")) == 1)
+    # other clients for the same account share the cache
+    papi._property_names.clear()
+    assert(papi.get_property_id("www") == "prp_1")
+    assert(papi.session.calls.count(("POST", "/papi/v1/search/find-by-value")) == 1)
+
+def test_property_id_is_forgotten_on_404(papi):
+    property_id = papi.get_property_id("www")
+    assert(papi.get_latest_property_version(property_id).propertyVersion == 3)
+    # a missing version doesn't invalidate the property id
+    del papi.session.responses[("GET", "/papi/v1/properties/prp_1/versions/latest")]
+    with pytest.raises(PAPIError):
+        papi.get_latest_property_version(property_id)
+    papi.get_property_id("www")
+    assert(papi.session.calls.count(("POST", "/papi/v1/search/find-by-value")) == 1)
+    # a missing property does
+    papi.session.responses[("GET", "/papi/v1/properties/prp_1/versions/latest")] = (404, {"type": "https://problems.luna.akamaiapis.net/papi/v0/property-not-found", "title": "Property not found"})
+    with pytest.raises(PAPIError):
+        papi.get_latest_property_version(property_id)
+    papi.get_property_id("www")
+    assert(papi.session.calls.count(("POST", "/papi/v1/search/find-by-value")) == 2)
+    with pytest.raises(PAPIError):
+        papi.get_property("www")
+    papi.get_property_id("www")
+    assert(papi.session.calls.count(("POST", "/papi/v1/search/find-by-value")) == 3)
+
+def test_listed_properties_are_remembered(papi):
+    papi.session.responses[("GET", "/papi/v1/properties")] = (200, {"properties": {"items": [
+        {"propertyId": "prp_2", "propertyName": "api", "latestVersion": 2, "stagingVersion": 2, "productionVersion": 1},
+    ]}})
+    properties = papi.list_properties("ctr_1", "grp_1")
+    assert(list(prop.propertyName for prop in properties) == ["api"])
+    assert(papi.get_property_id("api") == "prp_2")
+    assert(("POST", "/papi/v1/search/find-by-value") not in papi.session.calls)
+
+def versions(count, editable=None, note="commit: c{}"):
+    # PAPI lists versions newest first; all of them were activated, except {editable}
+    def version(n):
+        status = "INACTIVE" if n == editable else "ACTIVE"
+        return {"propertyVersion": n, "note": note.format(n), "stagingStatus": status, "productionStatus": status}
+    def page(limit, offset):
+        numbers = range(count - int(offset), max(count - int(offset) - int(limit), 0), -1)
+        return {"propertyId": "prp_1", "versions": {"items": [version(n) for n in numbers]}}
+    return page
+
+def test_iter_property_versions_pages_adaptively(papi):
+    papi.session.responses[("GET", "/papi/v1/properties/prp_1/versions")] = (200, versions(100))
+    found = papi.find_latest_property_version("prp_1", lambda v: v.note == "commit: c95")
+    assert(found.propertyVersion == 95)
+    assert(len(papi.session.calls) == 1)
+    assert(papi.find_latest_property_version("prp_1", lambda v: v.note == "commit: c5", depth=50) is None)
+    found = papi.find_latest_property_version("prp_1", lambda v: v.note == "commit: c5")
+    assert(found.propertyVersion == 5)
+    # pages of 10, 20, 40, 80
+    assert(len(papi.session.calls) == 1 + 3 + 4)
+
+def test_indexed_property_versions(papi):
+    papi.session.responses[("GET", "/papi/v1/properties/prp_1/versions")] = (200, versions(100))
+    iter_versions = lambda predicate: papi.iter_indexed_property_versions("prp_1", predicate, latestVersion=100)
+    assert(next(iter_versions(lambda v: v.note == "commit: c95")).propertyVersion == 95)
+    assert(next(iter_versions(lambda v: v.note == "commit: c5")).propertyVersion == 5)
+    fetched = len(papi.session.calls)
+    # the index now covers everything
+    assert(next(iter_versions(lambda v: v.note == "commit: c1")).propertyVersion == 1)
+    assert(len(papi.session.calls) == fetched)
+    # new versions are fetched on top of the index
+    papi.session.responses[("GET", "/papi/v1/properties/prp_1/versions")] = (200, versions(103))
+    numbers = list(v.propertyVersion for v in papi.iter_indexed_property_versions("prp_1", depth=5, latestVersion=103))
+    assert(numbers == [103, 102, 101, 100, 99])
+    assert(len(papi.session.calls) == fetched + 1)
+
+def test_editable_versions_are_not_served_from_the_index(papi):
+    url = "/papi/v1/properties/prp_1/versions"
+    papi.session.responses[("GET", url)] = (200, versions(30, editable=30))
+    iter_versions = lambda: list(papi.iter_indexed_property_versions("prp_1", latestVersion=30))
+    assert(iter_versions()[0].note == "commit: c30")
+    # the latest version was never activated, and gets edited, e.g. in the Control Center
+    papi.session.responses[("GET", url)] = (200, versions(30, editable=30, note="edited {}"))
+    calls = papi.session.calls.count(("GET", url))
+    indexed = iter_versions()
+    assert(indexed[0].note == "edited 30")
+    # the versions that were activated are still served from the index
+    assert(indexed[-1].note == "commit: c1")
+    assert(papi.session.calls.count(("GET", url)) == calls + 1)
+
+def test_written_versions_are_forgotten(papi):
+    url = "/papi/v1/properties/prp_1/versions"
+    papi.session.responses[("GET", url)] = (200, versions(10))
+    papi.session.responses[("PUT", url + "/8/hostnames")] = (200, {"hostnames": {"items": []}})
+    list(papi.iter_indexed_property_versions("prp_1", latestVersion=10))
+    papi.update_property_hostnames("prp_1", 8, [])
+    assert(set(papi._property_versions_cache("prp_1").get_json().keys()) == set(str(n) for n in range(1, 11)) - {"8"})
+
+def test_indexed_property_versions_statuses(papi):
+    from bossman.plugins.akamai.lib.papi import PAPIProperty
+    remote = {3: ("ACTIVE", "ACTIVE"), 2: ("INACTIVE", "INACTIVE"), 1: ("DEACTIVATED", "DEACTIVATED")}
+    def version(n):
+        return {"propertyVersion": n, "stagingStatus": remote[n][0], "productionStatus": remote[n][1]}
+    def page(limit, offset):
+        latest = max(remote.keys())
+        numbers = range(latest - int(offset), max(latest - int(offset) - int(limit), 0), -1)
+        return {"propertyId": "prp_1", "versions": {"items": [version(n) for n in numbers]}}
+    papi.session.responses[("GET", "/papi/v1/properties/prp_1/versions")] = (200, page)
+    papi.session.responses[("GET", "/papi/v1/properties/prp_1/versions/4")] = (200, lambda: {"propertyId": "prp_1", "versions": {"items": [version(4)]}})
+    statuses = lambda versions: list((v.propertyVersion, v.stagingStatus, v.productionStatus) for v in versions)
+
+    prop = PAPIProperty(propertyId="prp_1", latestVersion=3, stagingVersion=3, productionVersion=3)
+    assert(len(papi.get_indexed_property_versions(prop)) == 3)
+    # v4 is created and being activated on staging
+    remote[4] = ("PENDING", "INACTIVE")
+    prop = PAPIProperty(propertyId="prp_1", latestVersion=4, stagingVersion=3, productionVersion=3)
+    assert(statuses(papi.get_indexed_property_versions(prop))[0] == (4, "PENDING", "INACTIVE"))
+    # the activation completes: the pending version is fetched again, the others are derived
+    remote.update({4: ("ACTIVE", "INACTIVE"), 3: ("DEACTIVATED", "ACTIVE")})
+    prop = PAPIProperty(propertyId="prp_1", latestVersion=4, stagingVersion=4, productionVersion=3)
+    calls = len(papi.session.calls)
+    assert(statuses(papi.get_indexed_property_versions(prop)) == [
+        (4, "ACTIVE", "INACTIVE"), (3, "DEACTIVATED", "ACTIVE"), (2, "INACTIVE", "INACTIVE"), (1, "DEACTIVATED", "DEACTIVATED"),
+    ])
+    assert(papi.session.calls[calls:] == [("GET", "/papi/v1/properties/prp_1/versions/4")])
+    # and nothing needs to be fetched anymore
+    papi.get_indexed_property_versions(prop)
+    assert(len(papi.session.calls) == calls + 1)
+
+def test_bulk_activation(papi):
+    from bossman.plugins.akamai.lib.papi import PAPIBulkActivation
+    papi.session.responses.update({
+        ("POST", "/papi/v1/bulk/activations"): (202, {"bulkActivationLink": "/papi/v1/bulk/activations/1"}),
+        ("GET", "/papi/v1/bulk/activations/1"): (200, {
+            "bulkActivationId": 1,
+            "bulkActivationStatus": "COMPLETE",
+            "activatePropertyVersions": [
+                {"propertyId": "prp_1", "propertyVersion": 3, "network": "STAGING", "taskStatus": "COMPLETE", "activationId": "atv_1", "activationStatus": "PENDING"},
+                {"propertyId": "prp_2", "propertyVersion": 1, "network": "STAGING", "taskStatus": "SUBMISSION_ERROR", "fatalError": '{"title": "Version already active"}'},
+            ],
+        }),
+    })
+    bulk_activation = PAPIBulkActivation()
+    bulk_activation.add("prp_1", 3, "STAGING", ["a@example.com"], "note")
+    bulk_activation.add("prp_2", 1, "STAGING", ["a@example.com"])
+    link = papi.bulk_activate(bulk_activation)
+    (_, status) = papi.get_bulk_activation_status(link)
+    assert(status.done)
+    assert([(item.property_id, item.activation_id, item.error) for item in status.items] == [
+        ("prp_1", "atv_1", None),
+        ("prp_2", None, "Version already active"),
+    ])
+    assert([item.already_active for item in status.items] == [False, True])
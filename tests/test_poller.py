@@ -0,0 +1,111 @@
+import pytest
+from bossman.plugins.akamai.lib import poller
+from bossman.plugins.akamai.lib.poller import ActivationPoller
+
+
+@pytest.fixture(autouse=True)
+def fast(monkeypatch):
+    monkeypatch.setattr(poller, "MIN_POLL_INTERVAL", 0)
+
+def test_activations_are_checked_by_group():
+    # number of checks left before each activation completes
+    remaining = {"atv_1": 2, "atv_2": 1, "atv_3": 3}
+    checks = []
+    def check(key, activation_ids):
+        checks.append((key, sorted(activation_ids)))
+        statuses = {}
+        for activation_id in activation_ids:
+            remaining[activation_id] -= 1
+            statuses[activation_id] = remaining[activation_id]
+        return (0.01, statuses)
+
+    _poller = ActivationPoller("test", check, interval=0.1)
+    updates = []
+    is_done = lambda status: status == 0
+    futures = [
+        _poller.track("prp_1", "atv_1", lambda status: updates.append(("atv_1", status)), is_done),
+        _poller.track("prp_1", "atv_2", lambda status: updates.append(("atv_2", status)), is_done),
+        _poller.track("prp_2", "atv_3", lambda status: updates.append(("atv_3", status)), is_done),
+    ]
+    for future in futures:
+        assert(future.result(timeout=5) == 0)
+    # activations of the same property share their status checks
+    assert(checks.count(("prp_1", ["atv_1", "atv_2"])) == 1)
+    assert(checks.count(("prp_1", ["atv_1"])) == 1)
+    assert(checks.count(("prp_2", ["atv_3"])) == 3)
+    assert([status for (activation_id, status) in updates if activation_id == "atv_3"] == [2, 1, 0])
+    # the thread stops once nothing is tracked anymore
+    thread = _poller.thread
+    if thread is not None:
+        thread.join(timeout=5)
+    assert(_poller.thread is None)
+
+def test_check_errors_fail_the_group_without_fetch():
+    def check(key, activation_ids):
+        raise RuntimeError("boom")
+    _poller = ActivationPoller("test", check, interval=0.01)
+    future = _poller.track("prp_1", "atv_1", lambda status: None, lambda status: True)
+    with pytest.raises(poller.ActivationPollingError, match="boom"):
+        future.result(timeout=5)
+
+def test_check_errors_fail_only_the_affected_activation():
+    def check(key, activation_ids):
+        raise RuntimeError("boom")
+    def fetch(key, activation_id):
+        if activation_id == "atv_2":
+            raise RuntimeError("gone")
+        return "ACTIVE"
+    _poller = ActivationPoller("test", check, interval=0.01, fetch=fetch)
+    is_done = lambda status: status == "ACTIVE"
+    futures = [_poller.track("prp_1", activation_id, lambda status: None, is_done) for activation_id in ("atv_1", "atv_2")]
+    assert(futures[0].result(timeout=5) == "ACTIVE")
+    with pytest.raises(poller.ActivationPollingError, match="gone"):
+        futures[1].result(timeout=5)
+
+def test_missing_activations_are_fetched():
+    checks, fetches = [], []
+    def check(key, activation_ids):
+        checks.append(sorted(activation_ids))
+        # atv_2 dropped out of the listing
+        return (None, {"atv_1": "PENDING"})
+    def fetch(key, activation_id):
+        fetches.append(activation_id)
+        if activation_id == "atv_3":
+            raise RuntimeError("not found")
+        return "ACTIVE"
+    _poller = ActivationPoller("test", check, interval=0.01, fetch=fetch, timeout=2)
+    is_done = lambda status: status == "ACTIVE"
+    futures = [_poller.track("prp_1", activation_id, lambda status: None, is_done) for activation_id in ("atv_1", "atv_2", "atv_3")]
+    assert(futures[1].result(timeout=5) == "ACTIVE")
+    with pytest.raises(poller.ActivationPollingError, match="missing from the last 3 status checks"):
+        futures[2].result(timeout=5)
+    # fetched once each, after missing from MAX_MISSES checks
+    assert(sorted(fetches) == ["atv_2", "atv_3"])
+    assert(checks[:poller.MAX_MISSES] == [["atv_1", "atv_2", "atv_3"]] * poller.MAX_MISSES)
+    # the activation that is listed keeps being polled
+    assert(not futures[0].done())
+
+def test_activations_time_out():
+    def check(key, activation_ids):
+        return (None, dict((activation_id, "PENDING") for activation_id in activation_ids))
+    _poller = ActivationPoller("test", check, interval=0.01, timeout=0.1)
+    future = _poller.track("prp_1", "atv_1", lambda status: None, lambda status: status == "ACTIVE")
+    with pytest.raises(poller.ActivationPollingError, match="not done"):
+        future.result(timeout=5)
+
+def test_default_release_many():
+    from concurrent.futures import Future
+    from bossman.abc import _release_each
+    tracked = Future()
+    def release(resource, revision, message, on_update):
+        if resource == "failed":
+            raise RuntimeError("boom")
+        return tracked if resource == "tracked" else None
+    futures = _release_each(release, ["done", "tracked", "failed"], None, None, None)
+    assert(futures[0].result(timeout=5) is None)
+    with pytest.raises(RuntimeError):
+        futures[2].result(timeout=5)
+    # resolves with the activation it waits for
+    assert(not futures[1].done())
+    tracked.set_result("ACTIVE")
+    assert(futures[1].result(timeout=5) == "ACTIVE")
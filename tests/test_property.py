@@ -0,0 +1,132 @@
+import json
+import os
+import jsonschema
+import pytest
+from bossman.config import ResourceTypeConfig
+from bossman.repo import Repo
+from bossman.cli.jsonl import JsonlWriter
+from bossman.plugins.akamai.property import ResourceType, PropertyStatus, with_comments
+from bossman.plugins.akamai.lib.papi import PAPIPropertyVersion, PAPIPropertyVersionHostnames, PAPIPropertyVersionRuleTree
+
+
+def test_comments_are_injected():
+    rule_tree = b'\n  {"ruleFormat": "v2021-01-01", "rules": {"name": "default", "comments": "keep"}}\n'
+    body = with_comments(rule_tree, json.loads(rule_tree), 'commit: "abc"')
+    assert(json.loads(body) == {"comments": 'commit: "abc"', "ruleFormat": "v2021-01-01", "rules": {"name": "default", "comments": "keep"}})
+    # the rule tree itself is sent as it was read
+    assert(body.endswith(rule_tree[4:]))
+
+def test_existing_comments_are_replaced():
+    rule_tree = b'{"comments": "old", "ruleFormat": "latest"}'
+    body = with_comments(rule_tree, json.loads(rule_tree), "new")
+    assert(json.loads(body) == {"comments": "new", "ruleFormat": "latest"})
+
+
+class FakePAPI:
+    """
+    Keeps the versions of a single property, recording the updates made to them.
+    """
+    def __init__(self):
+        self.versions = [PAPIPropertyVersion(propertyVersion=1, note="")]
+        self.calls = []
+
+    def get_property_id(self, name):
+        return "prp_1"
+
+    def get_rule_format_validator(self, productId, ruleFormat):
+        return jsonschema.Draft7Validator({})
+
+    def get_request_validator(self, filename):
+        return jsonschema.Draft7Validator({})
+
+    def iter_indexed_property_versions(self, property_id, predicate, depth=None):
+        return (v for v in reversed(self.versions) if predicate(v))
+
+    def get_latest_property_version(self, property_id):
+        return self.versions[-1]
+
+    def create_property_version(self, property_id, base):
+        self.versions.append(PAPIPropertyVersion(propertyVersion=len(self.versions) + 1, note=""))
+        return self.versions[-1]
+
+    def update_property_hostnames(self, property_id, version, hostnames):
+        self.calls.append("hostnames")
+        return PAPIPropertyVersionHostnames(etag="hostnames")
+
+    def put_property_rule_tree(self, property_id, version, body, ruleFormat=None, compress=False):
+        self.calls.append("rules")
+        self.versions[version - 1].note = json.loads(body).get("comments")
+        return PAPIPropertyVersionRuleTree(etag="rules")
+
+    def update_property_rule_tree_comments(self, property_id, version, comments, ruleFormat=None):
+        self.calls.append("comments")
+        self.versions[version - 1].note = comments
+        return PAPIPropertyVersionRuleTree(etag="comments")
+
+@pytest.fixture
+def property_type(tmp_path, git_repo, edgerc):
+    config = ResourceTypeConfig({
+        "module": "bossman.plugins.akamai.property",
+        "pattern": "akamai/property/{name}",
+        "options": {"edgerc": edgerc, "section": "test"},
+    })
+    resource_type = ResourceType(Repo(str(tmp_path)), config)
+    resource_type.papi = FakePAPI()
+    return resource_type
+
+def commit(resource_type, message, **files):
+    _repo = resource_type.repo._repo
+    for name, contents in files.items():
+        path = "akamai/property/www/{}.json".format(name)
+        with open("{}/{}".format(_repo.working_tree_dir, path), "w") as fd:
+            fd.write(contents)
+        _repo.index.add([path])
+    _repo.index.commit(message)
+    return resource_type.repo.get_revisions()[0]
+
+def test_unchanged_content_is_not_uploaded(property_type):
+    os.makedirs("{}/akamai/property/www".format(property_type.repo._repo.working_tree_dir))
+    resource = property_type.create_resource("akamai/property/www", name="www")
+    rules = '{"contractId": "c", "groupId": "g", "ruleFormat": "latest", "productId": "p", "rules": {}}'
+    first = commit(property_type, "init", rules=rules, hostnames="[]")
+    assert(not property_type.apply_change(resource, first).had_errors)
+    second = commit(property_type, "hostnames", hostnames='[{"cnameFrom": "www.example.com"}]')
+    assert(not property_type.apply_change(resource, second, first).had_errors)
+    third = commit(property_type, "rules", rules=rules.replace('"rules": {}', '"rules": {"name": "default"}'))
+    assert(not property_type.apply_change(resource, third, second).had_errors)
+    assert(property_type.papi.calls == ["hostnames", "rules", "hostnames", "comments", "rules"])
+    assert(property_type.papi.versions[2].note.startswith("hostnames"))
+
+def test_status_jsonl(tmp_path):
+    note = "update origin\n\nmore details\n\ncommit: abc123\nauthor: Jane Doe <jane@example.com>"
+    status = PropertyStatus(None, None, [
+        PAPIPropertyVersion(propertyVersion=1, updatedByUser="jdoe", productionStatus="ACTIVE", stagingStatus="INACTIVE"),
+        PAPIPropertyVersion(propertyVersion=2, note=note, productionStatus="INACTIVE", stagingStatus="ACTIVE"),
+    ])
+    output = tmp_path / "status.jsonl"
+    with open(output, "w") as stream:
+        JsonlWriter(stream).write(type="status", resource="akamai/property/www", **status.to_dict())
+    record = json.loads(output.read_text())
+    assert(record["exists"] and not record["dirty"])
+    assert(record["versions"][0] == {
+        "version": 2, "commit": "abc123", "subject": "update origin",
+        "author": "Jane Doe <jane@example.com>", "production": "INACTIVE", "staging": "ACTIVE",
+    })
+    assert(record["versions"][1]["commit"] is None)
+    assert(record["versions"][1]["author"] == "jdoe")
+
+def test_bulk_already_active_is_not_an_error(property_type):
+    from concurrent.futures import Future
+    from types import SimpleNamespace
+    from bossman.plugins.akamai.lib.papi import PAPIBulkActivationStatus
+    tracked = Future()
+    tracked.set_result(PAPIBulkActivationStatus(bulkActivationStatus="COMPLETE", activatePropertyVersions=[
+        {"propertyId": "prp_1", "propertyVersion": 3, "network": "STAGING", "taskStatus": "SUBMISSION_ERROR",
+         "fatalError": '{"type": "https://problems.luna.akamaiapis.net/papi/v0/activation/version-already-active", "status": 422}'},
+    ]))
+    release = SimpleNamespace(property_id="prp_1", property_version=3, describe=lambda status: status)
+    future = Future()
+    updates = []
+    property_type._on_bulk_activation_done([("www", release, future)], lambda *update: updates.append(update), tracked)
+    assert(future.result(timeout=1) is None)
+    assert(updates == [("www", "ALREADY ACTIVE", 1)])
@@ -0,0 +1,100 @@
+import pytest
+from bossman.abc import ResourceABC, ResourceTypeABC
+from bossman.config import ResourceTypeConfig
+from bossman.repo import Repo
+from bossman.resources import ResourceManager
+
+
+class Resource(ResourceABC):
+    def __init__(self, path, **kwargs):
+        super(Resource, self).__init__(path)
+        self._name = kwargs.get("name")
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def paths(self):
+        return (self.path,)
+
+class ResourceType(ResourceTypeABC):
+    def create_resource(self, path, **kwargs):
+        return Resource(path, **kwargs)
+
+    def get_resource_status(self, resource):
+        pass
+
+    def is_pending(self, resource, revision):
+        pass
+
+    def is_applied(self, resource, revision):
+        pass
+
+    def get_revision_details(self, resource, revision):
+        pass
+
+    def apply_change(self, resource, revision, previous_revision):
+        pass
+
+    def validate_working_tree(self, resource):
+        pass
+
+    def prerelease(self, resource, revision, message, on_update):
+        pass
+
+    def release(self, resource, revision, message, on_update):
+        pass
+
+@pytest.fixture
+def repo(tmp_path, git_repo):
+    _repo = git_repo
+    files = (
+        "README.md",
+        "akamai/property/www/rules.json",
+        "akamai/property/www/hostnames.json",
+        "akamai/property/api/rules.json",
+        "akamai/edgehostname/www.json",
+        "akamai/edgehostname/README.md",
+        "dist/akamai/property/other/rules.json",
+    )
+    for path in files:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("{}")
+    _repo.index.add(list(files))
+    _repo.index.commit("init")
+    return Repo(str(tmp_path))
+
+@pytest.fixture
+def resource_manager(repo):
+    return ResourceManager((
+        ResourceTypeConfig({"module": __name__, "pattern": "akamai/property/{name}"}),
+        ResourceTypeConfig({"module": __name__, "pattern": "akamai/edgehostname/{name}.json"}),
+    ), repo)
+
+def test_get_resources(repo, resource_manager):
+    resources = resource_manager.get_resources(repo)
+    assert(sorted(resource.path for resource in resources) == [
+        "akamai/edgehostname/www.json",
+        "akamai/property/api",
+        "akamai/property/www",
+    ])
+    assert(sorted(resource.name for resource in resources) == ["api", "www", "www"])
+
+def test_get_resources_cached(repo, resource_manager):
+    expected = resource_manager.get_resources(repo)
+    repo.get_tree_paths = None # would fail if the tree had to be listed again
+    assert(sorted(resource_manager.get_resources(repo)) == sorted(expected))
+
+def test_get_resources_from_working_copy(repo, resource_manager, tmp_path):
+    (tmp_path / ".gitignore").write_text("ignored/\n")
+    for path in ("akamai/property/new/rules.json", "ignored/akamai/property/x/rules.json"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("{}")
+    (tmp_path / "akamai/property/api/rules.json").unlink()
+    resources = resource_manager.get_resources_from_working_copy(repo)
+    assert(sorted(resource.path for resource in resources) == [
+        "akamai/edgehostname/www.json",
+        "akamai/property/new",
+        "akamai/property/www",
+    ])
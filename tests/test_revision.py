@@ -0,0 +1,43 @@
+import pytest
+from bossman.repo import Repo
+
+
+@pytest.fixture
+def repo(tmp_path, git_repo):
+    _repo = git_repo
+    (tmp_path / "akamai/property/www").mkdir(parents=True)
+    (tmp_path / "akamai/property/www/rules.json").write_text('{"a": "a"}')
+    (tmp_path / "akamai/property/www/notes.txt").write_text("banana")
+    _repo.index.add(["akamai/property/www/rules.json", "akamai/property/www/notes.txt"])
+    _repo.index.commit("init")
+    return Repo(str(tmp_path))
+
+def test_show_paths(repo):
+    head = repo.get_head()
+    contents = head.show_paths(["akamai/property/www/rules.json", "akamai/property/www/hostnames.json", "akamai/property/www"])
+    assert(contents == {"akamai/property/www/rules.json": b'{"a": "a"}'})
+    assert(head.show_path("akamai/property/www/rules.json", textconv=True) == '{"a": "a"}')
+
+def test_show_paths_textconv(repo):
+    with repo.config_writer() as config:
+        config.set_value('diff "banana"', "textconv", "sed s/a/o/g")
+    with open(repo._repo.working_tree_dir + "/.gitattributes", "w") as fd:
+        fd.write("*.txt diff=banana\n")
+    head = repo.get_head()
+    contents = head.show_paths(["akamai/property/www/rules.json", "akamai/property/www/notes.txt"], textconv=True)
+    assert(contents == {
+        "akamai/property/www/rules.json": '{"a": "a"}',
+        "akamai/property/www/notes.txt": "bonono",
+    })
+
+def test_show_paths_textconv_bytes(repo):
+    with repo.config_writer() as config:
+        config.set_value('diff "banana"', "textconv", "sed s/a/o/g")
+    with open(repo._repo.working_tree_dir + "/.gitattributes", "w") as fd:
+        fd.write("*.txt diff=banana\n")
+    head = repo.get_head()
+    contents = head.show_paths(["akamai/property/www/rules.json", "akamai/property/www/notes.txt"], textconv=True, decode=False)
+    assert(contents == {
+        "akamai/property/www/rules.json": b'{"a": "a"}',
+        "akamai/property/www/notes.txt": b"bonono",
+    })
@@ -0,0 +1,42 @@
+import pytest
+import jsonschema
+from concurrent.futures import ThreadPoolExecutor
+from bossman.plugins.akamai.utils import SchemaValidators
+from bossman.plugins.akamai.cloudlet_v3.schema import validate_policy_version
+from bossman.plugins.akamai.cloudlet_v3.error import PolicyVersionValidationError
+
+
+def test_schemas_are_loaded_once():
+    loads = []
+    def load():
+        loads.append(1)
+        return {"type": "object", "required": ["a"]}, None
+    validators = SchemaValidators()
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: validators.get("key", load), range(16)))
+    assert(len(loads) == 1)
+    SchemaValidators.validate(results[0], {"a": 1})
+    with pytest.raises(jsonschema.ValidationError):
+        SchemaValidators.validate(results[0], {})
+
+def test_slow_loads_dont_block_other_schemas():
+    import threading
+    loading = threading.Event()
+    release = threading.Event()
+    def slow_load():
+        loading.set()
+        release.wait(timeout=5)
+        return {"type": "object"}, None
+    validators = SchemaValidators()
+    with ThreadPoolExecutor(2) as executor:
+        slow = executor.submit(validators.get, "slow", slow_load)
+        assert(loading.wait(timeout=5))
+        # another schema can be loaded while the first one is loading
+        fast = executor.submit(validators.get, "fast", lambda: ({"type": "object"}, None))
+        assert(fast.result(timeout=1) is not None)
+        release.set()
+        assert(slow.result(timeout=5) is not None)
+
+def test_cloudlet_policy_version_validation():
+    with pytest.raises(PolicyVersionValidationError):
+        validate_policy_version({"matchRules": "not a list"})